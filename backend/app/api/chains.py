@@ -1,20 +1,24 @@
 """Chain API endpoints."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 from app.models.workflow import ChainConfig
-from app.services.chain_service import ChainService
+from app.services.runtime import ExecutionRuntime, get_runtime
 from app.utils.workflow_validator import WorkflowValidator
 
 router = APIRouter()
-_chain_service = ChainService()
 
 
 @router.post("/chains/execute", response_model=Dict[str, Any])
-async def execute_chain(chain_config: ChainConfig, input_data: Dict[str, Any], llm_config: Dict[str, Any] = None):
+async def execute_chain(
+    chain_config: ChainConfig,
+    input_data: Dict[str, Any],
+    llm_config: Dict[str, Any] = None,
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
     """Execute a chain directly."""
     try:
-        chain = await _chain_service.create_chain(chain_config, llm_config)
-        result = await _chain_service.execute_chain(chain, input_data)
+        chain = await runtime.chain_service.create_chain(chain_config, llm_config)
+        result = await runtime.chain_service.execute_chain(chain, input_data)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,9 @@
 """Execution API endpoints."""
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Response
 from typing import List, Optional, Dict, Any
 from app.models.execution import WorkflowExecution, ExecutionStreamUpdate, ExecutionStatus, ExecutionLog
 from app.models.workflow import Workflow, WorkflowDefinition
-from app.services.workflow_executor import WorkflowExecutor
+from app.services.runtime import ExecutionRuntime, get_runtime
 from fastapi.responses import StreamingResponse
 import json
 import asyncio
@@ -13,24 +13,41 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-_executor = WorkflowExecutor()
 _active_streams: Dict[str, asyncio.Event] = {}  # Track active streams for cancellation
 
+_ACTIVE_STATUSES = (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING)
+
 
 @router.get("/workflows/{workflow_id}/executions", response_model=List[WorkflowExecution])
 async def get_execution_history(
     workflow_id: str,
-    limit: int = Query(10, ge=1, le=100)
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Continue after the page that returned this X-Next-Cursor"),
+    status: Optional[ExecutionStatus] = Query(None),
+    payload: bool = Query(True, description="Include input, output and state"),
+    runtime: ExecutionRuntime = Depends(get_runtime)
 ):
-    """Get execution history for a workflow."""
-    executions = _executor.get_executions(workflow_id, limit)
+    """Get execution history for a workflow, newest first.
+    
+    When more executions exist, the ``X-Next-Cursor`` header holds the cursor
+    of the next page.
+    """
+    try:
+        executions, next_cursor = runtime.execution_store.page(
+            workflow_id, limit, cursor=cursor, status=status, payload=payload
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return executions
 
 
 @router.get("/workflows/{workflow_id}/executions/{execution_id}", response_model=WorkflowExecution)
-async def get_execution(workflow_id: str, execution_id: str):
+async def get_execution(workflow_id: str, execution_id: str, runtime: ExecutionRuntime = Depends(get_runtime)):
     """Get execution details."""
-    execution = _executor.get_execution(execution_id)
+    execution = runtime.executor.get_execution(execution_id)
     if not execution:
         raise HTTPException(status_code=404, detail="Execution not found")
     
@@ -41,9 +58,10 @@ async def get_execution(workflow_id: str, execution_id: str):
 
 
 @router.get("/workflows/{workflow_id}/executions/{execution_id}/stream")
-async def stream_execution(workflow_id: str, execution_id: str):
+async def stream_execution(workflow_id: str, execution_id: str, runtime: ExecutionRuntime = Depends(get_runtime)):
     """Stream execution updates (Server-Sent Events)."""
-    execution = _executor.get_execution(execution_id)
+    executor = runtime.executor
+    execution = executor.get_execution(execution_id)
     if not execution or execution.workflowId != workflow_id:
         raise HTTPException(status_code=404, detail="Execution not found")
     
@@ -73,15 +91,15 @@ async def stream_execution(workflow_id: str, execution_id: str):
                 return
             
             # For LangGraph workflows, stream execution updates
-            if execution.status == ExecutionStatus.RUNNING:
+            if execution.status in _ACTIVE_STATUSES:
                 # Get workflow and definition
                 from app.api.workflows import _workflows, _workflow_definitions
                 workflow = _workflows.get(workflow_id)
                 definition = _workflow_definitions.get(workflow_id, WorkflowDefinition())
                 
-                if workflow and workflow.engine.value == "langgraph":
+                if workflow and workflow.engine.value == "langgraph" and execution.queuedAt is None:
                     # Stream LangGraph execution
-                    graph = await _executor.langgraph_service.create_graph(definition)
+                    graph = await runtime.langgraph_service.create_graph(definition)
                     input_data = execution.input or {}
                     
                     initial_state = {"input": input_data}
@@ -91,7 +109,7 @@ async def stream_execution(workflow_id: str, execution_id: str):
                         defaults = validator.get_state_schema_defaults(definition.stateSchema)
                         initial_state.update(defaults)
                     
-                    async for event in _executor.langgraph_service.stream_execution(graph, input_data):
+                    async for event in runtime.langgraph_service.stream_execution(graph, input_data):
                         # Check for cancellation
                         if cancel_event.is_set():
                             cancel_update = ExecutionStreamUpdate(
@@ -127,10 +145,11 @@ async def stream_execution(workflow_id: str, execution_id: str):
                             yield f"data: {error_update.model_dump_json()}\n\n"
                             break
                 else:
-                    # For non-LangGraph workflows, poll for updates
+                    # For non-LangGraph and submitted workflows, poll for updates
+                    last_status = execution.status
                     while not cancel_event.is_set():
-                        updated_execution = _executor.get_execution(execution_id)
-                        if updated_execution and updated_execution.status != ExecutionStatus.RUNNING:
+                        updated_execution = executor.get_execution(execution_id)
+                        if updated_execution and updated_execution.status not in _ACTIVE_STATUSES:
                             final_update = ExecutionStreamUpdate(
                                 executionId=execution_id,
                                 status=updated_execution.status,
@@ -139,6 +158,11 @@ async def stream_execution(workflow_id: str, execution_id: str):
                             )
                             yield f"data: {final_update.model_dump_json()}\n\n"
                             break
+                        if updated_execution and updated_execution.status != last_status:
+                            # A queued execution was picked up by a worker
+                            last_status = updated_execution.status
+                            status_update = ExecutionStreamUpdate(executionId=execution_id, status=last_status)
+                            yield f"data: {status_update.model_dump_json()}\n\n"
                         await asyncio.sleep(0.5)  # Poll every 500ms
         except asyncio.CancelledError:
             logger.info(f"Stream cancelled for execution {execution_id}")
@@ -159,23 +183,54 @@ async def stream_execution(workflow_id: str, execution_id: str):
 
 
 @router.post("/workflows/{workflow_id}/executions/{execution_id}/cancel", response_model=WorkflowExecution)
-async def cancel_execution(workflow_id: str, execution_id: str):
-    """Cancel a running execution."""
-    execution = _executor.get_execution(execution_id)
+async def cancel_execution(workflow_id: str, execution_id: str, runtime: ExecutionRuntime = Depends(get_runtime)):
+    """Cancel a queued or running execution."""
+    execution = runtime.executor.get_execution(execution_id)
     if not execution or execution.workflowId != workflow_id:
         raise HTTPException(status_code=404, detail="Execution not found")
     
-    if execution.status != ExecutionStatus.RUNNING:
+    if execution.status not in _ACTIVE_STATUSES:
         raise HTTPException(status_code=400, detail="Execution is not running")
     
     # Set cancellation event if stream is active
     if execution_id in _active_streams:
         _active_streams[execution_id].set()
     
-    # Update execution status
+    # The executor cancels its task, stopping in-flight LLM and tool calls
+    cancelled = runtime.executor.cancel_execution(execution_id)
+    if cancelled:
+        return cancelled
+    
     execution.status = ExecutionStatus.CANCELLED
     execution.completedAt = datetime.now().isoformat()
     execution.error = "Execution cancelled by user"
     
     return execution
 
+
+
+@router.post("/workflows/{workflow_id}/executions/{execution_id}/resume", response_model=WorkflowExecution)
+async def resume_execution(workflow_id: str, execution_id: str, runtime: ExecutionRuntime = Depends(get_runtime)):
+    """Resume a failed LangGraph execution from its last successful node checkpoints."""
+    from app.api.workflows import _workflows, _workflow_definitions
+    
+    executor = runtime.executor
+    execution = executor.get_execution(execution_id)
+    if not execution or execution.workflowId != workflow_id:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    workflow = _workflows.get(workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    if workflow.engine.value != "langgraph":
+        raise HTTPException(status_code=400, detail="Only LangGraph executions can be resumed")
+    
+    if execution.status not in [ExecutionStatus.FAILED, ExecutionStatus.CANCELLED]:
+        raise HTTPException(status_code=400, detail="Only failed or cancelled executions can be resumed")
+    
+    if not executor.langgraph_service.get_checkpoints(execution_id):
+        raise HTTPException(status_code=409, detail="No checkpoints recorded for this execution")
+    
+    definition = _workflow_definitions.get(workflow_id, WorkflowDefinition())
+    return await executor.resume_workflow(workflow, definition, execution)
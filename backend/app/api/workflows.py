@@ -1,17 +1,20 @@
 """Workflow API endpoints."""
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, List, Optional
 from app.models.workflow import (
     Workflow, WorkflowCreate, WorkflowUpdate, WorkflowDefinition,
     WorkflowEngine, WorkflowType
 )
-from app.models.execution import WorkflowExecution
-from app.services.workflow_executor import WorkflowExecutor
-from app.utils.engine_router import EngineRouter
+from app.models.execution import WorkflowExecution, ExecutionStatus
+from app.services.runtime import ExecutionRuntime, get_runtime
 from app.utils.workflow_migrator import WorkflowMigrator
 from app.utils.workflow_converter import WorkflowConverter
 from app.utils.workflow_validator import WorkflowValidator
+from app.exceptions import ExecutionQueueFullError, IdempotencyKeyConflictError, WorkflowExecutionError
+from app.config import settings
 from datetime import datetime
+import json
 import uuid
 
 router = APIRouter()
@@ -19,12 +22,18 @@ router = APIRouter()
 # In-memory storage (would be replaced with database)
 _workflows: dict[str, Workflow] = {}
 _workflow_definitions: dict[str, WorkflowDefinition] = {}
-_executor = WorkflowExecutor()
-_router = EngineRouter()
 _migrator = WorkflowMigrator()
 _converter = WorkflowConverter()
 
 
+def _invalidate_caches(runtime: ExecutionRuntime, workflow_id: str):
+    """Drop the compiled graph and cached results of a workflow's current definition."""
+    definition = _workflow_definitions.get(workflow_id)
+    if definition is not None:
+        runtime.langgraph_service.invalidate_graph(definition)
+    runtime.result_cache.invalidate(workflow_id)
+
+
 @router.get("/workflows", response_model=dict)
 async def list_workflows(
     engine: Optional[WorkflowEngine] = Query(None, description="Filter by engine"),
@@ -89,7 +98,11 @@ async def create_workflow(workflow_data: WorkflowCreate):
 
 
 @router.put("/workflows/{workflow_id}", response_model=Workflow)
-async def update_workflow(workflow_id: str, workflow_data: WorkflowUpdate):
+async def update_workflow(
+    workflow_id: str,
+    workflow_data: WorkflowUpdate,
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
     """Update a workflow."""
     workflow = _workflows.get(workflow_id)
     if not workflow:
@@ -102,16 +115,18 @@ async def update_workflow(workflow_id: str, workflow_data: WorkflowUpdate):
     
     workflow.updatedAt = datetime.now().isoformat()
     _workflows[workflow_id] = workflow
+    runtime.result_cache.invalidate(workflow_id)
     
     return workflow
 
 
 @router.delete("/workflows/{workflow_id}", status_code=204)
-async def delete_workflow(workflow_id: str):
+async def delete_workflow(workflow_id: str, runtime: ExecutionRuntime = Depends(get_runtime)):
     """Delete a workflow."""
     if workflow_id not in _workflows:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
+    _invalidate_caches(runtime, workflow_id)
     del _workflows[workflow_id]
     _workflow_definitions.pop(workflow_id, None)
     return None
@@ -133,11 +148,16 @@ async def get_workflow_definition(workflow_id: str):
 
 
 @router.put("/workflows/{workflow_id}/definition", response_model=WorkflowDefinition)
-async def update_workflow_definition(workflow_id: str, definition: WorkflowDefinition):
+async def update_workflow_definition(
+    workflow_id: str,
+    definition: WorkflowDefinition,
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
     """Update workflow definition."""
     if workflow_id not in _workflows:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
+    _invalidate_caches(runtime, workflow_id)
     _workflow_definitions[workflow_id] = definition
     
     # Update workflow updatedAt
@@ -148,22 +168,142 @@ async def update_workflow_definition(workflow_id: str, definition: WorkflowDefin
 
 
 @router.post("/workflows/{workflow_id}/execute", response_model=WorkflowExecution)
-async def execute_workflow(workflow_id: str, input_data: dict = None):
-    """Execute a workflow."""
+async def execute_workflow(
+    workflow_id: str,
+    input_data: dict = None,
+    wait: bool = Query(True, description="Run inline, or queue the execution and return 202 at once"),
+    lane: Optional[str] = Query(None, description="Priority lane for queued executions (default interactive)"),
+    idempotency_key: Optional[str] = Header(None, description="Repeated requests with this key get the same execution"),
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
+    """Execute a workflow.
+    
+    With ``wait=false`` the execution is queued in a priority lane and
+    returned with status ``queued`` and a 202; follow it through the
+    execution GET and stream endpoints (the ``Location`` header points at it).
+    
+    A request repeating an ``Idempotency-Key`` (or, with coalescing enabled,
+    matching an identical execution in flight) gets that execution instead of
+    a new run, marked with ``X-Execution-Reused: true``.
+    """
     workflow = _workflows.get(workflow_id)
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     definition = _workflow_definitions.get(workflow_id, WorkflowDefinition())
+    executor = runtime.executor
+    
+    try:
+        duplicate = executor.find_duplicate(workflow, definition, input_data, idempotency_key)
+    except IdempotencyKeyConflictError as e:
+        raise HTTPException(status_code=422, detail=e.message)
+    if duplicate:
+        if wait:
+            duplicate = await executor.wait_for_execution(duplicate)
+        active = duplicate.status in (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING)
+        return JSONResponse(
+            status_code=202 if active else 200,
+            content=duplicate.model_dump(mode="json"),
+            headers={
+                "Location": f"{settings.api_prefix}/workflows/{workflow_id}/executions/{duplicate.id}",
+                "X-Execution-Reused": "true"
+            }
+        )
+    
+    if not wait:
+        try:
+            execution = executor.submit_workflow(workflow, definition, input_data, lane, idempotency_key)
+        except ExecutionQueueFullError as e:
+            raise HTTPException(status_code=503, detail=e.message, headers={"Retry-After": "1"})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return JSONResponse(
+            status_code=202,
+            content=execution.model_dump(mode="json"),
+            headers={"Location": f"{settings.api_prefix}/workflows/{workflow_id}/executions/{execution.id}"}
+        )
     
     # Execute workflow
-    execution = await _executor.execute_workflow(workflow, definition, input_data)
+    execution = await executor.execute_workflow(workflow, definition, input_data, idempotency_key)
     
     return execution
 
 
+def _parse_batch_inputs(body: bytes, content_type: str) -> List[Any]:
+    """Parse batch inputs from a JSON array or NDJSON (one input per line) body."""
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    
+    if "ndjson" not in content_type and text.startswith("["):
+        inputs = json.loads(text)
+        if not isinstance(inputs, list):
+            raise ValueError("Expected a JSON array of inputs")
+        return inputs
+    
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+@router.post("/workflows/{workflow_id}/execute-batch")
+async def execute_workflow_batch(
+    workflow_id: str,
+    request: Request,
+    concurrency: int = Query(None, ge=1, le=256),
+    lane: str = Query("batch", description="Priority lane the items run in"),
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
+    """Execute a workflow over many inputs, streaming NDJSON results as items finish.
+    
+    The body is a JSON array of inputs or NDJSON with one input per line. The
+    workflow is compiled once and items run with bounded concurrency in a
+    priority lane of the execution queue (``batch`` by default).
+    """
+    workflow = _workflows.get(workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    try:
+        runtime.executor.execution_queue.lane(lane)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        inputs = _parse_batch_inputs(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch input: {str(e)}")
+    
+    if len(inputs) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the maximum of {settings.batch_max_items} inputs"
+        )
+    
+    definition = _workflow_definitions.get(workflow_id, WorkflowDefinition())
+    try:
+        runner = await runtime.executor.create_runner(workflow, definition)
+    except (ValueError, WorkflowExecutionError) as e:
+        raise HTTPException(status_code=400, detail=f"Workflow compilation failed: {str(e)}")
+    
+    async def generate():
+        results = runtime.executor.execute_batch(
+            runner,
+            inputs,
+            concurrency or settings.batch_max_concurrency,
+            engine=workflow.engine.value,
+            lane=lane
+        )
+        async for item_result in results:
+            yield json.dumps(item_result, default=str) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.post("/workflows/{workflow_id}/compile", response_model=dict)
-async def compile_workflow(workflow_id: str, target_engine: Optional[WorkflowEngine] = None):
+async def compile_workflow(
+    workflow_id: str,
+    target_engine: Optional[WorkflowEngine] = None,
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
     """Compile workflow to target engine format."""
     workflow = _workflows.get(workflow_id)
     if not workflow:
@@ -171,9 +311,10 @@ async def compile_workflow(workflow_id: str, target_engine: Optional[WorkflowEng
     
     definition = _workflow_definitions.get(workflow_id, WorkflowDefinition())
     target = target_engine or workflow.engine
+    optimization = None
     
     if target == WorkflowEngine.LANGGRAPH:
-        compiled = _converter.convert_to_langgraph(definition)
+        compiled, optimization = runtime.langgraph_service.plan_graph(definition)
     elif target == WorkflowEngine.LANGCHAIN:
         if workflow.workflowType == "agent":
             compiled = _converter.convert_to_langchain_agent(definition)
@@ -185,12 +326,17 @@ async def compile_workflow(workflow_id: str, target_engine: Optional[WorkflowEng
     return {
         "workflow_id": workflow_id,
         "target_engine": target,
-        "compiled": compiled
+        "compiled": compiled,
+        "optimization": optimization
     }
 
 
 @router.post("/workflows/{workflow_id}/migrate", response_model=dict)
-async def migrate_workflow(workflow_id: str, target_engine: WorkflowEngine):
+async def migrate_workflow(
+    workflow_id: str,
+    target_engine: WorkflowEngine,
+    runtime: ExecutionRuntime = Depends(get_runtime)
+):
     """Migrate workflow to target engine."""
     workflow = _workflows.get(workflow_id)
     if not workflow:
@@ -202,6 +348,7 @@ async def migrate_workflow(workflow_id: str, target_engine: WorkflowEngine):
     
     if result["success"]:
         # Update stored workflow and definition
+        _invalidate_caches(runtime, workflow_id)
         _workflows[workflow_id] = result["migrated_workflow"]
         _workflow_definitions[workflow_id] = result["migrated_definition"]
     
@@ -31,6 +31,55 @@ class Settings(BaseSettings):
     
     # Workflow Engine Configuration
     default_engine: str = "flowise"  # flowise, langchain, langgraph
+    graph_cache_max_size: int = 128  # Compiled LangGraph graphs kept in memory
+    graph_max_concurrency: int = 8  # Parallel branches running at once per fan-out
+    graph_optimize: bool = True  # Prune, collapse and fuse graph nodes before compiling
+    transform_sandbox_workers: int = 2  # Worker processes for sandboxed transforms (0 runs them in threads)
+    transform_sandbox_timeout_ms: int = 30000  # Default timeout per sandboxed transform call
+    transform_sandbox_memory_mb: int = 512  # Memory a sandboxed transform may allocate per worker
+    transform_sandbox_shared_memory_bytes: int = 1048576  # Strings/bytes at least this large skip pickling
+    batch_max_concurrency: int = 8  # Default items running at once per batch execution
+    batch_max_items: int = 10000  # Maximum inputs accepted by one batch execution
+    execution_deadline_ms: int = 0  # Default end-to-end execution deadline (0 disables)
+    execution_max_tokens: int = 0  # Default token budget per execution (0 disables)
+    execution_max_cost: float = 0.0  # Default cost budget per execution in USD (0 disables)
+    execution_workers: int = 8  # Workers running submitted (asynchronous) executions
+    execution_queue_max_size: int = 11000  # Submitted executions allowed to wait for a worker across lanes (0 disables)
+    execution_engine_limits: dict[str, int] = {"langgraph": 8, "langchain": 4, "flowise": 4}  # Running at once per engine
+    execution_coalescing: bool = False  # Identical executions in flight share one run (langgraphConfig.coalesce overrides)
+    idempotency_key_ttl_seconds: int = 24 * 3600  # How long an Idempotency-Key maps to its execution
+    idempotency_max_keys: int = 10000  # Idempotency keys remembered at most
+    # Priority lanes: scheduling weight, executions running at once (0 allows every worker) and queue depth.
+    # Keeping batch maxRunning below execution_workers reserves workers for interactive executions.
+    execution_lanes: dict[str, dict[str, int]] = {
+        "interactive": {"weight": 8, "maxRunning": 8, "maxQueued": 1000},
+        "batch": {"weight": 1, "maxRunning": 6, "maxQueued": 10000}
+    }
+    
+    # Execution History Configuration
+    execution_store_backend: str = "memory"  # memory, sqlite
+    execution_store_path: str = "data/executions"  # Directory for the sqlite backend
+    execution_store_flush_ms: int = 200  # Longest a sqlite write waits to be batched
+    execution_store_batch_size: int = 500  # Pending sqlite writes that trigger an immediate flush
+    execution_store_compress_bytes: int = 1024  # Input/output/state payloads at least this large are compressed
+    execution_history_max_executions: int = 10000  # Finished executions kept in history (0 disables)
+    execution_history_max_bytes: int = 268435456  # Approximate serialized size of the history (0 disables)
+    execution_history_ttl_seconds: int = 24 * 3600  # Finished executions older than this are dropped (0 disables)
+    
+    # Result Cache Configuration (workflows opt in with langgraphConfig.resultCache)
+    result_cache_max_entries: int = 1000  # Results kept in memory
+    result_cache_ttl_seconds: int = 3600  # Default lifetime of a cached result
+    result_cache_disk_path: Optional[str] = None  # Directory for the disk tier (None keeps results in memory only)
+    result_cache_disk_max_entries: int = 100000  # Results kept in the disk tier
+    
+    # Checkpoint Configuration
+    checkpoint_backend: str = "memory"  # memory, sqlite, file
+    checkpoint_path: str = "data/checkpoints"  # Directory for sqlite and file backends
+    checkpoint_max_executions: int = 1000
+    checkpoint_max_per_execution: int = 100
+    checkpoint_ttl_seconds: int = 7 * 24 * 3600
+    checkpoint_flush_ms: int = 200  # Longest a sqlite or file checkpoint write waits to be batched
+    checkpoint_retention_interval_seconds: int = 60  # How often the retention limits are enforced
     
     # LangFuse Configuration
     langfuse_host: str = "https://cloud.langfuse.com"
@@ -67,3 +67,58 @@ class TransformExecutionError(WorkflowExecutionError):
         })
         super().__init__(message, error_code="TRANSFORM_EXECUTION_ERROR", context=context)
 
+
+class ExecutionTimeoutError(WorkflowExecutionError):
+    """Exception raised when a node or execution exceeds its time budget."""
+    
+    def __init__(self, message: str, node_id: Optional[str] = None, timeout_ms: Optional[int] = None, **kwargs):
+        context = kwargs.get("context", {})
+        context.update({
+            "node_id": node_id,
+            "timeout_ms": timeout_ms
+        })
+        super().__init__(message, error_code="EXECUTION_TIMEOUT", context=context)
+
+
+class ExecutionCancelledError(WorkflowExecutionError):
+    """Exception raised inside an execution that was cancelled."""
+    
+    def __init__(self, message: str, execution_id: Optional[str] = None, **kwargs):
+        context = kwargs.get("context", {})
+        context.update({
+            "execution_id": execution_id
+        })
+        super().__init__(message, error_code="EXECUTION_CANCELLED", context=context)
+
+
+class BudgetExceededError(WorkflowExecutionError):
+    """Exception raised when an execution exhausts its token or cost budget."""
+    
+    def __init__(self, message: str, usage: Optional[Dict[str, Any]] = None, **kwargs):
+        context = kwargs.get("context", {})
+        context.update({
+            "usage": usage or {}
+        })
+        super().__init__(message, error_code="BUDGET_EXCEEDED", context=context)
+
+
+class ExecutionQueueFullError(WorkflowExecutionError):
+    """Exception raised when an execution is submitted to a full queue."""
+    
+    def __init__(self, message: str, max_size: Optional[int] = None, **kwargs):
+        context = kwargs.get("context", {})
+        context.update({
+            "max_size": max_size
+        })
+        super().__init__(message, error_code="EXECUTION_QUEUE_FULL", context=context)
+
+
+class IdempotencyKeyConflictError(WorkflowExecutionError):
+    """Exception raised when an idempotency key is reused for a different request."""
+    
+    def __init__(self, message: str, idempotency_key: Optional[str] = None, **kwargs):
+        context = kwargs.get("context", {})
+        context.update({
+            "idempotency_key": idempotency_key
+        })
+        super().__init__(message, error_code="IDEMPOTENCY_KEY_CONFLICT", context=context)
@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api import workflows, executions, agents, chains, langfuse, gitops
+from app.services.runtime import close_runtime, get_runtime
 
 app = FastAPI(
     title=settings.api_title,
@@ -28,6 +29,18 @@ app.include_router(langfuse.router, prefix=settings.api_prefix, tags=["langfuse"
 app.include_router(gitops.router, prefix=settings.api_prefix, tags=["gitops"])
 
 
+@app.on_event("startup")
+async def startup():
+    """Create the execution runtime shared by every router."""
+    get_runtime()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop queued executions and write executions still waiting in the execution store."""
+    await close_runtime()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -7,6 +7,7 @@ from enum import Enum
 
 class ExecutionStatus(str, Enum):
     """Execution status."""
+    QUEUED = "queued"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
@@ -27,6 +28,7 @@ class WorkflowExecution(BaseModel):
     workflowId: str
     status: ExecutionStatus
     startedAt: str
+    queuedAt: Optional[str] = None  # Set for submitted executions; startedAt is when a worker picked it up
     completedAt: Optional[str] = None
     duration: Optional[int] = None  # milliseconds
     input: Optional[Dict[str, Any]] = None
@@ -38,6 +40,9 @@ class WorkflowExecution(BaseModel):
     state: Optional[Dict[str, Any]] = None  # For Langgraph state
     toolCalls: List[Dict[str, Any]] = Field(default_factory=list)  # For agent executions
     reasoningSteps: List[str] = Field(default_factory=list)  # For agent reasoning
+    usage: Optional[Dict[str, Any]] = None  # Token usage, cost and budget consumed
+    cacheHit: bool = False  # Output served from the result cache without running any node
+    cachedFrom: Optional[str] = None  # Execution that produced the cached output
 
 
 class ExecutionCreate(BaseModel):
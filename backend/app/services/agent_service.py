@@ -7,8 +7,16 @@ from langchain.tools import BaseTool
 from app.services.mcp_adapter import MCPAdapter
 from app.services.llm_service import LLMService
 from app.models.workflow import AgentConfig
-from app.exceptions import LLMExecutionError, ToolExecutionError, WorkflowExecutionError
+from app.exceptions import (
+    LLMExecutionError,
+    ToolExecutionError,
+    WorkflowExecutionError,
+    ExecutionTimeoutError,
+    BudgetExceededError
+)
 from app.utils.retry import retry_on_failure, RetryConfig
+from app.utils.deadline import run_with_timeout
+from app.services.usage_tracker import usage_callbacks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,9 +25,9 @@ logger = logging.getLogger(__name__)
 class AgentService:
     """Service for creating and executing Langchain agents."""
     
-    def __init__(self):
-        self.mcp_adapter = MCPAdapter()
-        self.llm_service = LLMService()
+    def __init__(self, mcp_adapter: Optional[MCPAdapter] = None, llm_service: Optional[LLMService] = None):
+        self.mcp_adapter = mcp_adapter or MCPAdapter()
+        self.llm_service = llm_service or LLMService()
         self._agent_cache: Dict[str, AgentExecutor] = {}
     
     async def create_agent(
@@ -140,10 +148,13 @@ class AgentService:
     ) -> Dict[str, Any]:
         """Execute an agent with input."""
         try:
-            result = await agent.ainvoke({
-                "input": input_text,
-                "chat_history": chat_history or []
-            })
+            result = await run_with_timeout(agent.ainvoke(
+                {
+                    "input": input_text,
+                    "chat_history": chat_history or []
+                },
+                config={"callbacks": usage_callbacks()}
+            ))
             
             return {
                 "output": result.get("output", ""),
@@ -151,9 +162,7 @@ class AgentService:
                 "tool_calls": self._extract_tool_calls(result.get("intermediate_steps", [])),
                 "reasoning": self._extract_reasoning(result)
             }
-        except ToolExecutionError:
-            raise
-        except LLMExecutionError:
+        except (ToolExecutionError, LLMExecutionError, ExecutionTimeoutError, BudgetExceededError):
             raise
         except Exception as e:
             logger.error(f"Agent execution failed: {str(e)}")
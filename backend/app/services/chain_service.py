@@ -7,8 +7,17 @@ from langchain.tools import BaseTool
 from app.services.mcp_adapter import MCPAdapter
 from app.services.llm_service import LLMService
 from app.models.workflow import ChainConfig
-from app.exceptions import LLMExecutionError, WorkflowExecutionError, TransformExecutionError
+from app.exceptions import (
+    LLMExecutionError,
+    WorkflowExecutionError,
+    TransformExecutionError,
+    ExecutionTimeoutError,
+    BudgetExceededError
+)
 from app.utils.retry import retry_on_failure, RetryConfig
+from app.utils.deadline import run_with_timeout
+from app.utils.transforms import get_transform, transform_type_and_config
+from app.services.usage_tracker import usage_callbacks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,9 +26,9 @@ logger = logging.getLogger(__name__)
 class ChainService:
     """Service for creating and executing Langchain chains."""
     
-    def __init__(self):
-        self.mcp_adapter = MCPAdapter()
-        self.llm_service = LLMService()
+    def __init__(self, mcp_adapter: Optional[MCPAdapter] = None, llm_service: Optional[LLMService] = None):
+        self.mcp_adapter = mcp_adapter or MCPAdapter()
+        self.llm_service = llm_service or LLMService()
     
     async def create_chain(
         self,
@@ -45,31 +54,31 @@ class ChainService:
             # Create LLM
             llm = self._create_llm(llm_config or {})
         
-        # Create chains for each node
-        chains = []
-        for node_id in config.nodes:
-            # Get node config (would come from workflow definition)
-            # For now, create a simple chain
-            prompt = ChatPromptTemplate.from_template("{input}")
-            chain = LLMChain(llm=llm, prompt=prompt, output_key=node_id)
-            chains.append(chain)
+            # Create chains for each node
+            chains = []
+            for node_id in config.nodes:
+                # Get node config (would come from workflow definition)
+                # For now, create a simple chain
+                prompt = ChatPromptTemplate.from_template("{input}")
+                chain = LLMChain(llm=llm, prompt=prompt, output_key=node_id)
+                chains.append(chain)
         
-        # Create sequential chain
-        if len(chains) > 1:
-            return SequentialChain(
-                chains=chains,
-                input_variables=["input"],
-                output_variables=[chains[-1].output_key]
-            )
-        elif chains:
-            return chains[0]
-        else:
-            # Return a passthrough chain
-            return TransformChain(
-                input_variables=["input"],
-                output_variables=["output"],
-                transform=lambda x: {"output": x["input"]}
-            )
+            # Create sequential chain
+            if len(chains) > 1:
+                return SequentialChain(
+                    chains=chains,
+                    input_variables=["input"],
+                    output_variables=[chains[-1].output_key]
+                )
+            elif chains:
+                return chains[0]
+            else:
+                # Return a passthrough chain
+                return TransformChain(
+                    input_variables=["input"],
+                    output_variables=["output"],
+                    transform=lambda x: {"output": x["input"]}
+                )
         except Exception as e:
             logger.error(f"Failed to create sequential chain: {str(e)}")
             raise WorkflowExecutionError(
@@ -79,38 +88,44 @@ class ChainService:
             )
     
     def _create_transform_chain(self, config: ChainConfig):
-        """Create a transform chain."""
+        """Create a transform chain applying the node transforms in node order.
+        
+        Uses the same compiled transforms as Langgraph transform nodes.
+        """
         try:
-            transforms = config.transforms or {}
-            
-            def transform_func(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            steps = []
+            for node_id in self._transform_order(config):
+                transform = config.transforms[node_id]
+                transform_type, _ = transform_type_and_config(transform)
                 try:
-                    result = inputs.copy()
-                    for node_id, transform in transforms.items():
-                        # Apply transform
-                        if isinstance(transform, dict):
-                            transform_type = transform.get("type", "passthrough")
-                            transform_config = transform.get("config", {})
-                            # Apply transformation (simplified - could use LangGraph transform service)
-                            if transform_type == "merge":
-                                merge_data = transform_config.get("data", {})
-                                if isinstance(result, dict) and isinstance(merge_data, dict):
-                                    result.update(merge_data)
-                    return result
-                except Exception as e:
-                    logger.error(f"Transform execution failed in chain: {str(e)}")
-                    raise TransformExecutionError(
-                        f"Transform execution failed: {str(e)}",
-                        transform_type=transform.get("type", "unknown") if isinstance(transform, dict) else "unknown",
-                        context={"node_id": node_id, "original_error": str(e)}
+                    steps.append((node_id, transform_type or "callable", get_transform(transform)))
+                except ValueError as e:
+                    raise WorkflowExecutionError(
+                        f"Node {node_id} has an invalid transform: {str(e)}",
+                        error_code="CHAIN_CREATION_ERROR",
+                        context={"chain_type": "transform", "node_id": node_id, "original_error": str(e)}
                     )
             
+            def transform_func(inputs: Dict[str, Any]) -> Dict[str, Any]:
+                result = inputs.get("input")
+                for node_id, transform_type, transform in steps:
+                    try:
+                        result = transform(result)
+                    except Exception as e:
+                        logger.error(f"Transform execution failed in chain: {str(e)}")
+                        raise TransformExecutionError(
+                            f"Transform execution failed: {str(e)}",
+                            transform_type=transform_type,
+                            context={"node_id": node_id, "original_error": str(e)}
+                        )
+                return {"output": result}
+            
             return TransformChain(
                 input_variables=["input"],
                 output_variables=["output"],
                 transform=transform_func
             )
-        except TransformExecutionError:
+        except WorkflowExecutionError:
             raise
         except Exception as e:
             logger.error(f"Failed to create transform chain: {str(e)}")
@@ -120,6 +135,12 @@ class ChainService:
                 context={"chain_type": "transform", "original_error": str(e)}
             )
     
+    def _transform_order(self, config: ChainConfig) -> List[str]:
+        """Get the ids of the nodes with transforms, in node order then config order."""
+        transforms = config.transforms or {}
+        ordered = [node_id for node_id in config.nodes if node_id in transforms]
+        return ordered + [node_id for node_id in transforms if node_id not in ordered]
+    
     def _create_llm(self, config: Dict[str, Any]):
         """Create LLM from configuration."""
         try:
@@ -154,7 +175,9 @@ class ChainService:
         """Execute a chain with input."""
         try:
             if hasattr(chain, "ainvoke"):
-                result = await chain.ainvoke(input_data)
+                result = await run_with_timeout(
+                    chain.ainvoke(input_data, config={"callbacks": usage_callbacks()})
+                )
             else:
                 result = chain.invoke(input_data)
             
@@ -162,9 +185,7 @@ class ChainService:
                 "output": result,
                 "success": True
             }
-        except TransformExecutionError:
-            raise
-        except LLMExecutionError:
+        except (TransformExecutionError, LLMExecutionError, ExecutionTimeoutError, BudgetExceededError):
             raise
         except Exception as e:
             logger.error(f"Chain execution failed: {str(e)}")
@@ -0,0 +1,559 @@
+"""Checkpoint stores for Langgraph executions.
+
+Checkpoints are written per node as compact deltas: each checkpoint only holds
+the state keys its node changed. The full state at any checkpoint is rebuilt
+by folding the deltas in order (see ``materialize_state``). Stores enforce
+retention limits on the number of executions, the number of checkpoints per
+execution (older checkpoints are folded into a snapshot) and checkpoint age.
+The SQLite and file stores write on a background thread, so recording a
+checkpoint never waits on disk.
+"""
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.config import settings
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT = "snapshot"
+
+
+def compute_delta(state: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the keys of an update whose values differ from the current state."""
+    return {
+        key: value for key, value in update.items()
+        if key not in state or state[key] != value
+    }
+
+
+def materialize_state(checkpoints: List[Dict[str, Any]], upto: Optional[int] = None) -> Dict[str, Any]:
+    """Rebuild the state by applying checkpoint deltas in order.
+
+    If ``upto`` is given, only checkpoints with a sequence number up to and
+    including it are applied.
+    """
+    state: Dict[str, Any] = {}
+    for checkpoint in checkpoints:
+        if upto is not None and checkpoint["sequence"] > upto:
+            break
+        state.update(checkpoint.get("delta") or {})
+    return state
+
+
+def compact_checkpoints(checkpoints: List[Dict[str, Any]], max_checkpoints: int) -> List[Dict[str, Any]]:
+    """Fold the oldest checkpoints into a single snapshot to respect a size limit."""
+    if max_checkpoints <= 0 or len(checkpoints) <= max_checkpoints:
+        return checkpoints
+
+    fold_count = len(checkpoints) - max_checkpoints + 1
+    folded = checkpoints[:fold_count]
+    snapshot = {
+        "sequence": folded[-1]["sequence"],
+        "type": SNAPSHOT,
+        "node_id": None,
+        "delta": materialize_state(folded),
+        "timestamp": folded[-1]["timestamp"]
+    }
+    return [snapshot] + checkpoints[fold_count:]
+
+
+class CheckpointStore:
+    """Base class for checkpoint stores.
+
+    Retention limits are enforced whenever a new execution starts writing.
+    """
+
+    def __init__(
+        self,
+        max_executions: int = 1000,
+        max_checkpoints_per_execution: int = 100,
+        ttl_seconds: int = 0
+    ):
+        self.max_executions = max_executions
+        self.max_checkpoints_per_execution = max_checkpoints_per_execution
+        self.ttl_seconds = ttl_seconds
+
+    def save(self, execution_id: str, checkpoint: Dict[str, Any]):
+        """Append a checkpoint to an execution."""
+        raise NotImplementedError
+
+    def list(self, execution_id: str) -> List[Dict[str, Any]]:
+        """Get the checkpoints of an execution in order."""
+        raise NotImplementedError
+
+    def delete(self, execution_id: str):
+        """Delete all checkpoints of an execution."""
+        raise NotImplementedError
+
+    def execution_ids(self) -> List[str]:
+        """Get ids of executions that have checkpoints, oldest first."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Write pending checkpoints (for stores that write in the background)."""
+
+    def close(self):
+        """Flush and release resources."""
+
+    def _expired_before(self) -> Optional[str]:
+        if self.ttl_seconds <= 0:
+            return None
+        return (datetime.now() - timedelta(seconds=self.ttl_seconds)).isoformat()
+
+
+class InMemoryCheckpointStore(CheckpointStore):
+    """Process-local checkpoint store bounded by the retention limits."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._checkpoints: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+    def save(self, execution_id: str, checkpoint: Dict[str, Any]):
+        checkpoints = self._checkpoints.setdefault(execution_id, [])
+        checkpoints.append(checkpoint)
+        self._checkpoints.move_to_end(execution_id)
+        if len(checkpoints) > self.max_checkpoints_per_execution > 0:
+            self._checkpoints[execution_id] = compact_checkpoints(
+                checkpoints, self.max_checkpoints_per_execution
+            )
+        if len(checkpoints) == 1:
+            self._enforce_retention()
+
+    def list(self, execution_id: str) -> List[Dict[str, Any]]:
+        return list(self._checkpoints.get(execution_id, []))
+
+    def delete(self, execution_id: str):
+        self._checkpoints.pop(execution_id, None)
+
+    def execution_ids(self) -> List[str]:
+        return list(self._checkpoints)
+
+    def _enforce_retention(self):
+        while self.max_executions > 0 and len(self._checkpoints) > self.max_executions:
+            self._checkpoints.popitem(last=False)
+
+        cutoff = self._expired_before()
+        if cutoff:
+            expired = [
+                execution_id for execution_id, checkpoints in self._checkpoints.items()
+                if checkpoints and checkpoints[-1]["timestamp"] < cutoff
+            ]
+            for execution_id in expired:
+                del self._checkpoints[execution_id]
+
+
+class _BackgroundCheckpointStore(CheckpointStore):
+    """Base class for stores that write checkpoints on a background thread.
+
+    ``save`` queues the checkpoint and returns; a writer thread appends the
+    queued checkpoints every ``flush_interval_ms``, compacts executions over
+    the per-execution limit (their checkpoints are counted in memory) and
+    enforces the other retention limits every ``retention_interval_s``.
+    ``list`` includes checkpoints still waiting to be written.
+    """
+
+    def __init__(self, flush_interval_ms: int = 200, retention_interval_s: float = 60, **kwargs):
+        super().__init__(**kwargs)
+        self.flush_interval_ms = flush_interval_ms
+        self.retention_interval_s = retention_interval_s
+        self._lock = threading.Lock()  # Guards the storage
+        self._wakeup = threading.Condition()  # Guards _pending and _closed
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._counts: Dict[str, int] = {}  # Stored checkpoints per execution, as far as known
+        self._closed = False
+        self._retention_checked = 0.0  # The first write enforces retention
+        self._writer: Optional[threading.Thread] = None
+
+    def save(self, execution_id: str, checkpoint: Dict[str, Any]):
+        with self._wakeup:
+            self._pending.setdefault(execution_id, []).append(checkpoint)
+
+    def list(self, execution_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            checkpoints = self._load(execution_id)
+            with self._wakeup:
+                return checkpoints + list(self._pending.get(execution_id, ()))
+
+    def delete(self, execution_id: str):
+        with self._lock:
+            with self._wakeup:
+                self._pending.pop(execution_id, None)
+            self._counts.pop(execution_id, None)
+            self._remove(execution_id)
+
+    def execution_ids(self) -> List[str]:
+        self.flush()
+        with self._lock:
+            return self._stored_ids()
+
+    def flush(self):
+        with self._lock:
+            with self._wakeup:
+                pending, self._pending = self._pending, {}
+            if pending:
+                counts = {
+                    execution_id: self._counts[execution_id]
+                    if execution_id in self._counts else self._count(execution_id)
+                    for execution_id in pending
+                }
+                self._append(pending)
+                for execution_id, checkpoints in pending.items():
+                    count = counts[execution_id] + len(checkpoints)
+                    if count > self.max_checkpoints_per_execution > 0:
+                        count = self._compact(execution_id)
+                    self._counts[execution_id] = count
+            if time.monotonic() - self._retention_checked >= self.retention_interval_s:
+                self._retention_checked = time.monotonic()
+                self._enforce_retention()
+                self._counts.clear()  # Executions may have been dropped; recount on their next write
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.flush()
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-store-writer", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                if not self._closed:
+                    self._wakeup.wait(self.flush_interval_ms / 1000)
+                closed = self._closed
+            if closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Failed to write checkpoints: {str(e)}")
+
+    # Storage operations, called with the lock held (and from the writer thread when writing)
+
+    def _load(self, execution_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _count(self, execution_id: str) -> int:
+        raise NotImplementedError
+
+    def _append(self, checkpoints: Dict[str, List[Dict[str, Any]]]):
+        raise NotImplementedError
+
+    def _compact(self, execution_id: str) -> int:
+        """Fold the oldest checkpoints of an execution into a snapshot; returns how many remain."""
+        raise NotImplementedError
+
+    def _remove(self, execution_id: str):
+        raise NotImplementedError
+
+    def _stored_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def _enforce_retention(self):
+        raise NotImplementedError
+
+
+class SQLiteCheckpointStore(_BackgroundCheckpointStore):
+    """Checkpoint store persisted in a SQLite database (WAL mode)."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                execution_id TEXT NOT NULL,
+                sequence INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                node_id TEXT,
+                delta TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                error TEXT,
+                PRIMARY KEY (execution_id, sequence)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_checkpoints_timestamp ON checkpoints (timestamp)"
+        )
+        self._start_writer()
+
+    def close(self):
+        """Write pending checkpoints and close the database connection."""
+        super().close()
+        self._conn.close()
+
+    def _load(self, execution_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT sequence, type, node_id, delta, timestamp, error FROM checkpoints "
+            "WHERE execution_id = ? ORDER BY sequence",
+            (execution_id,)
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def _count(self, execution_id: str) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE execution_id = ?", (execution_id,)
+        ).fetchone()[0]
+
+    def _append(self, checkpoints: Dict[str, List[Dict[str, Any]]]):
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                self._to_row(execution_id, checkpoint)
+                for execution_id, execution_checkpoints in checkpoints.items()
+                for checkpoint in execution_checkpoints
+            ]
+        )
+        self._conn.execute("COMMIT")
+
+    def _remove(self, execution_id: str):
+        self._conn.execute("DELETE FROM checkpoints WHERE execution_id = ?", (execution_id,))
+
+    def _stored_ids(self) -> List[str]:
+        rows = self._conn.execute(
+            "SELECT execution_id FROM checkpoints GROUP BY execution_id ORDER BY MAX(timestamp)"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _compact(self, execution_id: str) -> int:
+        compacted = compact_checkpoints(self._load(execution_id), self.max_checkpoints_per_execution)
+        snapshot = compacted[0]
+        self._conn.execute("BEGIN")
+        self._conn.execute(
+            "DELETE FROM checkpoints WHERE execution_id = ? AND sequence <= ?",
+            (execution_id, snapshot["sequence"])
+        )
+        self._conn.execute(
+            "INSERT INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._to_row(execution_id, snapshot)
+        )
+        self._conn.execute("COMMIT")
+        return len(compacted)
+
+    def _enforce_retention(self):
+        if self.max_executions > 0:
+            self._conn.execute(
+                """
+                DELETE FROM checkpoints WHERE execution_id IN (
+                    SELECT execution_id FROM checkpoints GROUP BY execution_id
+                    ORDER BY MAX(timestamp) DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_executions,)
+            )
+        cutoff = self._expired_before()
+        if cutoff:
+            self._conn.execute(
+                """
+                DELETE FROM checkpoints WHERE execution_id IN (
+                    SELECT execution_id FROM checkpoints GROUP BY execution_id
+                    HAVING MAX(timestamp) < ?
+                )
+                """,
+                (cutoff,)
+            )
+
+    @staticmethod
+    def _to_row(execution_id: str, checkpoint: Dict[str, Any]) -> tuple:
+        return (
+            execution_id,
+            checkpoint["sequence"],
+            checkpoint["type"],
+            checkpoint.get("node_id"),
+            json.dumps(checkpoint.get("delta") or {}, default=str),
+            checkpoint["timestamp"],
+            checkpoint.get("error")
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Dict[str, Any]:
+        sequence, checkpoint_type, node_id, delta, timestamp, error = row
+        checkpoint = {
+            "sequence": sequence,
+            "type": checkpoint_type,
+            "node_id": node_id,
+            "delta": json.loads(delta),
+            "timestamp": timestamp
+        }
+        if error is not None:
+            checkpoint["error"] = error
+        return checkpoint
+
+
+class FileCheckpointStore(_BackgroundCheckpointStore):
+    """Checkpoint store writing one JSON Lines file per execution."""
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._start_writer()
+
+    def _load(self, execution_id: str) -> List[Dict[str, Any]]:
+        path = self._path(execution_id)
+        return self._read(path) if path.exists() else []
+
+    def _count(self, execution_id: str) -> int:
+        path = self._path(execution_id)
+        return self._count_lines(path) if path.exists() else 0
+
+    def _append(self, checkpoints: Dict[str, List[Dict[str, Any]]]):
+        for execution_id, execution_checkpoints in checkpoints.items():
+            with open(self._path(execution_id), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(checkpoint, default=str) + "\n" for checkpoint in execution_checkpoints)
+
+    def _compact(self, execution_id: str) -> int:
+        path = self._path(execution_id)
+        compacted = compact_checkpoints(self._read(path), self.max_checkpoints_per_execution)
+        self._write(path, compacted)
+        return len(compacted)
+
+    def _remove(self, execution_id: str):
+        self._path(execution_id).unlink(missing_ok=True)
+
+    def _stored_ids(self) -> List[str]:
+        return [path.stem for path in self._files_by_age()]
+
+    def _path(self, execution_id: str) -> Path:
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in execution_id)
+        return self.directory / f"{safe_id}.jsonl"
+
+    def _files_by_age(self) -> List[Path]:
+        return sorted(self.directory.glob("*.jsonl"), key=lambda path: path.stat().st_mtime)
+
+    def _enforce_retention(self):
+        files = self._files_by_age()
+        stale = files[:-self.max_executions] if 0 < self.max_executions < len(files) else []
+
+        if self.ttl_seconds > 0:
+            cutoff = datetime.now().timestamp() - self.ttl_seconds
+            stale += [path for path in files if path not in stale and path.stat().st_mtime < cutoff]
+
+        for path in stale:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _count_lines(path: Path) -> int:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+
+    @staticmethod
+    def _read(path: Path) -> List[Dict[str, Any]]:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def _write(path: Path, checkpoints: List[Dict[str, Any]]):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for checkpoint in checkpoints:
+                f.write(json.dumps(checkpoint, default=str) + "\n")
+        os.replace(tmp_path, path)
+
+
+class CheckpointRecorder:
+    """Writes the checkpoints of a single execution to a store."""
+
+    def __init__(
+        self,
+        store: CheckpointStore,
+        execution_id: str,
+        replay: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.store = store
+        self.execution_id = execution_id
+        self.replay = dict(replay or {})
+        self.replayed_nodes: List[str] = []
+        existing = store.list(execution_id)
+        self._sequence = existing[-1]["sequence"] if existing else 0
+
+    def record(
+        self,
+        checkpoint_type: str,
+        delta: Dict[str, Any],
+        node_id: Optional[str] = None,
+        error: Optional[str] = None
+    ):
+        """Record a checkpoint holding the given state delta."""
+        self._sequence += 1
+        checkpoint = {
+            "sequence": self._sequence,
+            "type": checkpoint_type,
+            "node_id": node_id,
+            "delta": delta,
+            "timestamp": datetime.now().isoformat()
+        }
+        if error is not None:
+            checkpoint["error"] = error
+        try:
+            self.store.save(self.execution_id, checkpoint)
+        except Exception as e:
+            # Checkpointing must never fail the execution itself
+            logger.warning(f"Failed to save checkpoint for execution {self.execution_id}: {str(e)}")
+
+    def take_replay(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get the checkpointed update of a node completed in an earlier run, once."""
+        update = self.replay.pop(node_id, None)
+        if update is not None:
+            self.replayed_nodes.append(node_id)
+        return update
+
+
+# Recorder for the execution running in the current task, if checkpointing is enabled
+current_recorder: ContextVar[Optional[CheckpointRecorder]] = ContextVar(
+    "checkpoint_recorder", default=None
+)
+
+
+def create_checkpoint_store(backend: Optional[str] = None) -> CheckpointStore:
+    """Create a checkpoint store for the configured backend."""
+    backend = (backend or settings.checkpoint_backend).lower()
+    retention = {
+        "max_executions": settings.checkpoint_max_executions,
+        "max_checkpoints_per_execution": settings.checkpoint_max_per_execution,
+        "ttl_seconds": settings.checkpoint_ttl_seconds
+    }
+
+    if backend == "memory":
+        return InMemoryCheckpointStore(**retention)
+    writer = {
+        "flush_interval_ms": settings.checkpoint_flush_ms,
+        "retention_interval_s": settings.checkpoint_retention_interval_seconds
+    }
+    if backend == "sqlite":
+        return SQLiteCheckpointStore(
+            str(Path(settings.checkpoint_path) / "checkpoints.db"), **writer, **retention
+        )
+    if backend == "file":
+        return FileCheckpointStore(settings.checkpoint_path, **writer, **retention)
+    raise ValueError(f"Unsupported checkpoint backend: {backend}")
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the shared checkpoint store instance."""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = create_checkpoint_store()
+    return _checkpoint_store
@@ -0,0 +1,141 @@
+"""Idempotency keys and single-flight coalescing of identical executions.
+
+A request with an ``Idempotency-Key`` that was already used for the workflow
+gets the execution the key started instead of a new run. With coalescing
+enabled, a request whose workflow, definition and input match an execution
+still in flight attaches to it and shares its result. Both are matched on
+the execution fingerprint, a hash of the workflow's engine configuration, the
+definition hash and the input.
+"""
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from app.models.workflow import Workflow, WorkflowDefinition
+from app.models.execution import WorkflowExecution
+from app.exceptions import IdempotencyKeyConflictError
+from app.utils.graph_cache import compute_definition_hash
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def compute_input_hash(input_data: Any) -> str:
+    """Compute a canonical hash of execution input."""
+    canonical = json.dumps(input_data or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def compute_execution_fingerprint(workflow: Workflow, definition: WorkflowDefinition, input_data: Any) -> str:
+    """Hash identifying executions that must produce the same result.
+
+    Covers the workflow's engine settings (engine, type and Langchain, chain
+    and agent configuration), the definition hash and the input hash.
+    """
+    engine_config = workflow.model_dump(
+        mode="json",
+        include={"id", "engine", "workflowType", "langchainConfig", "chainConfig", "agentConfig"}
+    )
+    canonical = json.dumps(
+        [engine_config, compute_definition_hash(definition), compute_input_hash(input_data)],
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExecutionCoalescer:
+    """Tracks idempotency keys and in-flight executions by fingerprint."""
+
+    def __init__(self, idempotency_ttl_seconds: int = 24 * 3600, max_idempotency_keys: int = 10000):
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds
+        self.max_idempotency_keys = max_idempotency_keys
+        # (workflow id, key) -> (fingerprint, execution id, expires at), oldest first
+        self._keys: "OrderedDict[Tuple[str, str], Tuple[str, str, float]]" = OrderedDict()
+        self._in_flight: Dict[str, str] = {}  # Fingerprint -> id of the leading execution
+        self._completions: Dict[str, asyncio.Future] = {}  # Execution id -> resolved when it finishes
+        self.replayed = 0
+        self.coalesced = 0
+
+    def find(
+        self,
+        workflow_id: str,
+        fingerprint: str,
+        idempotency_key: Optional[str] = None,
+        coalesce: bool = False
+    ) -> Optional[str]:
+        """Get the id of an execution that answers this request, if there is one.
+
+        Raises IdempotencyKeyConflictError when the key was used with a
+        different definition or input.
+        """
+        if idempotency_key:
+            self._expire()
+            entry = self._keys.get((workflow_id, idempotency_key))
+            if entry is not None:
+                if entry[0] != fingerprint:
+                    raise IdempotencyKeyConflictError(
+                        "Idempotency key was already used with a different definition or input",
+                        idempotency_key=idempotency_key
+                    )
+                self.replayed += 1
+                return entry[1]
+        if coalesce and fingerprint in self._in_flight:
+            self.coalesced += 1
+            return self._in_flight[fingerprint]
+        return None
+
+    def register(
+        self,
+        execution_id: str,
+        workflow_id: str,
+        fingerprint: str,
+        idempotency_key: Optional[str] = None,
+        coalesce: bool = False
+    ):
+        """Record a new execution under its idempotency key and, when coalescing, as in flight."""
+        if idempotency_key:
+            self._keys[(workflow_id, idempotency_key)] = (
+                fingerprint, execution_id, time.time() + self.idempotency_ttl_seconds
+            )
+            self._keys.move_to_end((workflow_id, idempotency_key))
+            while self.max_idempotency_keys > 0 and len(self._keys) > self.max_idempotency_keys:
+                self._keys.popitem(last=False)
+        if coalesce:
+            self._in_flight.setdefault(fingerprint, execution_id)
+        self._completions[execution_id] = asyncio.get_running_loop().create_future()
+
+    def finish(self, execution: WorkflowExecution, fingerprint: Optional[str] = None):
+        """Resolve waiters of a finished execution and stop coalescing onto it."""
+        if fingerprint is not None and self._in_flight.get(fingerprint) == execution.id:
+            del self._in_flight[fingerprint]
+        completion = self._completions.pop(execution.id, None)
+        if completion is not None and not completion.done():
+            completion.set_result(execution)
+
+    async def wait(self, execution: WorkflowExecution) -> WorkflowExecution:
+        """Wait for an execution to finish; returns at once if it is not tracked as running."""
+        completion = self._completions.get(execution.id)
+        if completion is None or completion.get_loop() is not asyncio.get_running_loop():
+            return execution
+        # Shielded: a follower that goes away must not cancel the leader's completion
+        return await asyncio.shield(completion)
+
+    def _expire(self):
+        now = time.time()
+        while self._keys:
+            key, (_, _, expires_at) = next(iter(self._keys.items()))
+            if expires_at > now:
+                break
+            del self._keys[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "idempotencyKeys": len(self._keys),
+            "inFlight": len(self._in_flight),
+            "replayed": self.replayed,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,323 @@
+"""In-process queue of submitted executions drained by a pool of workers.
+
+Executions wait in named priority lanes (for example ``interactive`` and
+``batch``). Each lane has a weight, a quota of executions running at once and
+a queue depth limit. Workers pick lanes by weighted fair scheduling (stride
+scheduling): a lane with weight 8 is served eight times as often as a lane
+with weight 1 while both have work, and an idle lane gets no credit for the
+time it was idle. Quotas below the worker count keep workers free for the
+other lanes, so a large batch can't make interactive runs wait for a worker.
+"""
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from collections import deque
+from app.exceptions import ExecutionCancelledError, ExecutionQueueFullError
+import asyncio
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANE = "interactive"
+
+
+class QueuedExecution:
+    """A submitted execution waiting for a worker."""
+
+    def __init__(
+        self,
+        execution_id: str,
+        engine: str,
+        run: Callable[[], Awaitable[Any]],
+        sequence: int,
+        on_drop: Optional[Callable[[], None]] = None
+    ):
+        self.execution_id = execution_id
+        self.engine = engine
+        self.run = run
+        self.sequence = sequence  # Submission order across engines
+        self.on_drop = on_drop  # Called if the queue shuts down before a worker runs it
+        self.submitted_at = time.monotonic()
+
+
+class ExecutionLane:
+    """A priority lane: its scheduling weight, running quota and queue depth limit."""
+
+    def __init__(self, name: str, weight: float = 1, max_running: int = 0, max_queued: int = 0):
+        self.name = name
+        self.weight = max(weight, 0.001)
+        self.max_running = max_running  # 0 allows every worker
+        self.max_queued = max_queued  # 0 only applies the queue's max_size
+        self._reset()
+
+    def _reset(self):
+        self.waiting: Dict[str, Deque[QueuedExecution]] = {}
+        self.queued = 0
+        self.running = 0
+        self.pass_value = 0.0  # Virtual time of the lane's next dispatch
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def has_capacity(self) -> bool:
+        return self.queued > 0 and (self.max_running <= 0 or self.running < self.max_running)
+
+    def take(self, engine_has_capacity: Callable[[str], bool]) -> Optional[QueuedExecution]:
+        """Pop the oldest waiting execution whose engine is below its limit."""
+        oldest: Optional[Deque[QueuedExecution]] = None
+        for engine, jobs in self.waiting.items():
+            if jobs and engine_has_capacity(engine) and (oldest is None or jobs[0].sequence < oldest[0].sequence):
+                oldest = jobs
+        if oldest is None:
+            return None
+        job = oldest.popleft()
+        self.queued -= 1
+        wait = time.monotonic() - job.submitted_at
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "weight": self.weight,
+            "maxRunning": self.max_running,
+            "maxQueued": self.max_queued,
+            "queued": self.queued,
+            "running": self.running,
+            "dispatched": self.dispatched,
+            "avgWaitMs": round(self.total_wait / self.dispatched * 1000, 3) if self.dispatched else 0.0,
+            "maxWaitMs": round(self.max_wait * 1000, 3)
+        }
+
+
+class ExecutionQueue:
+    """Bounded queue of executions run by a fixed pool of worker tasks.
+
+    Workers are started on the first submission, in the running event loop.
+    ``engine_limits`` caps how many executions of an engine run at once across
+    lanes, so one engine can't take every worker; engines without a limit may
+    use them all. Within a lane, workers take the oldest execution whose engine
+    is below its limit, so executions of a saturated engine don't hold up the
+    others. ``lanes`` maps lane names to ``{"weight", "maxRunning",
+    "maxQueued"}``; without it there is a single lane. ``max_size`` caps the
+    executions waiting across all lanes (0 disables it).
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        max_size: int = 1000,
+        engine_limits: Optional[Dict[str, int]] = None,
+        lanes: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.engine_limits = engine_limits or {}
+        self.lanes: Dict[str, ExecutionLane] = {
+            name: ExecutionLane(
+                name,
+                weight=config.get("weight", 1),
+                max_running=config.get("maxRunning", 0),
+                max_queued=config.get("maxQueued", 0)
+            )
+            for name, config in (lanes or {DEFAULT_LANE: {}}).items()
+        }
+        self.default_lane = DEFAULT_LANE if DEFAULT_LANE in self.lanes else next(iter(self.lanes))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._reset()
+
+    def _reset(self):
+        for lane in self.lanes.values():
+            lane._reset()
+        self._running: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._clock = 0.0  # Virtual time of the last dispatch
+        self._unfinished = 0
+        self._work_available: Optional[asyncio.Event] = None
+        self._all_done: Optional[asyncio.Event] = None
+
+    def lane(self, name: Optional[str]) -> ExecutionLane:
+        """Get a lane by name (the default lane for None); raises ValueError for unknown lanes."""
+        if name is None:
+            return self.lanes[self.default_lane]
+        if name not in self.lanes:
+            raise ValueError(f"Unknown execution lane '{name}', expected one of {sorted(self.lanes)}")
+        return self.lanes[name]
+
+    def submit(
+        self,
+        execution_id: str,
+        engine: str,
+        run: Callable[[], Awaitable[Any]],
+        lane: Optional[str] = None,
+        on_drop: Optional[Callable[[], None]] = None
+    ) -> int:
+        """Enqueue an execution and return the number of executions waiting in its lane.
+
+        ``on_drop`` is called if the queue shuts down (or its event loop goes
+        away) while the execution is still waiting. Raises ValueError for
+        unknown lanes and ExecutionQueueFullError when the lane, or the queue
+        across lanes, already holds its maximum of waiting executions.
+        """
+        target = self.lane(lane)
+        self._ensure_started()
+        if target.max_queued > 0 and target.queued >= target.max_queued:
+            raise ExecutionQueueFullError(
+                f"Execution lane '{target.name}' is full ({target.max_queued} waiting)",
+                max_size=target.max_queued,
+                context={"lane": target.name}
+            )
+        if self.max_size > 0 and sum(lane.queued for lane in self.lanes.values()) >= self.max_size:
+            raise ExecutionQueueFullError(
+                f"Execution queue is full ({self.max_size} waiting)",
+                max_size=self.max_size,
+                context={"lane": target.name}
+            )
+        if not target.queued and not target.running:
+            # An idle lane rejoins at the current virtual time instead of cashing in its idle time
+            target.pass_value = max(target.pass_value, self._clock)
+        target.waiting.setdefault(engine, deque()).append(
+            QueuedExecution(execution_id, engine, run, next(self._sequence), on_drop)
+        )
+        target.queued += 1
+        self._unfinished += 1
+        self._all_done.clear()
+        self._work_available.set()
+        return target.queued
+
+    async def run(self, engine: str, func: Callable[[], Awaitable[Any]], lane: Optional[str] = None) -> Any:
+        """Queue a call in a lane and wait for its result.
+
+        Raises ExecutionCancelledError if the call is cancelled, or the queue
+        shuts down, before it finishes. A caller that stops waiting cancels
+        the call, also once it is running.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def cancelled(message: str):
+            if not future.done():
+                future.set_exception(ExecutionCancelledError(message))
+
+        async def job():
+            if future.cancelled():
+                return  # The caller stopped waiting before a worker got to it
+            # Its own task, so the caller can cancel the call without cancelling the worker
+            task = asyncio.ensure_future(func())
+            future.add_done_callback(lambda _: task.cancel() if future.cancelled() else None)
+            try:
+                future.set_result(await task)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            except BaseException:
+                cancelled("Queued call was cancelled before it finished")
+                raise
+
+        self.submit(
+            f"call-{id(future)}", engine, job, lane,
+            on_drop=lambda: cancelled("Execution queue shut down before the call ran")
+        )
+        return await future
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._drop_waiting("on a closed event loop")
+        self._loop = loop
+        self._reset()
+        self._work_available = asyncio.Event()
+        self._all_done = asyncio.Event()
+        self._all_done.set()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _engine_has_capacity(self, engine: str) -> bool:
+        limit = self.engine_limits.get(engine)
+        return not limit or limit <= 0 or self._running.get(engine, 0) < limit
+
+    def _take(self) -> Optional[tuple]:
+        """Pick the next execution: the lane furthest behind its fair share goes first."""
+        lanes = sorted(
+            (lane for lane in self.lanes.values() if lane.has_capacity()),
+            key=lambda lane: lane.pass_value
+        )
+        for lane in lanes:
+            job = lane.take(self._engine_has_capacity)
+            if job is not None:
+                self._clock = lane.pass_value
+                lane.pass_value += 1 / lane.weight
+                return lane, job
+        return None
+
+    async def _worker(self):
+        while True:
+            taken = self._take()
+            if taken is None:
+                self._work_available.clear()
+                await self._work_available.wait()
+                continue
+
+            lane, job = taken
+            lane.running += 1
+            self._running[job.engine] = self._running.get(job.engine, 0) + 1
+            try:
+                await job.run()
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise  # The worker itself is shutting down
+                logger.warning(f"Queued execution {job.execution_id} was cancelled")
+            except Exception:
+                logger.exception(f"Queued execution {job.execution_id} failed outside the executor")
+            finally:
+                lane.running -= 1
+                self._running[job.engine] -= 1
+                self._unfinished -= 1
+                if not self._unfinished:
+                    self._all_done.set()
+                # Waiting executions of this lane and engine may run now
+                self._work_available.set()
+
+    async def join(self):
+        """Wait until every submitted execution has finished."""
+        if self._all_done is not None:
+            await self._all_done.wait()
+
+    async def shutdown(self):
+        """Stop the workers; executions still waiting are dropped through their ``on_drop``."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._drop_waiting("at shutdown")
+        self._loop = None
+        self._reset()
+
+    def _drop_waiting(self, when: str):
+        """Drop every waiting execution, telling its submitter through ``on_drop``."""
+        dropped = [job for lane in self.lanes.values() for jobs in lane.waiting.values() for job in jobs]
+        if not dropped:
+            return
+        logger.warning(f"Dropping {len(dropped)} queued executions {when}")
+        for job in dropped:
+            if job.on_drop is None:
+                continue
+            try:
+                job.on_drop()
+            except Exception as e:
+                logger.warning(f"Failed to drop queued execution {job.execution_id}: {str(e)}")
+        for lane in self.lanes.values():
+            lane.waiting.clear()
+            lane.queued = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue statistics, overall and per lane."""
+        return {
+            "queued": sum(lane.queued for lane in self.lanes.values()),
+            "running": sum(self._running.values()),
+            "workers": self.workers,
+            "maxSize": self.max_size,
+            "engineLimits": dict(self.engine_limits),
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
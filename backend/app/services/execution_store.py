@@ -0,0 +1,639 @@
+"""Execution history stores.
+
+Stores keep workflow executions with a per-workflow index ordered by creation
+time, so a page of a workflow's history is an index range instead of a scan
+over every execution. History pages are addressed by opaque cursors (see
+``encode_cursor``). Retention limits on the number of executions, their age
+and (in memory) their approximate serialized size keep the history bounded;
+the oldest finished executions are dropped first, and queued or running
+executions are never dropped.
+
+The in-memory store is the default. The SQLite store persists executions
+across restarts: writes are batched by a background thread, and the large
+``input``, ``output`` and ``state`` payloads are stored compressed in their
+own columns, so history pages without payloads never read them.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.config import settings
+from app.models.execution import WorkflowExecution, ExecutionStatus
+import base64
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (ExecutionStatus.QUEUED, ExecutionStatus.RUNNING)
+PAYLOAD_FIELDS = ("input", "output", "state")
+
+
+def execution_size(execution: WorkflowExecution) -> int:
+    """Approximate memory held by an execution: the length of its JSON form."""
+    return len(execution.model_dump_json())
+
+
+def history_key(execution: WorkflowExecution) -> Tuple[str, str]:
+    """Position of an execution in its workflow's history: (created at, id)."""
+    return (execution.queuedAt or execution.startedAt, execution.id)
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Encode a history position as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor from ``encode_cursor``; raises ValueError if it is malformed."""
+    try:
+        created_at, execution_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (str(created_at), str(execution_id))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _without_payload(execution: WorkflowExecution) -> WorkflowExecution:
+    return execution.model_copy(update={field: None for field in PAYLOAD_FIELDS})
+
+
+class ExecutionStore:
+    """Base class for execution history stores.
+
+    ``save`` inserts an execution or refreshes a stored one after it changed;
+    retention limits are enforced as executions are inserted (and in memory,
+    expired executions are also dropped when they are read).
+    """
+
+    def __init__(self, max_executions: int = 10000, max_bytes: int = 0, ttl_seconds: int = 0):
+        self.max_executions = max_executions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    def save(self, execution: WorkflowExecution):
+        """Insert or update an execution."""
+        raise NotImplementedError
+
+    def get(self, execution_id: str) -> Optional[WorkflowExecution]:
+        """Get an execution by id."""
+        raise NotImplementedError
+
+    def page(
+        self,
+        workflow_id: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        status: Optional[ExecutionStatus] = None,
+        payload: bool = True
+    ) -> Tuple[List[WorkflowExecution], Optional[str]]:
+        """Get a page of a workflow's executions, newest first, and the cursor of the next page.
+
+        ``cursor`` continues after a previous page; the next cursor is None on
+        the last page. Without ``payload`` the input, output and state are left
+        out (and persistent stores don't load them).
+        """
+        raise NotImplementedError
+
+    def latest(self, workflow_id: str, limit: int = 10) -> List[WorkflowExecution]:
+        """Get the most recently created executions of a workflow, newest first."""
+        return self.page(workflow_id, limit)[0]
+
+    def delete(self, execution_id: str):
+        """Delete an execution."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Write pending changes (for stores that batch writes)."""
+
+    def close(self):
+        """Flush and release resources."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        raise NotImplementedError
+
+
+class _Entry:
+    __slots__ = ("execution", "key", "size", "created")
+
+    def __init__(self, execution: WorkflowExecution, key: Tuple[str, str], size: int):
+        self.execution = execution
+        self.key = key  # Position in the workflow index
+        self.size = size
+        self.created = time.time()
+
+
+class InMemoryExecutionStore(ExecutionStore):
+    """Process-local execution store bounded by the retention limits."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()  # Oldest first
+        self._by_workflow: Dict[str, List[Tuple[str, str]]] = {}
+        self._bytes = 0
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self, execution: WorkflowExecution):
+        size = execution_size(execution)
+        entry = self._entries.get(execution.id)
+        if entry is not None:
+            entry.execution = execution
+            self._bytes += size - entry.size
+            entry.size = size
+            if self.max_bytes > 0 and self._bytes > self.max_bytes:
+                self._enforce_retention()
+            return
+
+        key = history_key(execution)
+        self._entries[execution.id] = _Entry(execution, key, size)
+        index = self._by_workflow.setdefault(execution.workflowId, [])
+        if not index or index[-1] < key:
+            index.append(key)  # The usual case: executions arrive in time order
+        else:
+            insort(index, key)
+        self._bytes += size
+        self._enforce_retention()
+
+    def get(self, execution_id: str) -> Optional[WorkflowExecution]:
+        entry = self._entries.get(execution_id)
+        if entry is not None and self._expired(entry):
+            self.delete(execution_id)
+            self._evicted += 1
+            return None
+        return entry.execution if entry else None
+
+    def page(
+        self,
+        workflow_id: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        status: Optional[ExecutionStatus] = None,
+        payload: bool = True
+    ) -> Tuple[List[WorkflowExecution], Optional[str]]:
+        if self.ttl_seconds > 0:
+            self._enforce_retention()  # Drop expired executions even when nothing was inserted lately
+        index = self._by_workflow.get(workflow_id, [])
+        position = bisect_left(index, decode_cursor(cursor)) if cursor else len(index)
+        executions: List[WorkflowExecution] = []
+        while position > 0 and len(executions) <= limit:
+            position -= 1
+            execution = self._entries[index[position][1]].execution
+            if status is None or execution.status == status:
+                executions.append(execution)
+
+        next_cursor = None
+        if len(executions) > limit:
+            executions = executions[:limit]
+            next_cursor = encode_cursor(history_key(executions[-1])) if executions else None
+        if not payload:
+            executions = [_without_payload(execution) for execution in executions]
+        return executions, next_cursor
+
+    def delete(self, execution_id: str):
+        entry = self._entries.pop(execution_id, None)
+        if entry is None:
+            return
+        index = self._by_workflow[entry.execution.workflowId]
+        del index[bisect_left(index, entry.key)]
+        if not index:
+            del self._by_workflow[entry.execution.workflowId]
+        self._bytes -= entry.size
+
+    def _enforce_retention(self):
+        cutoff = self._ttl_cutoff()
+        count, size = len(self._entries), self._bytes
+        evicted: List[str] = []
+        for execution_id, entry in self._entries.items():  # Oldest first
+            if not (
+                (self.max_executions > 0 and count > self.max_executions)
+                or (self.max_bytes > 0 and size > self.max_bytes)
+                or (cutoff is not None and entry.created < cutoff)
+            ):
+                break
+            if entry.execution.status in ACTIVE_STATUSES:
+                continue  # Still queued or running: keep it in place and look at the next oldest
+            evicted.append(execution_id)
+            count -= 1
+            size -= entry.size
+        for execution_id in evicted:
+            self.delete(execution_id)
+        self._evicted += len(evicted)
+
+    def _ttl_cutoff(self) -> Optional[float]:
+        return time.time() - self.ttl_seconds if self.ttl_seconds > 0 else None
+
+    def _expired(self, entry: _Entry) -> bool:
+        cutoff = self._ttl_cutoff()
+        return cutoff is not None and entry.created < cutoff and entry.execution.status not in ACTIVE_STATUSES
+
+    def stats(self) -> Dict[str, Any]:
+        if self.ttl_seconds > 0:
+            self._enforce_retention()
+        return {
+            "backend": "memory",
+            "executions": len(self._entries),
+            "workflows": len(self._by_workflow),
+            "bytes": self._bytes,
+            "evicted": self._evicted,
+            "maxExecutions": self.max_executions,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds
+        }
+
+
+class SQLiteExecutionStore(ExecutionStore):
+    """Execution store persisted in a SQLite database (WAL mode).
+
+    ``save`` snapshots the execution and returns; a writer thread commits
+    pending snapshots in one transaction every ``flush_interval_ms`` or once
+    ``batch_size`` are waiting, keeping only the latest snapshot of each
+    execution. Reads never flush: ``get`` and ``page`` merge the snapshots
+    still waiting to be written, and query through a second connection so
+    they don't wait behind the writer's commit. Executions that are queued or
+    running in this process are served from memory, since the executor keeps
+    updating them. Every row records the store instance that wrote it
+    (``owner``), so several processes can share the database: on open, only
+    executions left queued or running by an owner that is gone (a process of
+    this host that exited, or a closed store of this process) are marked
+    failed. Payloads of at least ``compress_threshold`` bytes are
+    zlib-compressed. ``max_bytes`` is not enforced: the history lives on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval_ms: int = 200,
+        batch_size: int = 500,
+        compress_threshold: int = 1024,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.flush_interval_ms = flush_interval_ms
+        self.batch_size = max(1, batch_size)
+        self.compress_threshold = compress_threshold
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # Guards the connection
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS executions (
+                id TEXT PRIMARY KEY,
+                workflow_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                record TEXT NOT NULL,
+                input BLOB,
+                output BLOB,
+                state BLOB,
+                owner TEXT
+            )
+            """
+        )
+        if "owner" not in {row[1] for row in self._conn.execute("PRAGMA table_info(executions)")}:
+            self._conn.execute("ALTER TABLE executions ADD COLUMN owner TEXT")  # Written before owners were recorded
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_executions_workflow ON executions (workflow_id, created_at, id)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_executions_status ON executions (status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_executions_created ON executions (created_at)")
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        _open_owners.add(self.owner)
+        self._mark_interrupted()
+        # Rows in the table, kept up to date by the writer so retention doesn't count them every time
+        self._count = self._conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+        # Reads use their own connection, so in WAL mode they never wait behind the writer's commit
+        if path == ":memory:":
+            self._reader, self._read_lock = self._conn, self._lock
+        else:
+            self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._read_lock = threading.Lock()
+
+        self._live: Dict[str, WorkflowExecution] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._writing: Dict[str, Dict[str, Any]] = {}  # Snapshots of the transaction being committed
+        self._wakeup = threading.Condition()  # Guards _pending, _writing and _closed
+        self._closed = False
+        self._written = 0
+        self._evicted = 0
+        self._retention_checked = 0.0
+        self._writer = threading.Thread(target=self._write_loop, name="execution-store-writer", daemon=True)
+        self._writer.start()
+
+    def save(self, execution: WorkflowExecution):
+        if execution.status in ACTIVE_STATUSES:
+            self._live[execution.id] = execution
+        else:
+            self._live.pop(execution.id, None)
+        # Snapshot on the caller's thread; the writer must not read objects still being updated
+        snapshot = execution.model_dump(mode="json")
+        with self._wakeup:
+            self._pending[execution.id] = snapshot
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.notify()
+
+    def get(self, execution_id: str) -> Optional[WorkflowExecution]:
+        if execution_id in self._live:
+            return self._live[execution_id]
+        with self._wakeup:
+            snapshot = self._pending.get(execution_id) or self._writing.get(execution_id)
+        if snapshot is not None:
+            return WorkflowExecution(**snapshot)
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT status, record, input, output, state FROM executions WHERE id = ?",
+                (execution_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def page(
+        self,
+        workflow_id: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        status: Optional[ExecutionStatus] = None,
+        payload: bool = True
+    ) -> Tuple[List[WorkflowExecution], Optional[str]]:
+        # Executions still waiting to be written are merged in rather than flushed first
+        with self._wakeup:
+            unwritten = {**self._writing, **self._pending}
+        unwritten = {
+            execution_id: snapshot for execution_id, snapshot in unwritten.items()
+            if snapshot["workflowId"] == workflow_id
+        }
+        columns = "status, record, input, output, state" if payload else "status, record"
+        query = f"SELECT {columns} FROM executions WHERE workflow_id = ?"
+        params: List[Any] = [workflow_id]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(ExecutionStatus(status).value)
+        if cursor:
+            created_at, execution_id = decode_cursor(cursor)
+            query += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params.extend([created_at, created_at, execution_id])
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        # Rows replaced by unwritten snapshots may drop out, so fetch enough to fill the page anyway
+        params.append(limit + 1 + len(unwritten))
+        with self._read_lock:
+            rows = self._reader.execute(query, params).fetchall()
+
+        candidates = {execution.id: execution for execution in map(self._from_row, rows)}
+        after = decode_cursor(cursor) if cursor else None
+        for execution_id, snapshot in unwritten.items():
+            candidates.pop(execution_id, None)
+            execution = WorkflowExecution(**snapshot)
+            if status is not None and execution.status != ExecutionStatus(status):
+                continue
+            if after is not None and history_key(execution) >= after:
+                continue
+            candidates[execution_id] = execution if payload else _without_payload(execution)
+        ordered = sorted(candidates.values(), key=history_key, reverse=True)
+
+        executions = ordered[:limit]
+        # Queued or running executions have moved on since their last write
+        executions = [
+            (self._live[e.id] if payload else _without_payload(self._live[e.id])) if e.id in self._live else e
+            for e in executions
+        ]
+        next_cursor = encode_cursor(history_key(executions[-1])) if len(ordered) > limit and executions else None
+        return executions, next_cursor
+
+    def delete(self, execution_id: str):
+        self._live.pop(execution_id, None)
+        with self._wakeup:
+            self._pending.pop(execution_id, None)
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM executions WHERE id = ?", (execution_id,))
+            self._count -= cursor.rowcount
+
+    def flush(self):
+        with self._lock:
+            with self._wakeup:
+                pending, self._pending = self._pending, {}
+                self._writing = pending
+            try:
+                rows = [self._to_row(snapshot) for snapshot in pending.values()]
+                if rows:
+                    self._conn.execute("BEGIN")
+                    stored = self._stored_count(list(pending))
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO executions "
+                        "(id, workflow_id, status, created_at, record, input, output, state, owner) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    self._conn.execute("COMMIT")
+                    self._count += len(rows) - stored
+                    self._written += len(rows)
+            finally:
+                with self._wakeup:
+                    self._writing = {}
+            if time.monotonic() - self._retention_checked >= 1:
+                self._enforce_retention()
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join(timeout=5)
+        self.flush()
+        _open_owners.discard(self.owner)
+        if self._reader is not self._conn:
+            self._reader.close()
+        self._conn.close()
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                deadline = time.monotonic() + self.flush_interval_ms / 1000
+                while not self._closed and len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                closed = self._closed
+            if closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Failed to write executions to {self.path}: {str(e)}")
+
+    def _mark_interrupted(self):
+        rows = [
+            (execution_id, record) for execution_id, record, owner in self._conn.execute(
+                "SELECT id, record, owner FROM executions WHERE status IN (?, ?)",
+                tuple(status.value for status in ACTIVE_STATUSES)
+            ).fetchall()
+            if not _owner_alive(owner)
+        ]
+        for execution_id, record in rows:
+            record = json.loads(record)
+            record.update(status=ExecutionStatus.FAILED.value, error="Interrupted by a restart")
+            self._conn.execute(
+                "UPDATE executions SET status = ?, record = ? WHERE id = ?",
+                (ExecutionStatus.FAILED.value, json.dumps(record), execution_id)
+            )
+        if rows:
+            logger.warning(f"Marked {len(rows)} executions interrupted by a restart as failed")
+
+    def _stored_count(self, execution_ids: List[str]) -> int:
+        """How many of the given executions already have a row."""
+        stored = 0
+        for start in range(0, len(execution_ids), 500):  # Stay below SQLite's limit on query parameters
+            chunk = execution_ids[start:start + 500]
+            stored += self._conn.execute(
+                f"SELECT COUNT(*) FROM executions WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchone()[0]
+        return stored
+
+    def _enforce_retention(self):
+        self._retention_checked = time.monotonic()
+        active = tuple(status.value for status in ACTIVE_STATUSES)
+        if self.max_executions > 0 and self._count > self.max_executions:
+            # Other processes sharing the database change it too, so recount before evicting
+            self._count = self._conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+            if self._count > self.max_executions:
+                cursor = self._conn.execute(
+                    """
+                    DELETE FROM executions WHERE id IN (
+                        SELECT id FROM executions WHERE status NOT IN (?, ?)
+                        ORDER BY created_at LIMIT ?
+                    )
+                    """,
+                    (*active, self._count - self.max_executions)
+                )
+                self._count -= cursor.rowcount
+                self._evicted += cursor.rowcount
+        if self.ttl_seconds > 0:
+            cutoff = (datetime.now() - timedelta(seconds=self.ttl_seconds)).isoformat()
+            cursor = self._conn.execute(
+                "DELETE FROM executions WHERE created_at < ? AND status NOT IN (?, ?)",
+                (cutoff, *active)
+            )
+            self._count -= cursor.rowcount
+            self._evicted += cursor.rowcount
+
+    def _to_row(self, snapshot: Dict[str, Any]) -> tuple:
+        record = {key: value for key, value in snapshot.items() if key not in PAYLOAD_FIELDS}
+        return (
+            snapshot["id"],
+            snapshot["workflowId"],
+            snapshot["status"],
+            snapshot.get("queuedAt") or snapshot["startedAt"],
+            json.dumps(record, default=str),
+            *(self._encode_payload(snapshot.get(field)) for field in PAYLOAD_FIELDS),
+            self.owner
+        )
+
+    def _encode_payload(self, value: Any) -> Optional[bytes]:
+        if value is None:
+            return None
+        data = json.dumps(value, default=str).encode("utf-8")
+        if self.compress_threshold > 0 and len(data) >= self.compress_threshold:
+            return b"z" + zlib.compress(data)
+        return b"j" + data
+
+    @staticmethod
+    def _decode_payload(data: Optional[bytes]) -> Any:
+        if data is None:
+            return None
+        body = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+        return json.loads(body)
+
+    @classmethod
+    def _from_row(cls, row: tuple) -> WorkflowExecution:
+        status, record = row[0], json.loads(row[1])
+        record["status"] = status
+        for field, data in zip(PAYLOAD_FIELDS, row[2:]):
+            record[field] = cls._decode_payload(data)
+        return WorkflowExecution(**record)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._read_lock:
+            count = self._reader.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+        with self._wakeup:
+            pending = len(self._pending)
+        return {
+            "backend": "sqlite",
+            "executions": count,
+            "pending": pending,
+            "live": len(self._live),
+            "written": self._written,
+            "evicted": self._evicted,
+            "maxExecutions": self.max_executions,
+            "ttlSeconds": self.ttl_seconds
+        }
+
+
+# Owners of the SQLite stores open in this process
+_open_owners: Set[str] = set()
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the store instance that wrote a row may still be running its execution."""
+    if not owner:
+        return False  # Written before owners were recorded
+    try:
+        host, pid, _ = owner.rsplit(":", 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    if host != socket.gethostname():
+        return True  # Can't tell for another host, so leave its executions alone
+    if pid == os.getpid():
+        return owner in _open_owners
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Running as another user
+    return True
+
+
+def create_execution_store(backend: Optional[str] = None) -> ExecutionStore:
+    """Create an execution store for the configured backend."""
+    backend = (backend or settings.execution_store_backend).lower()
+    retention = {
+        "max_executions": settings.execution_history_max_executions,
+        "max_bytes": settings.execution_history_max_bytes,
+        "ttl_seconds": settings.execution_history_ttl_seconds
+    }
+
+    if backend == "memory":
+        return InMemoryExecutionStore(**retention)
+    if backend == "sqlite":
+        return SQLiteExecutionStore(
+            str(Path(settings.execution_store_path) / "executions.db"),
+            flush_interval_ms=settings.execution_store_flush_ms,
+            batch_size=settings.execution_store_batch_size,
+            compress_threshold=settings.execution_store_compress_bytes,
+            **retention
+        )
+    raise ValueError(f"Unsupported execution store backend: {backend}")
+
+
+_execution_store: Optional[ExecutionStore] = None
+
+
+def get_execution_store() -> ExecutionStore:
+    """Get the shared execution store instance."""
+    global _execution_store
+    if _execution_store is None:
+        _execution_store = create_execution_store()
+    return _execution_store
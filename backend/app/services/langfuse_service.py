@@ -2,6 +2,7 @@
 import httpx
 from typing import Optional, Dict, Any, List
 from app.config import settings
+from app.services.usage_tracker import get_model_pricing, estimate_cost, estimate_tokens
 import os
 
 
@@ -450,16 +451,8 @@ class LangFuseService:
         model: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """Estimate token cost for a prompt."""
-        # Model pricing (per 1K tokens) - approximate values
-        model_pricing = {
-            "gpt-4": {"prompt": 0.03, "completion": 0.06},
-            "gpt-4-turbo": {"prompt": 0.01, "completion": 0.03},
-            "gpt-3.5-turbo": {"prompt": 0.0015, "completion": 0.002},
-            "default": {"prompt": 0.002, "completion": 0.002}
-        }
-        
         model_key = model or "default"
-        pricing = model_pricing.get(model_key, model_pricing["default"])
+        pricing = get_model_pricing(model)
         
         # Get prompt to estimate tokens
         prompt = await self.get_prompt(prompt_id)
@@ -468,14 +461,10 @@ class LangFuseService:
         
         prompt_text = prompt.get("prompt", "")
         
-        # Simple token estimation (4 chars per token approximation)
-        estimated_prompt_tokens = len(prompt_text) // 4
+        estimated_prompt_tokens = estimate_tokens(prompt_text)
         estimated_completion_tokens = estimated_prompt_tokens // 2  # Rough estimate
         
-        estimated_cost = (
-            (estimated_prompt_tokens / 1000) * pricing["prompt"] +
-            (estimated_completion_tokens / 1000) * pricing["completion"]
-        )
+        estimated_cost = estimate_cost(model, estimated_prompt_tokens, estimated_completion_tokens)
         
         return {
             "estimatedTokens": estimated_prompt_tokens + estimated_completion_tokens,
@@ -1,42 +1,110 @@
 """Langgraph workflow execution service."""
-from typing import Dict, Any, List, Optional, AsyncIterator
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage
 from app.models.workflow import WorkflowDefinition
 from app.services.mcp_adapter import MCPAdapter
 from app.services.llm_service import LLMService
+from app.services.node_handlers import node_handlers, is_passthrough_node
+from app.services.checkpoint_store import (
+    CheckpointStore,
+    CheckpointRecorder,
+    compute_delta,
+    current_recorder,
+    get_checkpoint_store,
+    materialize_state
+)
 from app.utils.workflow_converter import WorkflowConverter
 from app.utils.state_validator import StateValidator
+from app.utils.graph_cache import GraphCache, compute_definition_hash
+from app.utils.graph_planner import (
+    ParallelRegion,
+    find_parallel_regions,
+    find_entry_node,
+    compile_condition_routes
+)
+from app.utils.graph_optimizer import optimize_graph
+from app.utils.state_reducers import resolve_reducers, merge_branch_updates
+from app.utils.deadline import deadline_scope, run_with_timeout
+from app.utils.transforms import apply_transform
+from app.utils.streaming import has_lazy_values, materialize_values
+from app.config import settings
 from app.exceptions import (
+    WorkflowExecutionError,
     LLMExecutionError,
     ToolExecutionError,
     StateValidationError,
     GraphCompilationError,
-    TransformExecutionError
+    TransformExecutionError,
+    ExecutionTimeoutError,
+    BudgetExceededError
 )
 from app.utils.retry import retry_on_failure, RetryConfig
+import asyncio
 import logging
 import json
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+CONDITION_TYPES = ("condition",)
+
 
 class LanggraphService:
     """Service for creating and executing Langgraph workflows."""
     
-    def __init__(self):
-        self.mcp_adapter = MCPAdapter()
+    def __init__(
+        self,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        mcp_adapter: Optional[MCPAdapter] = None,
+        llm_service: Optional[LLMService] = None
+    ):
+        self.mcp_adapter = mcp_adapter or MCPAdapter()
         self.converter = WorkflowConverter()
-        self.llm_service = LLMService()
+        self.llm_service = llm_service or LLMService()
         self.state_validator = StateValidator()
-        self._graph_cache: Dict[str, Any] = {}
-        self._state_checkpoints: Dict[str, List[Dict[str, Any]]] = {}
+        self._graph_cache = GraphCache(max_size=settings.graph_cache_max_size)
+        self.checkpoint_store = checkpoint_store or get_checkpoint_store()
+    
+    async def create_graph(self, definition: WorkflowDefinition, use_cache: bool = True) -> Any:
+        """Create a Langgraph StateGraph from workflow definition.
+        
+        Compiled graphs are cached under the canonical hash of the definition.
+        """
+        if not use_cache:
+            return await self._build_graph(definition)
+        
+        cache_key = compute_definition_hash(definition)
+        compiled = self._graph_cache.get(cache_key)
+        if compiled is not None:
+            return compiled
+        
+        compiled = await self._build_graph(definition)
+        self._graph_cache.put(cache_key, compiled)
+        return compiled
+    
+    def invalidate_graph(self, definition: WorkflowDefinition) -> bool:
+        """Drop the compiled graph for a definition from the cache."""
+        return self._graph_cache.invalidate(compute_definition_hash(definition))
+    
+    def get_graph_cache_stats(self) -> Dict[str, Any]:
+        """Get compiled graph cache statistics."""
+        return self._graph_cache.stats()
     
-    async def create_graph(self, definition: WorkflowDefinition) -> Any:
-        """Create a Langgraph StateGraph from workflow definition."""
-        # Convert workflow definition
+    def plan_graph(self, definition: WorkflowDefinition) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Convert a workflow definition and optimize the resulting graph configuration.
+        
+        Returns the graph configuration and the optimization report (None when
+        the definition disables optimization with ``langgraphConfig.optimize``).
+        """
         graph_config = self.converter.convert_to_langgraph(definition)
+        if (definition.langgraphConfig or {}).get("optimize", settings.graph_optimize) is False:
+            return graph_config, None
+        return optimize_graph(graph_config, is_passthrough_node)
+    
+    async def _build_graph(self, definition: WorkflowDefinition) -> Any:
+        """Convert a workflow definition and compile it into a Langgraph graph."""
+        # Convert and optimize workflow definition
+        graph_config, _ = self.plan_graph(definition)
         
         # Get state schema from definition or config
         state_schema = definition.stateSchema or graph_config.get("state_schema", {})
@@ -49,298 +117,228 @@ class LanggraphService:
                 # Use empty schema if invalid
                 state_schema = {}
         
+        # Resolve MCP tools once so nodes don't hit the registry per invocation
+        tools = await self._resolve_mcp_tools(graph_config["nodes"])
+        
+        # Create node functions
+        steps = {}
+        for node_config in graph_config["nodes"]:
+            step = await self._create_node_function(
+                node_config,
+                tool=tools.get(node_config.get("mcp_tool_id"))
+            )
+            step = self._create_timed_step(node_config, step)
+            steps[node_config["id"]] = self._create_checkpointed_step(node_config["id"], step)
+        
+        # Independent successors of a fan-out node run concurrently in one graph step
+        regions = find_parallel_regions(
+            graph_config["nodes"],
+            graph_config["edges"],
+            exclude_types=CONDITION_TYPES
+        )
+        branch_nodes = {node_id for region in regions for node_id in region.members}
+        fan_out_sources = {region.source: region for region in regions}
+        reducers = resolve_reducers(definition) if regions else {}
+        max_concurrency = (definition.langgraphConfig or {}).get(
+            "maxConcurrency", settings.graph_max_concurrency
+        )
+        
         # Create graph
         graph = StateGraph(state_schema)
         
         # Add nodes
         for node_config in graph_config["nodes"]:
-            node_func = await self._create_node_function(node_config)
-            graph.add_node(node_config["id"], node_func)
+            node_id = node_config["id"]
+            if node_id not in branch_nodes:
+                graph.add_node(node_id, self._create_state_node(steps[node_id]))
+        
+        for region in regions:
+            graph.add_node(
+                region.node_id,
+                self._create_parallel_node(region, steps, reducers, max_concurrency)
+            )
+        
+        # Condition nodes route to exactly one successor
+        condition_nodes = {
+            n["id"]: n for n in graph_config["nodes"]
+            if n["type"] in CONDITION_TYPES and n["id"] not in branch_nodes
+        }
+        for node_id, node_config in condition_nodes.items():
+            outgoing = [e for e in graph_config["edges"] if e["source"] == node_id]
+            if outgoing:
+                router, mapping = compile_condition_routes(node_config, outgoing)
+                graph.add_conditional_edges(
+                    node_id, router, {key: END if t == "__end__" else t for key, t in mapping.items()}
+                )
         
         # Add edges
+        sources = {node_id for node_id in condition_nodes if node_id in graph.branches}
         for edge_config in graph_config["edges"]:
             source = edge_config["source"]
             target = edge_config["target"]
+            if source in branch_nodes or source in fan_out_sources or source in condition_nodes:
+                continue
+            sources.add(source)
             
             if target == "END" or target == "__end__":
                 graph.add_edge(source, END)
             else:
                 graph.add_edge(source, target)
         
-        # Set entry point (first input node)
-        input_nodes = [n for n in graph_config["nodes"] if n["type"] == "input"]
-        if input_nodes:
-            graph.set_entry_point(input_nodes[0]["id"])
-        else:
-            # Use first node as entry
-            if graph_config["nodes"]:
-                graph.set_entry_point(graph_config["nodes"][0]["id"])
+        for region in regions:
+            sources.update([region.source, region.node_id])
+            graph.add_edge(region.source, region.node_id)
+            graph.add_edge(region.node_id, region.join or END)
+        
+        # Nodes without outgoing edges finish the graph
+        for node_config in graph_config["nodes"]:
+            node_id = node_config["id"]
+            if node_id not in sources and node_id not in branch_nodes:
+                graph.add_edge(node_id, END)
+        
+        # Set entry point (first input node, else first node)
+        entry_node = find_entry_node(graph_config["nodes"])
+        if entry_node:
+            graph.set_entry_point(entry_node)
         
         # Compile graph
         compiled = graph.compile()
         
         return compiled
     
-    async def _create_node_function(self, node_config: Dict[str, Any]):
-        """Create a node function for Langgraph."""
-        node_type = node_config.get("type")
-        node_id = node_config.get("id")
-        mcp_tool_id = node_config.get("mcp_tool_id")
-        config = node_config.get("config", {})
-        
-        async def node_func(state: Dict[str, Any]) -> Dict[str, Any]:
-            """Node execution function."""
-            if node_type == "input":
-                # Pass through input
-                return {"input": state.get("input", {})}
+    def _create_timed_step(self, node_config: Dict[str, Any], step):
+        """Wrap a node function so it is bounded by its timeoutMs and the execution deadline."""
+        node_id = node_config["id"]
+        timeout_ms = (node_config.get("config") or {}).get("timeoutMs")
+        if timeout_ms is not None and (not isinstance(timeout_ms, (int, float)) or timeout_ms <= 0):
+            raise GraphCompilationError(
+                f"Node {node_id} has an invalid timeoutMs: {timeout_ms}",
+                node_id=node_id
+            )
+        timeout = timeout_ms / 1000 if timeout_ms else None
+        
+        async def timed_step(state: Dict[str, Any]) -> Dict[str, Any]:
+            return await run_with_timeout(step(state), timeout, node_id=node_id)
+        
+        return timed_step
+    
+    def _create_checkpointed_step(self, node_id: str, step):
+        """Wrap a node function so it records a per-node checkpoint when enabled."""
+        async def checkpointed_step(state: Dict[str, Any]) -> Dict[str, Any]:
+            recorder = current_recorder.get()
+            if recorder is None:
+                return await step(state)
             
-            elif node_type == "mcp-tool" and mcp_tool_id:
-                # Execute MCP tool
-                try:
-                    tool = await self.mcp_adapter.get_mcp_tool(mcp_tool_id)
-                    if tool:
-                        langchain_tool = self.mcp_adapter.create_langchain_tool(tool)
-                        # Execute tool with state input
-                        result = await self._execute_tool_with_retry(langchain_tool, state.get("input", {}))
-                        return {"output": result, "node_id": node_id}
-                    else:
-                        raise ToolExecutionError(
-                            f"Tool {mcp_tool_id} not found",
-                            tool_id=mcp_tool_id
-                        )
-                except ToolExecutionError:
-                    raise
-                except Exception as e:
-                    raise ToolExecutionError(
-                        f"Tool execution failed: {str(e)}",
-                        tool_id=mcp_tool_id,
-                        context={"original_error": str(e)}
-                    )
+            replayed = recorder.take_replay(node_id)
+            if replayed is not None:
+                return replayed
             
-            elif node_type == "llm":
-                # LLM node - execute actual LLM call
-                try:
-                    # Get LLM configuration from node config or workflow config
-                    llm_config = config.get("llm", {})
-                    provider = llm_config.get("provider") or config.get("provider") or "openai"
-                    model = llm_config.get("model") or config.get("model") or "gpt-4"
-                    temperature = llm_config.get("temperature") or config.get("temperature")
-                    max_tokens = llm_config.get("max_tokens") or config.get("max_tokens")
-                    system_message = llm_config.get("system_message") or config.get("system_message")
-                    api_key = llm_config.get("api_key") or config.get("api_key")
-                    
-                    # Create LLM instance
-                    llm = self.llm_service.create_llm(
-                        provider=provider,
-                        model=model,
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        api_key=api_key
-                    )
-                    
-                    # Get input from state
-                    input_data = state.get("input", state.get("output", ""))
-                    
-                    # Create messages
-                    messages = self.llm_service.create_messages(
-                        input_data=input_data,
-                        system_message=system_message
-                    )
-                    
-                    # Invoke LLM
-                    response = await self.llm_service.invoke(llm, messages)
-                    
-                    # Extract content from response
-                    if hasattr(response, 'content'):
-                        output = response.content
-                    else:
-                        output = str(response)
-                    
-                    logger.info(f"LLM node {node_id} executed successfully with provider {provider}, model {model}")
-                    
-                    return {
-                        "output": output,
-                        "node_id": node_id,
-                        "llm_response": {
-                            "provider": provider,
-                            "model": model,
-                            "response": output
-                        }
-                    }
-                except Exception as e:
-                    logger.error(f"LLM node {node_id} execution failed: {str(e)}")
-                    raise LLMExecutionError(
-                        f"LLM execution failed: {str(e)}",
-                        provider=provider,
-                        model=model,
-                        context={
-                            "node_id": node_id,
-                            "original_error": str(e)
-                        }
-                    )
+            try:
+                update = await step(state)
+            except Exception as e:
+                recorder.record("error", {}, node_id=node_id, error=str(e))
+                raise
+            if has_lazy_values(update):
+                # Checkpoints hold concrete values; rather than materializing a streaming
+                # output at every node, the node records nothing and reruns on resume
+                return update
+            recorder.record("node", compute_delta(state, update), node_id=node_id)
+            return update
+        
+        return checkpointed_step
+    
+    def _create_state_node(self, step):
+        """Wrap a node function so its update is merged into the graph state."""
+        async def state_node(state: Dict[str, Any]) -> Dict[str, Any]:
+            update = await step(state)
+            return {**state, **update}
+        
+        return state_node
+    
+    def _create_parallel_node(
+        self,
+        region: ParallelRegion,
+        steps: Dict[str, Any],
+        reducers: Dict[str, str],
+        max_concurrency: int
+    ):
+        """Create a node that runs the branches of a fan-out concurrently."""
+        branches = [[steps[node_id] for node_id in branch] for branch in region.branches]
+        
+        async def parallel_node(state: Dict[str, Any]) -> Dict[str, Any]:
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
             
-            elif node_type == "transform":
-                # Transform node
-                try:
-                    transform_func = config.get("transform")
-                    if transform_func:
-                        # Apply transform
-                        input_data = state.get("input", {})
-                        output = self._apply_transform(input_data, transform_func)
-                        return {"output": output, "node_id": node_id}
-                    return {"output": state.get("input", {}), "node_id": node_id}
-                except Exception as e:
-                    transform_type = transform_func if isinstance(transform_func, str) else transform_func.get("type", "unknown") if isinstance(transform_func, dict) else "unknown"
-                    raise TransformExecutionError(
-                        f"Transform execution failed: {str(e)}",
-                        transform_type=transform_type,
-                        context={
-                            "node_id": node_id,
-                            "original_error": str(e)
-                        }
-                    )
+            async def run_branch(branch_steps) -> Dict[str, Any]:
+                async with semaphore:
+                    branch_state = dict(state)
+                    branch_update: Dict[str, Any] = {}
+                    for step in branch_steps:
+                        update = await step(branch_state)
+                        branch_state.update(update)
+                        branch_update.update(update)
+                    return branch_update
             
-            elif node_type == "output":
-                # Output node
-                return {"output": state.get("input", {}), "node_id": node_id}
+            tasks = [asyncio.ensure_future(run_branch(branch)) for branch in branches]
+            try:
+                updates = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
             
-            else:
-                # Default passthrough
-                return {"output": state.get("input", {}), "node_id": node_id}
+            updates = [materialize_values(update) for update in updates]
+            merged = merge_branch_updates([u for u in updates if u], reducers)
+            merged["branch_outputs"] = {
+                branch[-1]: update.get("output")
+                for branch, update in zip(region.branches, updates)
+                if branch
+            }
+            return {**state, **merged}
         
-        return node_func
+        return parallel_node
+    
+    async def _resolve_mcp_tools(self, nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Prefetch MCP tool definitions and build Langchain tools for all tool nodes."""
+        tool_nodes = [
+            n for n in nodes
+            if n.get("type") in ("tool", "mcp-tool") and n.get("mcp_tool_id")
+        ]
+        if not tool_nodes:
+            return {}
+        
+        definitions = await self.mcp_adapter.get_mcp_tools([n["mcp_tool_id"] for n in tool_nodes])
+        
+        tools = {}
+        for node in tool_nodes:
+            tool_id = node["mcp_tool_id"]
+            if tool_id in tools:
+                continue
+            definition = definitions.get(tool_id)
+            if not definition:
+                raise GraphCompilationError(
+                    f"Tool {tool_id} not found",
+                    node_id=node["id"],
+                    context={"tool_id": tool_id}
+                )
+            tools[tool_id] = self.mcp_adapter.create_langchain_tool(definition)
+        return tools
+    
+    async def _create_node_function(self, node_config: Dict[str, Any], tool: Any = None):
+        """Create a node function for Langgraph using the registered node handler."""
+        handler = node_handlers.resolve(node_config.get("type"))
+        return handler(self, node_config, tool)
     
     def _apply_transform(self, input_data: Any, transform_func: Any) -> Any:
-        """Apply a transform function to input data."""
-        if not transform_func:
-            return input_data
-        
-        # If transform_func is a string, try to parse it as a transform type
-        if isinstance(transform_func, str):
-            return self._apply_named_transform(input_data, transform_func)
-        
-        # If transform_func is a dict, it contains transform configuration
-        if isinstance(transform_func, dict):
-            transform_type = transform_func.get("type", "passthrough")
-            transform_config = transform_func.get("config", {})
-            return self._apply_named_transform(input_data, transform_type, transform_config)
-        
-        # If transform_func is callable, execute it
-        if callable(transform_func):
-            try:
-                return transform_func(input_data)
-            except Exception as e:
-                logger.error(f"Transform function execution failed: {str(e)}")
-                return input_data
+        """Apply a transform function to input data.
         
-        # Default: passthrough
-        return input_data
+        Transform nodes compile their transforms once at build time; this is
+        for one-off applications.
+        """
+        return apply_transform(input_data, transform_func)
     
     def _apply_named_transform(self, input_data: Any, transform_type: str, config: Optional[Dict[str, Any]] = None) -> Any:
         """Apply a named transform function."""
-        config = config or {}
-        
-        if transform_type == "passthrough" or transform_type == "identity":
-            return input_data
-        
-        elif transform_type == "to_string":
-            return str(input_data)
-        
-        elif transform_type == "to_json":
-            import json
-            if isinstance(input_data, str):
-                try:
-                    return json.loads(input_data)
-                except json.JSONDecodeError:
-                    return input_data
-            else:
-                return json.dumps(input_data) if input_data is not None else "{}"
-        
-        elif transform_type == "extract_field":
-            field = config.get("field")
-            if field and isinstance(input_data, dict):
-                return input_data.get(field)
-            return input_data
-        
-        elif transform_type == "set_field":
-            field = config.get("field")
-            value = config.get("value")
-            if field and isinstance(input_data, dict):
-                result = input_data.copy()
-                result[field] = value
-                return result
-            return input_data
-        
-        elif transform_type == "merge":
-            merge_data = config.get("data", {})
-            if isinstance(input_data, dict) and isinstance(merge_data, dict):
-                result = input_data.copy()
-                result.update(merge_data)
-                return result
-            return input_data
-        
-        elif transform_type == "filter":
-            filter_field = config.get("field")
-            filter_value = config.get("value")
-            if filter_field and isinstance(input_data, list):
-                return [item for item in input_data if isinstance(item, dict) and item.get(filter_field) == filter_value]
-            return input_data
-        
-        elif transform_type == "map":
-            map_field = config.get("field")
-            if map_field and isinstance(input_data, list):
-                return [item.get(map_field) if isinstance(item, dict) else item for item in input_data]
-            return input_data
-        
-        elif transform_type == "uppercase":
-            if isinstance(input_data, str):
-                return input_data.upper()
-            return str(input_data).upper()
-        
-        elif transform_type == "lowercase":
-            if isinstance(input_data, str):
-                return input_data.lower()
-            return str(input_data).lower()
-        
-        elif transform_type == "trim":
-            if isinstance(input_data, str):
-                return input_data.strip()
-            return str(input_data).strip()
-        
-        elif transform_type == "replace":
-            old = config.get("old", "")
-            new = config.get("new", "")
-            if isinstance(input_data, str):
-                return input_data.replace(old, new)
-            return str(input_data).replace(old, new)
-        
-        elif transform_type == "split":
-            separator = config.get("separator", " ")
-            if isinstance(input_data, str):
-                return input_data.split(separator)
-            return [str(input_data)]
-        
-        elif transform_type == "join":
-            separator = config.get("separator", " ")
-            if isinstance(input_data, list):
-                return separator.join(str(item) for item in input_data)
-            return str(input_data)
-        
-        elif transform_type == "length":
-            if isinstance(input_data, (str, list, dict)):
-                return len(input_data)
-            return 0
-        
-        elif transform_type == "slice":
-            start = config.get("start", 0)
-            end = config.get("end")
-            if isinstance(input_data, (str, list)):
-                return input_data[start:end]
-            return input_data
-        
-        else:
-            logger.warning(f"Unknown transform type: {transform_type}, using passthrough")
-            return input_data
+        return apply_transform(input_data, {"type": transform_type, "config": config or {}})
     
     async def execute_graph(
         self,
@@ -348,9 +346,14 @@ class LanggraphService:
         input_data: Dict[str, Any],
         state_schema: Optional[Dict[str, Any]] = None,
         enable_checkpointing: bool = False,
-        execution_id: Optional[str] = None
+        execution_id: Optional[str] = None,
+        deadline_ms: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Execute a Langgraph workflow."""
+        """Execute a Langgraph workflow.
+        
+        ``deadline_ms`` bounds the whole execution; every node, LLM call, tool
+        call and retry loop sees the remaining budget.
+        """
         try:
             # Get default values from schema if available
             if state_schema:
@@ -369,38 +372,114 @@ class LanggraphService:
                     logger.warning(f"Initial state validation warning: {error}")
                     # Don't fail on validation warning, but log it
             
-            # Save checkpoint if enabled
+            # Record per-node checkpoints if enabled
+            recorder = None
             if enable_checkpointing and execution_id:
-                self._save_checkpoint(execution_id, initial_state, "initial")
-            
-            # Execute graph
-            result = await graph.ainvoke(initial_state)
+                recorder = CheckpointRecorder(self.checkpoint_store, execution_id)
+                recorder.record("initial", dict(initial_state))
             
-            # Save final checkpoint if enabled
-            if enable_checkpointing and execution_id:
-                self._save_checkpoint(execution_id, result, "final")
+            result = await self._invoke_graph(graph, initial_state, recorder, deadline_ms)
             
             return {
                 "output": result.get("output", result),
                 "state": result,
                 "success": True,
                 "state_schema": state_schema,
-                "checkpoints": self._state_checkpoints.get(execution_id, []) if execution_id else []
+                "checkpoints": self.get_checkpoints(execution_id) if execution_id else []
             }
-        except (LLMExecutionError, ToolExecutionError, TransformExecutionError) as e:
+        except (LLMExecutionError, ToolExecutionError, TransformExecutionError, ExecutionTimeoutError, BudgetExceededError) as e:
             logger.error(f"Graph execution failed: {str(e)}")
             raise
         except Exception as e:
             logger.error(f"Graph execution failed: {str(e)}")
-            from app.exceptions import WorkflowExecutionError
+            raise self._graph_execution_error(e, execution_id)
+    
+    async def resume_graph(
+        self,
+        graph: Any,
+        execution_id: str,
+        state_schema: Optional[Dict[str, Any]] = None,
+        deadline_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Resume a failed execution from its per-node checkpoints.
+        
+        The graph is re-run from its entry point with the execution's initial
+        state, but nodes that already completed return their checkpointed
+        update instead of executing again. Execution therefore continues for
+        real at the node that failed.
+        """
+        checkpoints = self.get_checkpoints(execution_id)
+        if not checkpoints:
             raise WorkflowExecutionError(
-                f"Graph execution failed: {str(e)}",
-                error_code="GRAPH_EXECUTION_ERROR",
-                context={
-                    "original_error": str(e),
-                    "execution_id": execution_id
-                }
+                f"No checkpoints found for execution {execution_id}",
+                error_code="CHECKPOINT_NOT_FOUND",
+                context={"execution_id": execution_id}
             )
+        if checkpoints[-1]["type"] == "final":
+            raise WorkflowExecutionError(
+                f"Execution {execution_id} already completed",
+                error_code="EXECUTION_NOT_RESUMABLE",
+                context={"execution_id": execution_id}
+            )
+        
+        initial_state = materialize_state(checkpoints, upto=checkpoints[0]["sequence"])
+        replay = {
+            c["node_id"]: c["delta"] for c in checkpoints
+            if c["type"] == "node" and c["node_id"]
+        }
+        
+        try:
+            recorder = CheckpointRecorder(self.checkpoint_store, execution_id, replay=replay)
+            recorder.record("resume", {})
+            
+            result = await self._invoke_graph(graph, initial_state, recorder, deadline_ms)
+            
+            return {
+                "output": result.get("output", result),
+                "state": result,
+                "success": True,
+                "state_schema": state_schema,
+                "resumed": True,
+                "replayed_nodes": recorder.replayed_nodes,
+                "checkpoints": self.get_checkpoints(execution_id)
+            }
+        except (LLMExecutionError, ToolExecutionError, TransformExecutionError, ExecutionTimeoutError, BudgetExceededError) as e:
+            logger.error(f"Graph resume failed: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Graph resume failed: {str(e)}")
+            raise self._graph_execution_error(e, execution_id)
+    
+    async def _invoke_graph(
+        self,
+        graph: Any,
+        initial_state: Dict[str, Any],
+        recorder: Optional[CheckpointRecorder],
+        deadline_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Invoke a compiled graph with the checkpoint recorder and deadline bound to the run."""
+        token = current_recorder.set(recorder)
+        try:
+            with deadline_scope(deadline_ms):
+                result = await run_with_timeout(graph.ainvoke(initial_state))
+        finally:
+            current_recorder.reset(token)
+        
+        result = materialize_values(result)
+        if recorder:
+            recorder.record("final", compute_delta(initial_state, result))
+        return result
+    
+    def _graph_execution_error(self, error: Exception, execution_id: Optional[str]) -> WorkflowExecutionError:
+        """Wrap an unexpected error raised while running a graph."""
+        return WorkflowExecutionError(
+            f"Graph execution failed: {str(error)}",
+            error_code="GRAPH_EXECUTION_ERROR",
+            context={
+                "original_error": str(error),
+                "execution_id": execution_id
+            }
+        )
     
     @retry_on_failure(
         config=RetryConfig(max_attempts=3, initial_delay=1.0),
@@ -410,31 +489,17 @@ class LanggraphService:
         """Execute tool with retry logic."""
         return await tool._arun(**input_data)
     
-    def _save_checkpoint(self, execution_id: str, state: Dict[str, Any], checkpoint_type: str):
-        """Save a state checkpoint."""
-        if execution_id not in self._state_checkpoints:
-            self._state_checkpoints[execution_id] = []
-        
-        checkpoint = {
-            "type": checkpoint_type,
-            "state": state.copy(),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        self._state_checkpoints[execution_id].append(checkpoint)
-        
-        # Limit checkpoints to last 100 per execution
-        if len(self._state_checkpoints[execution_id]) > 100:
-            self._state_checkpoints[execution_id] = self._state_checkpoints[execution_id][-100:]
-    
     def get_checkpoints(self, execution_id: str) -> List[Dict[str, Any]]:
         """Get checkpoints for an execution."""
-        return self._state_checkpoints.get(execution_id, [])
+        return self.checkpoint_store.list(execution_id)
+    
+    def get_checkpoint_state(self, execution_id: str, sequence: Optional[int] = None) -> Dict[str, Any]:
+        """Rebuild the state of an execution at a checkpoint (default: the latest)."""
+        return materialize_state(self.get_checkpoints(execution_id), upto=sequence)
     
     def clear_checkpoints(self, execution_id: str):
         """Clear checkpoints for an execution."""
-        if execution_id in self._state_checkpoints:
-            del self._state_checkpoints[execution_id]
+        self.checkpoint_store.delete(execution_id)
     
     async def stream_execution(
         self,
@@ -448,7 +513,10 @@ class LanggraphService:
             async for event in graph.astream(initial_state):
                 yield {
                     "node_id": list(event.keys())[0] if event else None,
-                    "state": event,
+                    "state": {
+                        node_id: materialize_values(state) if isinstance(state, dict) else state
+                        for node_id, state in event.items()
+                    },
                     "status": "running"
                 }
             
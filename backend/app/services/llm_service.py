@@ -5,6 +5,10 @@ from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from app.config import settings
+from app.utils.deadline import run_with_timeout
+from app.utils.cancellation import run_cancellable, raise_if_cancelled
+from app.exceptions import ExecutionCancelledError
+from app.services.usage_tracker import usage_callbacks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -85,10 +89,19 @@ class LLMService:
         messages: list[BaseMessage],
         config: Optional[Dict[str, Any]] = None
     ) -> BaseMessage:
-        """Invoke LLM with messages."""
+        """Invoke LLM with messages, reporting usage to the current execution's budget.
+        
+        Cancelling the current execution aborts the request in flight.
+        """
         try:
-            response = await llm.ainvoke(messages, config=config or {})
+            config = dict(config or {})
+            callbacks = usage_callbacks()
+            if callbacks:
+                config["callbacks"] = list(config.get("callbacks") or []) + callbacks
+            response = await run_cancellable(run_with_timeout(llm.ainvoke(messages, config=config)))
             return response
+        except ExecutionCancelledError:
+            raise
         except Exception as e:
             logger.error(f"LLM invocation failed: {str(e)}")
             raise
@@ -102,6 +115,7 @@ class LLMService:
         """Stream LLM responses."""
         try:
             async for chunk in llm.astream(messages, config=config or {}):
+                raise_if_cancelled()
                 if hasattr(chunk, 'content'):
                     yield chunk.content
                 else:
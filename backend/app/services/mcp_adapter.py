@@ -1,9 +1,27 @@
 """MCP tool adapter for Langchain integration."""
+import asyncio
 import httpx
-from typing import List, Dict, Any, Optional, Type
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional, Type
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 from app.config import settings
+from app.utils.deadline import effective_timeout
+from app.utils.cancellation import run_cancellable, raise_if_cancelled
+from app.exceptions import ExecutionCancelledError
+
+# Upper bound for a single MCP tool call; the execution deadline can shorten it
+TOOL_EXECUTION_TIMEOUT = 30.0
+
+
+@asynccontextmanager
+async def _client(http_client: Optional[httpx.AsyncClient]) -> AsyncIterator[httpx.AsyncClient]:
+    """Use a shared client (its owner closes it), or open one for a single call."""
+    if http_client is not None:
+        yield http_client
+    else:
+        async with httpx.AsyncClient() as client:
+            yield client
 
 
 class MCPToolInput(BaseModel):
@@ -19,19 +37,24 @@ class MCPToolWrapper(BaseTool):
     mcp_tool_id: str
     mcp_tool_schema: Dict[str, Any] = {}
     mcp_registry_url: str = settings.mcp_registry_api_url
+    http_client: Optional[httpx.AsyncClient] = None  # Shared client; None opens one per call
     
     class Config:
         arbitrary_types_allowed = True
     
     def _run(self, **kwargs: Any) -> str:
         """Execute the MCP tool."""
+        raise_if_cancelled()
+        timeout = effective_timeout(TOOL_EXECUTION_TIMEOUT)
+        if timeout <= 0:
+            return f"Error executing MCP tool {self.mcp_tool_id}: execution deadline exceeded"
         try:
             # Call MCP tool execution endpoint
             with httpx.Client() as client:
                 response = client.post(
                     f"{self.mcp_registry_url}/tools/{self.mcp_tool_id}/execute",
                     json=kwargs,
-                    timeout=30.0
+                    timeout=timeout
                 )
                 response.raise_for_status()
                 result = response.json()
@@ -40,26 +63,36 @@ class MCPToolWrapper(BaseTool):
             return f"Error executing MCP tool {self.mcp_tool_id}: {str(e)}"
     
     async def _arun(self, **kwargs: Any) -> str:
-        """Async execute the MCP tool."""
+        """Async execute the MCP tool; cancelling the execution aborts the request."""
+        timeout = effective_timeout(TOOL_EXECUTION_TIMEOUT)
+        if timeout <= 0:
+            return f"Error executing MCP tool {self.mcp_tool_id}: execution deadline exceeded"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            async with _client(self.http_client) as client:
+                response = await run_cancellable(client.post(
                     f"{self.mcp_registry_url}/tools/{self.mcp_tool_id}/execute",
                     json=kwargs,
-                    timeout=30.0
-                )
+                    timeout=timeout
+                ))
                 response.raise_for_status()
                 result = response.json()
                 return str(result.get("output", result))
+        except ExecutionCancelledError:
+            raise
         except Exception as e:
             return f"Error executing MCP tool {self.mcp_tool_id}: {str(e)}"
 
 
 class MCPAdapter:
-    """Adapter for converting MCP tools to Langchain tools."""
+    """Adapter for converting MCP tools to Langchain tools.
+    
+    Requests go through ``http_client`` when given, so they reuse its pooled
+    connections; the adapter doesn't close it.
+    """
     
-    def __init__(self, mcp_registry_url: str = None):
+    def __init__(self, mcp_registry_url: str = None, http_client: Optional[httpx.AsyncClient] = None):
         self.mcp_registry_url = mcp_registry_url or settings.mcp_registry_api_url
+        self.http_client = http_client
         self._tool_cache: Dict[str, Dict[str, Any]] = {}
     
     async def get_mcp_tool(self, tool_id: str) -> Optional[Dict[str, Any]]:
@@ -68,7 +101,7 @@ class MCPAdapter:
             return self._tool_cache[tool_id]
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with _client(self.http_client) as client:
                 response = await client.get(
                     f"{self.mcp_registry_url}/tools/{tool_id}",
                     timeout=10.0
@@ -81,6 +114,12 @@ class MCPAdapter:
             print(f"Error fetching MCP tool {tool_id}: {e}")
             return None
     
+    async def get_mcp_tools(self, tool_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch several MCP tool definitions concurrently."""
+        unique_ids = list(dict.fromkeys(tool_ids))
+        tools = await asyncio.gather(*(self.get_mcp_tool(tool_id) for tool_id in unique_ids))
+        return dict(zip(unique_ids, tools))
+    
     def create_langchain_tool(self, mcp_tool: Dict[str, Any]) -> MCPToolWrapper:
         """Create a Langchain tool from MCP tool definition."""
         tool_id = mcp_tool.get("toolId") or mcp_tool.get("id")
@@ -98,7 +137,8 @@ class MCPAdapter:
             name=name,
             description=description,
             mcp_tool_id=tool_id,
-            mcp_tool_schema=schema
+            mcp_tool_schema=schema,
+            http_client=self.http_client
         )
     
     
@@ -117,7 +157,7 @@ class MCPAdapter:
     async def get_tools_for_persona(self, persona: str) -> List[MCPToolWrapper]:
         """Get MCP tools available for a specific persona."""
         try:
-            async with httpx.AsyncClient() as client:
+            async with _client(self.http_client) as client:
                 # Get all tools
                 response = await client.get(
                     f"{self.mcp_registry_url}/tools",
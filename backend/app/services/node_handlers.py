@@ -0,0 +1,266 @@
+"""Node handler registry for Langgraph workflow nodes.
+
+Each handler is a factory that runs once at graph compile time. It receives the
+Langgraph service, the converted node configuration and the MCP tool resolved
+for the node (if any), parses whatever it needs from the configuration and
+returns the async node function that Langgraph invokes on every execution.
+"""
+from typing import Dict, Any, Callable, Awaitable, Optional, List
+from app.exceptions import (
+    LLMExecutionError,
+    ToolExecutionError,
+    TransformExecutionError,
+    GraphCompilationError,
+    ExecutionTimeoutError,
+    BudgetExceededError
+)
+from app.utils.transforms import get_transform
+from app.utils.streaming import compile_streaming_transform, materialize
+from app.services.transform_sandbox import get_transform_sandbox
+import logging
+
+logger = logging.getLogger(__name__)
+
+NodeFunction = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+NodeHandlerFactory = Callable[[Any, Dict[str, Any], Any], NodeFunction]
+
+
+class NodeHandlerRegistry:
+    """Registry mapping node types to node handler factories."""
+
+    def __init__(self):
+        self._handlers: Dict[str, NodeHandlerFactory] = {}
+        self._default: Optional[NodeHandlerFactory] = None
+
+    def register(self, *node_types: str):
+        """Decorator registering a handler factory for one or more node types."""
+        def decorator(factory: NodeHandlerFactory) -> NodeHandlerFactory:
+            for node_type in node_types:
+                self._handlers[node_type] = factory
+            return factory
+        return decorator
+
+    def set_default(self, factory: NodeHandlerFactory) -> NodeHandlerFactory:
+        """Set the handler factory used for unregistered node types."""
+        self._default = factory
+        return factory
+
+    def resolve(self, node_type: Optional[str]) -> NodeHandlerFactory:
+        """Get the handler factory for a node type."""
+        factory = self._handlers.get(node_type) or self._default
+        if factory is None:
+            raise KeyError(f"No node handler registered for type: {node_type}")
+        return factory
+
+    def unregister(self, node_type: str):
+        """Remove the handler factory for a node type."""
+        self._handlers.pop(node_type, None)
+
+    def types(self) -> List[str]:
+        """Get registered node types."""
+        return sorted(self._handlers)
+
+
+node_handlers = NodeHandlerRegistry()
+
+
+def register_node_handler(*node_types: str):
+    """Register a handler factory on the default node handler registry."""
+    return node_handlers.register(*node_types)
+
+
+def raw_node_input(state: Dict[str, Any]) -> Any:
+    """Get the upstream output, else the workflow input, as is (possibly lazy)."""
+    if "output" in state:
+        return state["output"]
+    return state.get("input", {})
+
+
+def node_input(state: Dict[str, Any]) -> Any:
+    """Get the value a node operates on: the upstream output, else the workflow input."""
+    return materialize(raw_node_input(state))
+
+
+@node_handlers.set_default
+def passthrough_handler(service: Any, node_config: Dict[str, Any], tool: Any = None) -> NodeFunction:
+    """Pass the node input through unchanged."""
+    node_id = node_config.get("id")
+
+    async def node_func(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {"output": node_input(state), "node_id": node_id}
+
+    return node_func
+
+
+# Output and condition nodes forward their input; condition routing is compiled into edges
+node_handlers.register("output", "condition")(passthrough_handler)
+
+
+@register_node_handler("input")
+def input_handler(service: Any, node_config: Dict[str, Any], tool: Any = None) -> NodeFunction:
+    """Pass the workflow input into the graph state and seed the node output with it."""
+    async def node_func(state: Dict[str, Any]) -> Dict[str, Any]:
+        input_data = state.get("input", {})
+        return {"input": input_data, "output": input_data}
+
+    return node_func
+
+
+@register_node_handler("tool", "mcp-tool")
+def tool_handler(service: Any, node_config: Dict[str, Any], tool: Any = None) -> NodeFunction:
+    """Execute the MCP tool resolved for the node at compile time."""
+    if tool is None:
+        return passthrough_handler(service, node_config)
+
+    node_id = node_config.get("id")
+    mcp_tool_id = node_config.get("mcp_tool_id")
+
+    async def node_func(state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            tool_input = node_input(state)
+            if not isinstance(tool_input, dict):
+                tool_input = {"input": tool_input}
+            result = await service._execute_tool_with_retry(tool, tool_input)
+            return {"output": result, "node_id": node_id}
+        except ExecutionTimeoutError:
+            raise
+        except Exception as e:
+            raise ToolExecutionError(
+                f"Tool execution failed: {str(e)}",
+                tool_id=mcp_tool_id,
+                context={"original_error": str(e)}
+            )
+
+    return node_func
+
+
+def parse_llm_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve LLM settings from the node's llm block or its top-level data."""
+    llm_config = config.get("llm", {})
+    return {
+        "provider": llm_config.get("provider") or config.get("provider") or "openai",
+        "model": llm_config.get("model") or config.get("model") or "gpt-4",
+        "temperature": llm_config.get("temperature") or config.get("temperature"),
+        "max_tokens": llm_config.get("max_tokens") or config.get("max_tokens"),
+        "system_message": llm_config.get("system_message") or config.get("system_message"),
+        "api_key": llm_config.get("api_key") or config.get("api_key")
+    }
+
+
+@register_node_handler("llm")
+def llm_handler(service: Any, node_config: Dict[str, Any], tool: Any = None) -> NodeFunction:
+    """Invoke an LLM with the node input."""
+    node_id = node_config.get("id")
+    llm_config = parse_llm_config(node_config.get("config", {}))
+    provider = llm_config["provider"]
+    model = llm_config["model"]
+    system_message = llm_config["system_message"]
+
+    async def node_func(state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            llm = service.llm_service.create_llm(
+                provider=provider,
+                model=model,
+                temperature=llm_config["temperature"],
+                max_tokens=llm_config["max_tokens"],
+                api_key=llm_config["api_key"]
+            )
+
+            messages = service.llm_service.create_messages(
+                input_data=node_input(state),
+                system_message=system_message
+            )
+
+            response = await service.llm_service.invoke(llm, messages)
+            output = response.content if hasattr(response, 'content') else str(response)
+
+            logger.info(f"LLM node {node_id} executed successfully with provider {provider}, model {model}")
+
+            return {
+                "output": output,
+                "node_id": node_id,
+                "llm_response": {
+                    "provider": provider,
+                    "model": model,
+                    "response": output
+                }
+            }
+        except (ExecutionTimeoutError, BudgetExceededError):
+            raise
+        except Exception as e:
+            logger.error(f"LLM node {node_id} execution failed: {str(e)}")
+            raise LLMExecutionError(
+                f"LLM execution failed: {str(e)}",
+                provider=provider,
+                model=model,
+                context={
+                    "node_id": node_id,
+                    "original_error": str(e)
+                }
+            )
+
+    return node_func
+
+
+@register_node_handler("transform")
+def transform_handler(service: Any, node_config: Dict[str, Any], tool: Any = None) -> NodeFunction:
+    """Apply the node's configured transform, compiled once when the graph is built.
+
+    With ``streaming`` set, the transform passes lazy values on to the next node
+    instead of materializing them (see ``app.utils.streaming``). With ``sandbox``
+    set, and for callable transforms that can be sent to a worker, it runs in the
+    transform sandbox's worker processes instead of on the event loop (see
+    ``app.services.transform_sandbox``).
+    """
+    node_id = node_config.get("id")
+    transform_func = node_config.get("config", {}).get("transform")
+    streaming = bool(node_config.get("config", {}).get("streaming"))
+    sandbox = bool(node_config.get("config", {}).get("sandbox")) or (
+        callable(transform_func) and get_transform_sandbox().can_sandbox(transform_func)
+    )
+    if not transform_func:
+        return passthrough_handler(service, node_config)
+
+    if isinstance(transform_func, str):
+        transform_type = transform_func
+    elif isinstance(transform_func, dict):
+        transform_type = transform_func.get("type", "unknown")
+    else:
+        transform_type = "unknown"
+    try:
+        transform = compile_streaming_transform(transform_func) if streaming else get_transform(transform_func)
+    except ValueError as e:
+        raise GraphCompilationError(f"Node {node_id} has an invalid transform: {str(e)}", node_id=node_id)
+
+    async def node_func(state: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            if sandbox:
+                output = await get_transform_sandbox().run(transform_func, node_input(state), node_id=node_id)
+            else:
+                output = transform(raw_node_input(state) if streaming else node_input(state))
+            return {"output": output, "node_id": node_id}
+        except ExecutionTimeoutError:
+            raise
+        except Exception as e:
+            raise TransformExecutionError(
+                f"Transform execution failed: {str(e)}",
+                transform_type=transform_type,
+                context={
+                    "node_id": node_id,
+                    "original_error": str(e)
+                }
+            )
+
+    return node_func
+
+
+def is_passthrough_node(node_config: Dict[str, Any]) -> bool:
+    """Whether a node only forwards its input, so the graph optimizer may remove it."""
+    handler = node_handlers.resolve(node_config.get("type"))
+    if handler is passthrough_handler:
+        return True
+    if handler is transform_handler:
+        return not (node_config.get("config") or {}).get("transform")
+    if handler is tool_handler:
+        return not node_config.get("mcp_tool_id")
+    return False
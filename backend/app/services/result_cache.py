@@ -0,0 +1,343 @@
+"""Whole-execution result cache for deterministic workflows.
+
+Workflows that are pure functions of their input (temperature 0, read-only
+tools) can opt in with ``"resultCache": true`` (or ``{"ttlSeconds": ...}``) in
+their ``langgraphConfig``. Completed results are cached under the execution
+fingerprint (workflow engine settings, definition hash and input hash), so a
+changed definition never hits an old result; entries of a workflow are also
+dropped when its definition changes. Memory holds a size-bounded LRU with a
+TTL per entry; an optional SQLite disk tier keeps results across restarts
+and beyond the memory limit. Disk writes are batched by a background thread
+and ``lookup`` reads the disk tier on a worker thread, so the event loop never
+waits on SQLite. Results that aren't plain JSON are not cached, since a hit
+would return them with different types than a fresh run.
+"""
+from typing import Any, Dict, Optional, Set, Tuple
+from collections import OrderedDict
+from pathlib import Path
+from app.config import settings
+from app.models.workflow import WorkflowDefinition
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_ttl(definition: WorkflowDefinition) -> Optional[int]:
+    """TTL in seconds for caching a definition's results, or None if it doesn't opt in."""
+    config = (definition.langgraphConfig or {}).get("resultCache")
+    if not config:
+        return None
+    if isinstance(config, dict):
+        if config.get("enabled") is False:
+            return None
+        return config.get("ttlSeconds") or settings.result_cache_ttl_seconds
+    return settings.result_cache_ttl_seconds
+
+
+class ExecutionResultCache:
+    """LRU cache of execution results with per-entry TTLs and an optional disk tier.
+
+    ``put`` queues disk writes for a writer thread, which commits them (and the
+    last-used times of disk hits) every ``flush_interval_ms``; disk reads merge
+    the writes still waiting, so a result is served as soon as it is put.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100000,
+        flush_interval_ms: int = 200
+    ):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self.flush_interval_ms = flush_interval_ms
+        # Fingerprint -> (workflow id, serialized result, expires at), least recently used first
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._by_workflow: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # Guards the writer's connection
+        self._read_lock = threading.Lock()
+        self._wakeup = threading.Condition()  # Guards the pending and writing state below
+        # Disk changes waiting for the writer: results to insert, last-used times of
+        # disk hits, workflows whose results to drop and whether to drop everything
+        self._pending: Dict[str, Tuple[str, str, float]] = {}
+        self._touched: Dict[str, float] = {}
+        self._dropped: Set[str] = set()
+        self._cleared = False
+        # The same for the transaction being committed
+        self._writing: Dict[str, Tuple[str, str, float]] = {}
+        self._writing_dropped: Set[str] = set()
+        self._writing_cleared = False
+        self._closed = False
+        self._trimmed = 0.0
+        self._writer: Optional[threading.Thread] = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result (a fresh copy), or None on a miss or expired entry.
+
+        Reads the disk tier on the caller's thread; use ``lookup`` on the event loop.
+        """
+        now = time.time()
+        entry = self._get_memory(fingerprint, now)
+        if entry is None and self._disk is not None:
+            entry = self._disk_get(fingerprint, now)
+            if entry is not None:
+                self._add_disk_hit(fingerprint, entry, now)
+        return self._hit_or_miss(fingerprint, entry)
+
+    async def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Like ``get``, but reads the disk tier on a worker thread."""
+        now = time.time()
+        entry = self._get_memory(fingerprint, now)
+        if entry is None and self._disk is not None:
+            entry = await asyncio.to_thread(self._disk_get, fingerprint, now)
+            if entry is not None:
+                self._add_disk_hit(fingerprint, entry, now)
+        return self._hit_or_miss(fingerprint, entry)
+
+    def put(self, fingerprint: str, workflow_id: str, result: Dict[str, Any], ttl_seconds: int) -> bool:
+        """Cache an execution result for ``ttl_seconds``.
+
+        Returns False (and caches nothing) when the result isn't plain JSON.
+        """
+        if self.max_entries <= 0 and self._disk is None:
+            return False
+        try:
+            data = json.dumps(result)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not caching the result of workflow {workflow_id}: {str(e)}")
+            return False
+        entry = (workflow_id, data, time.time() + ttl_seconds)
+        self._put_memory(fingerprint, entry)
+        if self._disk is not None:
+            with self._wakeup:
+                self._pending[fingerprint] = entry
+        return True
+
+    def invalidate(self, workflow_id: str):
+        """Drop every cached result of a workflow (its definition changed)."""
+        for fingerprint in list(self._by_workflow.get(workflow_id, ())):
+            self._remove(fingerprint)
+        if self._disk is not None:
+            with self._wakeup:
+                self._pending = {
+                    fingerprint: entry for fingerprint, entry in self._pending.items() if entry[0] != workflow_id
+                }
+                self._dropped.add(workflow_id)
+
+    def clear(self):
+        """Drop every cached result."""
+        self._entries.clear()
+        self._by_workflow.clear()
+        if self._disk is not None:
+            with self._wakeup:
+                self._pending.clear()
+                self._touched.clear()
+                self._dropped.clear()
+                self._cleared = True
+
+    def flush(self):
+        """Write pending disk changes."""
+        if self._disk is None:
+            return
+        with self._lock:
+            with self._wakeup:
+                self._writing, self._pending = self._pending, {}
+                self._writing_dropped, self._dropped = self._dropped, set()
+                self._writing_cleared, self._cleared = self._cleared, False
+                touched, self._touched = self._touched, {}
+            try:
+                if self._writing or self._writing_dropped or self._writing_cleared or touched:
+                    now = time.time()
+                    self._disk.execute("BEGIN")
+                    if self._writing_cleared:
+                        self._disk.execute("DELETE FROM results")
+                    self._disk.executemany(
+                        "DELETE FROM results WHERE workflow_id = ?",
+                        [(workflow_id,) for workflow_id in self._writing_dropped]
+                    )
+                    self._disk.executemany(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (fingerprint, workflow_id, zlib.compress(result.encode("utf-8")), expires_at, now)
+                            for fingerprint, (workflow_id, result, expires_at) in self._writing.items()
+                        ]
+                    )
+                    self._disk.executemany(
+                        "UPDATE results SET used_at = ? WHERE fingerprint = ?",
+                        [(used_at, fingerprint) for fingerprint, used_at in touched.items()]
+                    )
+                    self._disk.execute("COMMIT")
+            finally:
+                with self._wakeup:
+                    self._writing = {}
+                    self._writing_dropped = set()
+                    self._writing_cleared = False
+            if time.monotonic() - self._trimmed >= 1:
+                self._trim_disk()
+
+    def close(self):
+        if self._disk is None:
+            return
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join(timeout=5)
+        self.flush()
+        self._reader.close()
+        self._disk.close()
+        self._disk = None
+
+    def _get_memory(self, fingerprint: str, now: float) -> Optional[Tuple[str, str, float]]:
+        entry = self._entries.get(fingerprint)
+        if entry is not None and entry[2] <= now:
+            self._remove(fingerprint)
+            entry = None
+        return entry
+
+    def _add_disk_hit(self, fingerprint: str, entry: Tuple[str, str, float], now: float):
+        self.disk_hits += 1
+        self._put_memory(fingerprint, entry)
+        with self._wakeup:
+            self._touched[fingerprint] = now  # Written with the next batch, for trimming
+
+    def _hit_or_miss(self, fingerprint: str, entry: Optional[Tuple[str, str, float]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            self.misses += 1
+            return None
+        if fingerprint in self._entries:  # Not kept in memory when its size limit is 0
+            self._entries.move_to_end(fingerprint)
+        self.hits += 1
+        return json.loads(entry[1])
+
+    def _put_memory(self, fingerprint: str, entry: Tuple[str, str, float]):
+        if self.max_entries <= 0:
+            return
+        if fingerprint in self._entries:
+            self._remove(fingerprint)
+        self._entries[fingerprint] = entry
+        self._by_workflow.setdefault(entry[0], set()).add(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, fingerprint: str):
+        workflow_id = self._entries.pop(fingerprint)[0]
+        fingerprints = self._by_workflow[workflow_id]
+        fingerprints.discard(fingerprint)
+        if not fingerprints:
+            del self._by_workflow[workflow_id]
+
+    def _open_disk(self, directory: str):
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        path = str(Path(directory) / "results.db")
+        self._disk = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._disk.execute("PRAGMA journal_mode=WAL")
+        self._disk.execute("PRAGMA synchronous=NORMAL")
+        self._disk.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                fingerprint TEXT PRIMARY KEY,
+                workflow_id TEXT NOT NULL,
+                result BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self._disk.execute("CREATE INDEX IF NOT EXISTS idx_results_workflow ON results (workflow_id)")
+        self._disk.execute("CREATE INDEX IF NOT EXISTS idx_results_used ON results (used_at)")
+        self._disk.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        # Reads use their own connection, so in WAL mode they never wait behind the writer's commit
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._writer = threading.Thread(target=self._write_loop, name="result-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _disk_get(self, fingerprint: str, now: float) -> Optional[Tuple[str, str, float]]:
+        with self._wakeup:
+            entry = self._pending.get(fingerprint) or self._writing.get(fingerprint)
+            # Results of dropped workflows may still be on disk until the writer commits
+            dropped = self._dropped | self._writing_dropped
+            cleared = self._cleared or self._writing_cleared
+        if entry is None:
+            with self._read_lock:
+                row = self._reader.execute(
+                    "SELECT workflow_id, result, expires_at FROM results WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+            if row is None or cleared or row[0] in dropped:
+                return None
+            entry = (row[0], zlib.decompress(row[1]).decode("utf-8"), row[2])
+        return entry if entry[2] > now else None  # Expired rows are deleted when the disk is trimmed
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                if not self._closed:
+                    self._wakeup.wait(self.flush_interval_ms / 1000)
+                closed = self._closed
+            if closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Failed to write cached results to disk: {str(e)}")
+
+    def _trim_disk(self):
+        # Trimming scans the table, so the writer runs it at most once a second
+        self._trimmed = time.monotonic()
+        self._disk.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        if self.disk_max_entries > 0:
+            self._disk.execute(
+                """
+                DELETE FROM results WHERE fingerprint IN (
+                    SELECT fingerprint FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.disk_max_entries,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk": self._disk is not None
+        }
+
+
+def create_result_cache() -> ExecutionResultCache:
+    """Create an execution result cache from the configured limits."""
+    return ExecutionResultCache(
+        max_entries=settings.result_cache_max_entries,
+        disk_path=settings.result_cache_disk_path,
+        disk_max_entries=settings.result_cache_disk_max_entries
+    )
+
+
+_result_cache: Optional[ExecutionResultCache] = None
+
+
+def get_result_cache() -> ExecutionResultCache:
+    """Get the shared execution result cache."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = create_result_cache()
+    return _result_cache
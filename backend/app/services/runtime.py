@@ -0,0 +1,93 @@
+"""Execution runtime shared by every API router.
+
+One ``ExecutionRuntime`` is created when the application starts and handed to
+the routers through the ``get_runtime`` FastAPI dependency. It owns a single
+LLM service and MCP adapter (and so a single LLM client cache and tool
+cache), the agent, chain and Langgraph services built on them, and the
+workflow executor with its queue, execution store and result cache, so an
+execution started through one router is visible to all of them. The runtime
+creates its own execution store and result cache rather than using the
+process-wide ones, since closing it closes them.
+"""
+from typing import Optional
+from app.services.llm_service import LLMService
+from app.services.mcp_adapter import MCPAdapter
+from app.services.agent_service import AgentService
+from app.services.chain_service import ChainService
+from app.services.langgraph_service import LanggraphService
+from app.services.checkpoint_store import CheckpointStore
+from app.services.execution_store import ExecutionStore, create_execution_store
+from app.services.result_cache import ExecutionResultCache, create_result_cache
+from app.services.transform_sandbox import get_transform_sandbox
+from app.services.workflow_executor import WorkflowExecutor
+import asyncio
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionRuntime:
+    """Application-scoped services for building and running workflows."""
+
+    def __init__(
+        self,
+        llm_service: Optional[LLMService] = None,
+        mcp_adapter: Optional[MCPAdapter] = None,
+        execution_store: Optional[ExecutionStore] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        result_cache: Optional[ExecutionResultCache] = None
+    ):
+        self.llm_service = llm_service or LLMService()
+        self.http_client = httpx.AsyncClient()
+        self.mcp_adapter = mcp_adapter or MCPAdapter(http_client=self.http_client)
+        self.execution_store = execution_store if execution_store is not None else create_execution_store()
+        self.result_cache = result_cache if result_cache is not None else create_result_cache()
+        self.agent_service = AgentService(mcp_adapter=self.mcp_adapter, llm_service=self.llm_service)
+        self.chain_service = ChainService(mcp_adapter=self.mcp_adapter, llm_service=self.llm_service)
+        self.langgraph_service = LanggraphService(
+            checkpoint_store=checkpoint_store,
+            mcp_adapter=self.mcp_adapter,
+            llm_service=self.llm_service
+        )
+        self.executor = WorkflowExecutor(
+            execution_store=self.execution_store,
+            agent_service=self.agent_service,
+            chain_service=self.chain_service,
+            langgraph_service=self.langgraph_service,
+            result_cache=self.result_cache
+        )
+
+    async def close(self):
+        """Stop the execution queue's workers and release the runtime's resources.
+
+        Closes the execution store, result cache and HTTP client, writes pending
+        checkpoints and stops the idle transform sandbox workers.
+        """
+        await self.executor.execution_queue.shutdown()
+        self.execution_store.close()
+        self.result_cache.close()
+        await self.http_client.aclose()
+        # Shared with other runtimes, so left usable: new sandbox workers start on demand
+        self.langgraph_service.checkpoint_store.flush()
+        await asyncio.to_thread(get_transform_sandbox().shutdown)
+
+
+_runtime: Optional[ExecutionRuntime] = None
+
+
+def get_runtime() -> ExecutionRuntime:
+    """Get the shared execution runtime (a FastAPI dependency of the routers)."""
+    global _runtime
+    if _runtime is None:
+        _runtime = ExecutionRuntime()
+        logger.info("Created the shared execution runtime")
+    return _runtime
+
+
+async def close_runtime():
+    """Close the shared execution runtime; the next ``get_runtime`` creates a fresh one."""
+    global _runtime
+    if _runtime is not None:
+        runtime, _runtime = _runtime, None
+        await runtime.close()
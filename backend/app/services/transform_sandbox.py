@@ -0,0 +1,277 @@
+"""Sandboxed execution of callable and CPU-heavy transforms in worker processes.
+
+Transform nodes with ``"sandbox": true`` and callable transforms run in a
+bounded pool of worker processes instead of on the event loop, so a slow or
+hanging transform does not stall other executions. Each call gets a timeout
+(within the execution deadline); a worker that times out or is cancelled is
+killed and replaced. Workers cap their address space so a runaway transform
+fails with a memory error instead of exhausting the host.
+
+Large string and bytes payloads (inputs and results) are copied into shared
+memory and only the segment name travels through the worker's pipe, so they
+are not pickled. Other values are pickled as usual, so transforms that can't
+be pickled (like lambdas) can't be sandboxed.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from multiprocessing import shared_memory
+from app.config import settings
+from app.exceptions import TransformExecutionError
+from app.utils.deadline import run_with_timeout
+from app.utils.transforms import get_transform
+import asyncio
+import logging
+import multiprocessing
+import pickle
+
+logger = logging.getLogger(__name__)
+
+
+class TransformSandbox:
+    """Bounded pool of worker processes running transforms with timeouts and memory limits."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout_ms: int = 30000,
+        memory_limit_mb: int = 512,
+        shared_memory_threshold: int = 1024 * 1024
+    ):
+        self.max_workers = max_workers
+        self.timeout_ms = timeout_ms
+        self.memory_limit_mb = memory_limit_mb
+        self.shared_memory_threshold = shared_memory_threshold
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List["_Worker"] = []
+        self._workers = 0
+        self._slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    def can_sandbox(self, transform_func: Any) -> bool:
+        """Whether a transform would run in a worker process (the pool is enabled and it is picklable)."""
+        return self.max_workers > 0 and _picklable(transform_func)
+
+    async def run(
+        self,
+        transform_func: Any,
+        input_data: Any,
+        timeout_ms: Optional[int] = None,
+        node_id: Optional[str] = None
+    ) -> Any:
+        """Apply a transform in a worker process.
+
+        When the pool is disabled, transforms run in a thread instead: the event
+        loop stays responsive, but the call can't be killed or memory-limited.
+        Raises ExecutionTimeoutError on timeout and TransformExecutionError when
+        the transform can't be sent to a worker, fails, runs out of memory or
+        crashes its worker.
+        """
+        timeout_ms = timeout_ms or self.timeout_ms
+        timeout = timeout_ms / 1000 if timeout_ms and timeout_ms > 0 else None
+        if self.max_workers <= 0:
+            transform = get_transform(transform_func)
+            return await run_with_timeout(asyncio.to_thread(transform, input_data), timeout, node_id)
+        if not _picklable(transform_func):
+            raise TransformExecutionError(
+                f"Transform {transform_func!r} can't be sandboxed: it must be picklable "
+                "(a named transform or a module-level function)",
+                context={"node_id": node_id}
+            )
+        return await run_with_timeout(self._run_in_worker(transform_func, input_data), timeout, node_id)
+
+    async def _run_in_worker(self, transform_func: Any, input_data: Any) -> Any:
+        async with self._semaphore():
+            worker: Optional[_Worker] = None
+            segment = None
+            receive: Optional[asyncio.Future] = None
+            healthy = False
+            try:
+                payload, segment = _pack(input_data, self.shared_memory_threshold)
+                worker = self._idle.pop() if self._idle else self._start_worker()
+                worker.connection.send((transform_func, payload))
+                # Shielded so a timeout or cancellation can still collect a result already sent
+                receive = asyncio.ensure_future(asyncio.to_thread(worker.connection.recv))
+                status, result = await asyncio.shield(receive)
+                healthy = True
+            except (EOFError, OSError) as e:
+                if worker is None:  # Packing the input failed before a worker was taken
+                    raise
+                raise TransformExecutionError(
+                    f"Transform worker exited unexpectedly: {str(e)}",
+                    context={"exit_code": worker.process.exitcode}
+                )
+            finally:
+                _release(segment)
+                if healthy:
+                    self._idle.append(worker)
+                elif worker is not None:
+                    # Timed out, cancelled or crashed: the worker may still be busy
+                    await self._stop_worker(worker, receive)
+
+        if status == "ok":
+            return _unpack(result, unlink=True)
+        if status == "memory":
+            raise TransformExecutionError(
+                f"Transform exceeded the sandbox memory limit of {self.memory_limit_mb} MB",
+                context={"memory_limit_mb": self.memory_limit_mb}
+            )
+        raise TransformExecutionError(f"Transform failed in sandbox: {result}")
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; tests and workers may run several
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots[0] is not loop:
+            self._slots = (loop, asyncio.Semaphore(self.max_workers))
+        return self._slots[1]
+
+    def _start_worker(self) -> "_Worker":
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, self.memory_limit_mb * 1024 * 1024, self.shared_memory_threshold),
+            daemon=True
+        )
+        process.start()
+        child.close()
+        self._workers += 1
+        logger.debug(f"Started transform sandbox worker {process.pid}")
+        return _Worker(process, parent)
+
+    async def _stop_worker(self, worker: "_Worker", receive: Optional[asyncio.Future] = None):
+        """Kill a worker, then free the shared memory of a result it sent that nobody will read."""
+        worker.process.kill()
+        self._workers -= 1
+        logger.warning(f"Stopped transform sandbox worker {worker.process.pid}")
+        await asyncio.to_thread(worker.process.join, 1)
+        if receive is not None:
+            # The pipe reports EOF once the worker is gone, so this only waits for a result already sent
+            await asyncio.wait([receive], timeout=1)
+            if receive.done() and not receive.cancelled() and receive.exception() is None:
+                status, result = receive.result()
+                if status == "ok":
+                    _discard(result)
+        worker.connection.close()
+
+    def shutdown(self):
+        """Stop the idle workers (busy ones are stopped when their calls end)."""
+        while self._idle:
+            worker = self._idle.pop()
+            worker.connection.close()
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+            self._workers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {"maxWorkers": self.max_workers, "workers": self._workers, "idleWorkers": len(self._idle)}
+
+
+class _Worker:
+    def __init__(self, process: Any, connection: Any):
+        self.process = process
+        self.connection = connection
+
+
+def _worker_main(connection: Any, memory_limit: int, shared_memory_threshold: int):
+    """Worker process loop: apply transforms until the pipe closes."""
+    _limit_memory(memory_limit)
+    while True:
+        try:
+            transform_func, payload = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            output = get_transform(transform_func)(_unpack(payload))
+            result: Tuple[str, Any] = ("ok", _pack(output, shared_memory_threshold)[0])
+        except MemoryError:
+            result = ("memory", None)
+        except Exception as e:
+            result = ("error", f"{type(e).__name__}: {str(e)}")
+        connection.send(result)
+
+
+def _limit_memory(memory_limit: int):
+    """Cap the worker's address space at its current size plus the limit."""
+    if memory_limit <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        return
+    try:
+        with open("/proc/self/statm") as statm:
+            baseline = int(statm.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        baseline = 0
+    limit = baseline + memory_limit
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _pack(value: Any, threshold: int) -> Tuple[Tuple[str, Any], Optional[shared_memory.SharedMemory]]:
+    """Wrap a value for the pipe, moving large strings and bytes to shared memory."""
+    if isinstance(value, (str, bytes)) and threshold > 0 and len(value) >= threshold:
+        data = value.encode("utf-8") if isinstance(value, str) else value
+        segment = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        segment.buf[:len(data)] = data
+        kind = "str" if isinstance(value, str) else "bytes"
+        segment.close()
+        return ("shared", (segment.name, len(data), kind)), segment
+    return ("inline", value), None
+
+
+def _unpack(payload: Tuple[str, Any], unlink: bool = False) -> Any:
+    """Read a value wrapped by ``_pack``; ``unlink`` frees its shared memory."""
+    kind, value = payload
+    if kind == "inline":
+        return value
+    name, size, value_type = value
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        with segment.buf[:size] as view:
+            # Decode straight from the segment rather than via an intermediate bytes copy
+            return str(view, "utf-8") if value_type == "str" else bytes(view)
+    finally:
+        segment.close()
+        if unlink:
+            segment.unlink()
+
+
+def _release(segment: Optional[shared_memory.SharedMemory]):
+    if segment is not None:
+        segment.unlink()
+
+
+def _discard(payload: Tuple[str, Any]):
+    """Free the shared memory of a value wrapped by ``_pack`` without reading it."""
+    kind, value = payload
+    if kind != "shared":
+        return
+    try:
+        segment = shared_memory.SharedMemory(name=value[0])
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def _picklable(value: Any) -> bool:
+    try:
+        pickle.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
+_transform_sandbox: Optional[TransformSandbox] = None
+
+
+def get_transform_sandbox() -> TransformSandbox:
+    """Get the shared transform sandbox."""
+    global _transform_sandbox
+    if _transform_sandbox is None:
+        _transform_sandbox = TransformSandbox(
+            max_workers=settings.transform_sandbox_workers,
+            timeout_ms=settings.transform_sandbox_timeout_ms,
+            memory_limit_mb=settings.transform_sandbox_memory_mb,
+            shared_memory_threshold=settings.transform_sandbox_shared_memory_bytes
+        )
+    return _transform_sandbox
@@ -0,0 +1,209 @@
+"""Token usage and cost accounting with per-execution budgets.
+
+A ``UsageTracker`` is bound to an execution with ``usage_scope``. LLM calls made
+through ``LLMService.invoke`` and by agents and chains (via
+``usage_callbacks()``) report their token usage to it. Once a budget is
+exhausted, the next LLM call is refused with ``BudgetExceededError``.
+"""
+from typing import Dict, Any, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from uuid import UUID
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from app.exceptions import BudgetExceededError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Model pricing in USD per 1K tokens - approximate values
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gpt-4": {"prompt": 0.03, "completion": 0.06},
+    "gpt-4-turbo": {"prompt": 0.01, "completion": 0.03},
+    "gpt-4o": {"prompt": 0.005, "completion": 0.015},
+    "gpt-4o-mini": {"prompt": 0.00015, "completion": 0.0006},
+    "gpt-3.5-turbo": {"prompt": 0.0015, "completion": 0.002},
+    "claude-3-opus": {"prompt": 0.015, "completion": 0.075},
+    "claude-3-sonnet": {"prompt": 0.003, "completion": 0.015},
+    "claude-3-haiku": {"prompt": 0.00025, "completion": 0.00125},
+    "default": {"prompt": 0.002, "completion": 0.002}
+}
+
+# Rough token estimate used when a provider does not report usage
+CHARS_PER_TOKEN = 4
+
+
+def get_model_pricing(model: Optional[str]) -> Dict[str, float]:
+    """Get pricing for a model, matching dated or suffixed model names by prefix."""
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    if model:
+        matches = [key for key in MODEL_PRICING if model.startswith(key)]
+        if matches:
+            return MODEL_PRICING[max(matches, key=len)]
+    return MODEL_PRICING["default"]
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the cost in USD of an LLM call."""
+    pricing = get_model_pricing(model)
+    return (prompt_tokens / 1000) * pricing["prompt"] + (completion_tokens / 1000) * pricing["completion"]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+class UsageTracker:
+    """Accumulates token usage and cost for one execution and enforces its budget."""
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_tokens = max_tokens or None
+        self.max_cost = max_cost or None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.llm_calls = 0
+        self.estimated = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def exceeded(self) -> Optional[str]:
+        """Describe the exhausted budget, or None while within budget."""
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens:
+            return f"token budget of {self.max_tokens} exhausted ({self.total_tokens} used)"
+        if self.max_cost is not None and self.cost >= self.max_cost:
+            return f"cost budget of ${self.max_cost:.4f} exhausted (${self.cost:.4f} used)"
+        return None
+
+    def check(self):
+        """Raise BudgetExceededError if no further LLM calls are allowed."""
+        reason = self.exceeded()
+        if reason:
+            raise BudgetExceededError(f"Execution budget exceeded: {reason}", usage=self.snapshot())
+
+    def record(
+        self,
+        model: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        estimated: bool = False
+    ):
+        """Record the usage of a completed LLM call."""
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+        self.llm_calls += 1
+        self.estimated = self.estimated or estimated
+
+    def restore(self, snapshot: Optional[Dict[str, Any]]):
+        """Continue accumulating from a previous snapshot of the same execution."""
+        if not snapshot:
+            return
+        self.prompt_tokens = snapshot.get("promptTokens", 0)
+        self.completion_tokens = snapshot.get("completionTokens", 0)
+        self.cost = snapshot.get("cost", 0.0)
+        self.llm_calls = snapshot.get("llmCalls", 0)
+        self.estimated = snapshot.get("estimated", False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the consumed usage and the configured budget."""
+        return {
+            "promptTokens": self.prompt_tokens,
+            "completionTokens": self.completion_tokens,
+            "totalTokens": self.total_tokens,
+            "cost": round(self.cost, 6),
+            "llmCalls": self.llm_calls,
+            "estimated": self.estimated,
+            "budget": {
+                "maxTokens": self.max_tokens,
+                "maxCost": self.max_cost
+            }
+        }
+
+
+class UsageCallbackHandler(AsyncCallbackHandler):
+    """Langchain callback reporting LLM usage to a tracker and refusing calls over budget."""
+
+    raise_error = True
+
+    def __init__(self, tracker: UsageTracker):
+        self.tracker = tracker
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any
+    ) -> None:
+        text = "".join(str(getattr(m, "content", m)) for batch in messages for m in batch)
+        self._start(serialized, text, run_id, kwargs)
+
+    async def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        **kwargs: Any
+    ) -> None:
+        self._start(serialized, "".join(prompts), run_id, kwargs)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, {})
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+        model = llm_output.get("model_name") or llm_output.get("model") or run.get("model")
+
+        prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+        completion_tokens = usage.get("completion_tokens", usage.get("output_tokens"))
+        if prompt_tokens is None or completion_tokens is None:
+            completion_text = "".join(
+                generation.text for generations in response.generations for generation in generations
+            )
+            self.tracker.record(
+                model,
+                run.get("prompt_tokens", 0),
+                estimate_tokens(completion_text),
+                estimated=True
+            )
+        else:
+            self.tracker.record(model, prompt_tokens, completion_tokens)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    def _start(self, serialized: Dict[str, Any], text: str, run_id: UUID, kwargs: Dict[str, Any]):
+        self.tracker.check()
+        params = kwargs.get("invocation_params") or {}
+        model = (
+            params.get("model_name") or params.get("model")
+            or (serialized or {}).get("kwargs", {}).get("model_name")
+            or (serialized or {}).get("kwargs", {}).get("model")
+        )
+        self._runs[run_id] = {"model": model, "prompt_tokens": estimate_tokens(text)}
+
+
+current_usage: ContextVar[Optional[UsageTracker]] = ContextVar("usage_tracker", default=None)
+
+
+@contextmanager
+def usage_scope(tracker: UsageTracker):
+    """Bind a usage tracker to the current execution for the duration of the block."""
+    token = current_usage.set(tracker)
+    try:
+        yield tracker
+    finally:
+        current_usage.reset(token)
+
+
+def usage_callbacks() -> List[UsageCallbackHandler]:
+    """Get callbacks reporting to the current execution's tracker, if any."""
+    tracker = current_usage.get()
+    return [UsageCallbackHandler(tracker)] if tracker else []
@@ -1,81 +1,486 @@
 """Workflow execution engine router."""
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable, AsyncIterator
 from app.models.workflow import Workflow, WorkflowDefinition
 from app.models.engine import WorkflowEngine
 from app.services.agent_service import AgentService
 from app.services.chain_service import ChainService
 from app.services.langgraph_service import LanggraphService
-from app.models.execution import WorkflowExecution, ExecutionStatus
+from app.models.execution import WorkflowExecution, ExecutionStatus, ExecutionLog
+from app.utils.concurrency import run_bounded
+from app.utils.deadline import deadline_scope
+from app.utils.cancellation import CancelScope, cancel_scope
+from app.exceptions import ExecutionCancelledError
+from app.services.usage_tracker import UsageTracker, usage_scope
+from app.services.execution_queue import ExecutionQueue
+from app.services.execution_store import ExecutionStore, get_execution_store, ACTIVE_STATUSES
+from app.services.execution_coalescer import ExecutionCoalescer, compute_execution_fingerprint
+from app.services.result_cache import ExecutionResultCache, get_result_cache, result_cache_ttl
+from app.config import settings
 from datetime import datetime
+import asyncio
+import time
 import uuid
 
 
 class WorkflowExecutor:
     """Router for executing workflows with different engines."""
     
-    def __init__(self):
-        self.agent_service = AgentService()
-        self.chain_service = ChainService()
-        self.langgraph_service = LanggraphService()
-        self._executions: Dict[str, WorkflowExecution] = {}
+    def __init__(
+        self,
+        execution_store: Optional[ExecutionStore] = None,
+        agent_service: Optional[AgentService] = None,
+        chain_service: Optional[ChainService] = None,
+        langgraph_service: Optional[LanggraphService] = None,
+        result_cache: Optional[ExecutionResultCache] = None
+    ):
+        self.agent_service = agent_service or AgentService()
+        self.chain_service = chain_service or ChainService()
+        self.langgraph_service = langgraph_service or LanggraphService()
+        self.execution_store = execution_store if execution_store is not None else get_execution_store()
+        self._cancel_scopes: Dict[str, CancelScope] = {}  # Running executions by id
+        self.coalescer = ExecutionCoalescer(
+            idempotency_ttl_seconds=settings.idempotency_key_ttl_seconds,
+            max_idempotency_keys=settings.idempotency_max_keys
+        )
+        self._fingerprints: Dict[str, str] = {}  # Fingerprints of tracked executions in flight
+        self.result_cache = result_cache if result_cache is not None else get_result_cache()
+        self.execution_queue = ExecutionQueue(
+            workers=settings.execution_workers,
+            max_size=settings.execution_queue_max_size,
+            engine_limits=settings.execution_engine_limits,
+            lanes=settings.execution_lanes
+        )
     
     async def execute_workflow(
         self,
         workflow: Workflow,
         definition: WorkflowDefinition,
-        input_data: Optional[Dict[str, Any]] = None
+        input_data: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None
     ) -> WorkflowExecution:
-        """Execute a workflow using the appropriate engine."""
-        execution_id = str(uuid.uuid4())
+        """Execute a workflow using the appropriate engine.
+        
+        The execution is recorded under ``idempotency_key`` and, when
+        coalescing is enabled, as in flight; see ``find_duplicate``.
+        """
         execution = WorkflowExecution(
-            id=execution_id,
+            id=str(uuid.uuid4()),
             workflowId=workflow.id,
             status=ExecutionStatus.RUNNING,
             startedAt=datetime.now().isoformat(),
             input=input_data or {}
         )
-        self._executions[execution_id] = execution
+        self.execution_store.save(execution)
+        self._track(execution, workflow, definition, input_data, idempotency_key)
+        return await self._run_execution(execution, workflow, definition, input_data)
+    
+    def find_duplicate(
+        self,
+        workflow: Workflow,
+        definition: WorkflowDefinition,
+        input_data: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[WorkflowExecution]:
+        """Get the execution that already answers a request, if any.
         
+        That is the execution started with the same idempotency key or, when
+        coalescing is enabled for the workflow, an identical execution still
+        in flight. Raises IdempotencyKeyConflictError when the key was used
+        for a different definition or input.
+        """
+        coalesce = self._coalesce(definition)
+        if not idempotency_key and not coalesce:
+            return None
+        fingerprint = compute_execution_fingerprint(workflow, definition, input_data)
+        execution_id = self.coalescer.find(workflow.id, fingerprint, idempotency_key, coalesce)
+        return self.get_execution(execution_id) if execution_id else None
+    
+    async def wait_for_execution(self, execution: WorkflowExecution) -> WorkflowExecution:
+        """Wait until a tracked execution (see ``find_duplicate``) finishes."""
+        return await self.coalescer.wait(execution)
+    
+    def submit_workflow(
+        self,
+        workflow: Workflow,
+        definition: WorkflowDefinition,
+        input_data: Optional[Dict[str, Any]] = None,
+        lane: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> WorkflowExecution:
+        """Queue a workflow execution and return it without waiting for it to run.
+        
+        The execution is ``queued`` in a priority lane (the default lane when
+        None) until a worker of the execution queue picks it up. Raises
+        ValueError for unknown lanes and ExecutionQueueFullError when the lane
+        is full.
+        """
+        now = datetime.now().isoformat()
+        execution = WorkflowExecution(
+            id=str(uuid.uuid4()),
+            workflowId=workflow.id,
+            status=ExecutionStatus.QUEUED,
+            startedAt=now,
+            queuedAt=now,
+            input=input_data or {}
+        )
+        
+        async def run():
+            if execution.status != ExecutionStatus.QUEUED:
+                return  # Cancelled while waiting
+            execution.status = ExecutionStatus.RUNNING
+            execution.startedAt = datetime.now().isoformat()
+            await self._run_execution(execution, workflow, definition, input_data)
+        
+        self.execution_queue.submit(
+            execution.id, workflow.engine.value, run, lane, on_drop=lambda: self._drop_queued(execution)
+        )
+        self.execution_store.save(execution)
+        self._track(execution, workflow, definition, input_data, idempotency_key)
+        return execution
+    
+    def _drop_queued(self, execution: WorkflowExecution):
+        """Fail an execution the queue dropped before running it, releasing its waiters."""
+        if execution.status != ExecutionStatus.QUEUED:
+            return
+        self._fail_execution(
+            execution,
+            ExecutionCancelledError("Execution queue shut down before the execution ran", execution_id=execution.id)
+        )
+        self.execution_store.save(execution)
+        self._untrack(execution)
+    
+    def _coalesce(self, definition: WorkflowDefinition) -> bool:
+        """Whether identical executions of a definition attach to one in flight."""
+        return bool((definition.langgraphConfig or {}).get("coalesce", settings.execution_coalescing))
+    
+    def _track(
+        self,
+        execution: WorkflowExecution,
+        workflow: Workflow,
+        definition: WorkflowDefinition,
+        input_data: Optional[Dict[str, Any]],
+        idempotency_key: Optional[str]
+    ):
+        """Register an execution for idempotent replays and coalescing."""
+        coalesce = self._coalesce(definition)
+        if not idempotency_key and not coalesce:
+            return
+        fingerprint = compute_execution_fingerprint(workflow, definition, input_data)
+        self._fingerprints[execution.id] = fingerprint
+        self.coalescer.register(execution.id, workflow.id, fingerprint, idempotency_key, coalesce)
+    
+    def _untrack(self, execution: WorkflowExecution):
+        fingerprint = self._fingerprints.pop(execution.id, None)
+        if fingerprint is not None:
+            self.coalescer.finish(execution, fingerprint)
+    
+    async def _run_execution(
+        self,
+        execution: WorkflowExecution,
+        workflow: Workflow,
+        definition: WorkflowDefinition,
+        input_data: Optional[Dict[str, Any]]
+    ) -> WorkflowExecution:
+        """Run an execution with its engine, deadline and budget, and record the outcome.
+        
+        Definitions that opt in to the result cache are answered from it when
+        an identical execution completed before, without running any node.
+        """
+        cache_ttl = result_cache_ttl(definition)
+        fingerprint = None
+        if cache_ttl:
+            fingerprint = self._fingerprints.get(execution.id) or compute_execution_fingerprint(
+                workflow, definition, input_data
+            )
+            cached = await self.result_cache.lookup(fingerprint)
+            if cached is not None:
+                if self._complete_execution(execution, cached):
+                    execution.cacheHit = True
+                    execution.cachedFrom = cached.get("execution_id")
+                self.execution_store.save(execution)
+                self._untrack(execution)
+                return execution
+        
+        tracker = self._create_usage_tracker(definition)
         try:
-            if workflow.engine == WorkflowEngine.LANGGRAPH:
-                result = await self._execute_langgraph(workflow, definition, input_data)
-            elif workflow.engine == WorkflowEngine.LANGCHAIN:
-                if workflow.workflowType == "agent":
-                    result = await self._execute_agent(workflow, definition, input_data)
-                elif workflow.workflowType == "chain":
-                    result = await self._execute_chain(workflow, definition, input_data)
-                else:
-                    # Default to chain
-                    result = await self._execute_chain(workflow, definition, input_data)
+            with deadline_scope(self._deadline_ms(definition)), usage_scope(tracker):
+                result = await self._run_tracked(
+                    execution,
+                    self._execute_engine(workflow, definition, input_data, execution.id)
+                )
+            if self._complete_execution(execution, result) and fingerprint:
+                self.result_cache.put(fingerprint, workflow.id, {**result, "execution_id": execution.id}, cache_ttl)
+        except Exception as e:
+            self._fail_execution(execution, e)
+        except asyncio.CancelledError:
+            # The task running it was cancelled (the queue shut down): record that before stopping
+            self._fail_execution(
+                execution,
+                ExecutionCancelledError("Execution interrupted before it finished", execution_id=execution.id)
+            )
+            self.execution_store.save(execution)
+            self._untrack(execution)
+            raise
+        
+        execution.usage = tracker.snapshot()
+        self.execution_store.save(execution)  # Refresh its size now that it holds the output
+        self._untrack(execution)
+        return execution
+    
+    async def _run_tracked(self, execution: WorkflowExecution, work: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run an execution's work as a tracked task that ``cancel_execution`` can stop.
+        
+        Raises ExecutionCancelledError when the execution is cancelled.
+        """
+        scope = CancelScope(execution.id)
+        self._cancel_scopes[execution.id] = scope
+        try:
+            with cancel_scope(scope):
+                scope.task = asyncio.create_task(work)
+            try:
+                return await scope.task
+            except asyncio.CancelledError:
+                if not scope.cancelled:
+                    raise  # The caller itself was cancelled
+                raise scope.error() from None
+        finally:
+            self._cancel_scopes.pop(execution.id, None)
+    
+    def cancel_execution(
+        self,
+        execution_id: str,
+        reason: str = "Execution cancelled by user"
+    ) -> Optional[WorkflowExecution]:
+        """Cancel a queued or running execution and stop its in-flight LLM and tool calls.
+        
+        Returns the cancelled execution, or None if it is not queued or not
+        running in this executor.
+        """
+        execution = self.get_execution(execution_id)
+        if execution is None or execution.status not in ACTIVE_STATUSES:
+            return None
+        scope = self._cancel_scopes.get(execution_id)
+        if execution.status == ExecutionStatus.RUNNING and scope is None:
+            return None
+        
+        execution.status = ExecutionStatus.CANCELLED
+        execution.completedAt = datetime.now().isoformat()
+        execution.error = reason
+        execution.duration = self._duration_ms(execution)
+        if scope is not None:
+            scope.cancel(reason)
+        else:
+            self._untrack(execution)  # Cancelled while queued, it will never run
+        self.execution_store.save(execution)
+        return execution
+    
+    async def _execute_engine(
+        self,
+        workflow: Workflow,
+        definition: WorkflowDefinition,
+        input_data: Optional[Dict[str, Any]],
+        execution_id: str
+    ) -> Dict[str, Any]:
+        """Execute a workflow with the engine it is configured for."""
+        if workflow.engine == WorkflowEngine.LANGGRAPH:
+            result = await self._execute_langgraph(workflow, definition, input_data, execution_id)
+        elif workflow.engine == WorkflowEngine.LANGCHAIN:
+            if workflow.workflowType == "agent":
+                result = await self._execute_agent(workflow, definition, input_data)
+            elif workflow.workflowType == "chain":
+                result = await self._execute_chain(workflow, definition, input_data)
             else:
-                # Flowise - would call Flowise API
-                result = await self._execute_flowise(workflow, definition, input_data)
+                # Default to chain
+                result = await self._execute_chain(workflow, definition, input_data)
+        else:
+            # Flowise - would call Flowise API
+            result = await self._execute_flowise(workflow, definition, input_data)
+        return result
+    
+    def _deadline_ms(self, definition: WorkflowDefinition) -> Optional[int]:
+        """Get the end-to-end deadline for executing a workflow definition."""
+        deadline_ms = (definition.langgraphConfig or {}).get("deadlineMs")
+        return deadline_ms or settings.execution_deadline_ms or None
+    
+    def _create_usage_tracker(self, definition: WorkflowDefinition) -> UsageTracker:
+        """Create a usage tracker enforcing the token and cost budget of an execution."""
+        budget = (definition.langgraphConfig or {}).get("budget") or {}
+        return UsageTracker(
+            max_tokens=budget.get("maxTokens") or settings.execution_max_tokens,
+            max_cost=budget.get("maxCost") or settings.execution_max_cost
+        )
+    
+    async def create_runner(
+        self,
+        workflow: Workflow,
+        definition: WorkflowDefinition
+    ) -> Callable[[Any], Awaitable[Dict[str, Any]]]:
+        """Compile a workflow once and return a function executing it on one input."""
+        engine_runner = await self._create_engine_runner(workflow, definition)
+        deadline_ms = self._deadline_ms(definition)
+        
+        async def runner(input_data: Any) -> Dict[str, Any]:
+            tracker = self._create_usage_tracker(definition)
+            with deadline_scope(deadline_ms), usage_scope(tracker):
+                result = await engine_runner(input_data)
+            return {**result, "usage": tracker.snapshot()}
+        return runner
+    
+    async def _create_engine_runner(
+        self,
+        workflow: Workflow,
+        definition: WorkflowDefinition
+    ) -> Callable[[Any], Awaitable[Dict[str, Any]]]:
+        """Build the per-input execution function for the workflow's engine."""
+        if workflow.engine == WorkflowEngine.LANGGRAPH:
+            graph = await self.langgraph_service.create_graph(definition)
             
-            # Update execution
-            execution.status = ExecutionStatus.COMPLETED
-            execution.completedAt = datetime.now().isoformat()
-            execution.output = result.get("output")
-            execution.state = result.get("state")
-            execution.toolCalls = result.get("tool_calls", [])
-            execution.reasoningSteps = result.get("reasoning", [])
+            async def run_graph(input_data: Any) -> Dict[str, Any]:
+                return await self.langgraph_service.execute_graph(
+                    graph,
+                    input_data if input_data is not None else {},
+                    state_schema=definition.stateSchema
+                )
+            return run_graph
+        
+        if workflow.engine == WorkflowEngine.LANGCHAIN:
+            if workflow.workflowType == "agent":
+                if not workflow.agentConfig:
+                    raise ValueError("Agent configuration required for agent workflows")
+                agent = await self.agent_service.create_agent(workflow.agentConfig)
+                
+                async def run_agent(input_data: Any) -> Dict[str, Any]:
+                    return await self.agent_service.execute_agent(agent, str(input_data) if input_data else "")
+                return run_agent
             
-            # Calculate duration
-            start_time = datetime.fromisoformat(execution.startedAt)
-            end_time = datetime.fromisoformat(execution.completedAt)
-            execution.duration = int((end_time - start_time).total_seconds() * 1000)
+            if not workflow.chainConfig:
+                raise ValueError("Chain configuration required for chain workflows")
+            llm_config = workflow.langchainConfig.dict() if workflow.langchainConfig else {}
+            chain = await self.chain_service.create_chain(workflow.chainConfig, llm_config)
             
+            async def run_chain(input_data: Any) -> Dict[str, Any]:
+                return await self.chain_service.execute_chain(chain, input_data or {})
+            return run_chain
+        
+        async def run_flowise(input_data: Any) -> Dict[str, Any]:
+            return await self._execute_flowise(workflow, definition, input_data)
+        return run_flowise
+    
+    async def execute_batch(
+        self,
+        runner: Callable[[Any], Awaitable[Dict[str, Any]]],
+        inputs: Iterable[Any],
+        concurrency: int,
+        engine: str = WorkflowEngine.LANGGRAPH.value,
+        lane: Optional[str] = "batch"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a compiled workflow over many inputs, yielding results as they finish.
+        
+        Items run through the execution queue in ``lane``, so a large batch
+        shares workers fairly with interactive executions. Without the lane
+        (None) items run directly, bounded only by ``concurrency``.
+        """
+        async def run_item(input_data: Any) -> Dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                if lane is None:
+                    result = await runner(input_data)
+                else:
+                    result = await self.execution_queue.run(engine, lambda: runner(input_data), lane)
+            except Exception as e:
+                return {
+                    "status": ExecutionStatus.FAILED.value,
+                    "error": str(e),
+                    "duration": int((time.perf_counter() - started) * 1000)
+                }
+            return {
+                "status": ExecutionStatus.COMPLETED.value,
+                "output": result.get("output"),
+                "usage": result.get("usage"),
+                "duration": int((time.perf_counter() - started) * 1000)
+            }
+        
+        async for index, item_result in run_bounded(inputs, run_item, concurrency):
+            yield {"index": index, **item_result}
+    
+    async def resume_workflow(
+        self,
+        workflow: Workflow,
+        definition: WorkflowDefinition,
+        execution: WorkflowExecution
+    ) -> WorkflowExecution:
+        """Resume a failed Langgraph execution from its last successful node checkpoints."""
+        if workflow.engine != WorkflowEngine.LANGGRAPH:
+            raise ValueError("Only Langgraph executions can be resumed")
+        
+        execution.status = ExecutionStatus.RUNNING
+        execution.completedAt = None
+        execution.error = None
+        
+        # The budget covers the original run and every resume
+        tracker = self._create_usage_tracker(definition)
+        tracker.restore(execution.usage)
+        try:
+            with deadline_scope(self._deadline_ms(definition)), usage_scope(tracker):
+                result = await self._run_tracked(execution, self._resume_langgraph(definition, execution.id))
+            if self._complete_execution(execution, result):
+                execution.logs.append(ExecutionLog(
+                    timestamp=execution.completedAt,
+                    level="info",
+                    message=f"Resumed from checkpoints, reused {len(result.get('replayed_nodes', []))} completed nodes"
+                ))
         except Exception as e:
-            execution.status = ExecutionStatus.FAILED
-            execution.completedAt = datetime.now().isoformat()
-            execution.error = str(e)
+            self._fail_execution(execution, e)
         
+        execution.usage = tracker.snapshot()
+        self.execution_store.save(execution)
         return execution
     
+    async def _resume_langgraph(self, definition: WorkflowDefinition, execution_id: str) -> Dict[str, Any]:
+        graph = await self.langgraph_service.create_graph(definition)
+        return await self.langgraph_service.resume_graph(
+            graph,
+            execution_id,
+            state_schema=definition.stateSchema
+        )
+    
+    def _fail_execution(self, execution: WorkflowExecution, error: Exception):
+        """Mark an execution as failed, unless it was cancelled."""
+        if execution.status == ExecutionStatus.CANCELLED:
+            return
+        execution.status = ExecutionStatus.FAILED
+        execution.completedAt = datetime.now().isoformat()
+        execution.error = str(error)
+    
+    @staticmethod
+    def _duration_ms(execution: WorkflowExecution) -> int:
+        start_time = datetime.fromisoformat(execution.startedAt)
+        end_time = datetime.fromisoformat(execution.completedAt)
+        return int((end_time - start_time).total_seconds() * 1000)
+    
+    def _complete_execution(self, execution: WorkflowExecution, result: Dict[str, Any]) -> bool:
+        """Mark an execution as completed with the engine result.
+        
+        Returns False, leaving it unchanged, if it was cancelled meanwhile.
+        """
+        if execution.status == ExecutionStatus.CANCELLED:
+            return False
+        execution.status = ExecutionStatus.COMPLETED
+        execution.completedAt = datetime.now().isoformat()
+        execution.output = result.get("output")
+        execution.state = result.get("state")
+        execution.toolCalls = result.get("tool_calls", [])
+        execution.reasoningSteps = result.get("reasoning", [])
+        
+        execution.duration = self._duration_ms(execution)
+        return True
+    
     async def _execute_langgraph(
         self,
         workflow: Workflow,
         definition: WorkflowDefinition,
-        input_data: Optional[Dict[str, Any]]
+        input_data: Optional[Dict[str, Any]],
+        execution_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Execute Langgraph workflow."""
         graph = await self.langgraph_service.create_graph(definition)
@@ -84,7 +489,7 @@ class WorkflowExecutor:
             input_data or {},
             state_schema=definition.stateSchema,
             enable_checkpointing=True,
-            execution_id=execution.id if hasattr(self, '_current_execution') else None
+            execution_id=execution_id
         )
         return result
     
@@ -143,15 +548,9 @@ class WorkflowExecutor:
     
     def get_execution(self, execution_id: str) -> Optional[WorkflowExecution]:
         """Get execution by ID."""
-        return self._executions.get(execution_id)
+        return self.execution_store.get(execution_id)
     
     def get_executions(self, workflow_id: str, limit: int = 10) -> list[WorkflowExecution]:
-        """Get executions for a workflow."""
-        executions = [
-            exec for exec in self._executions.values()
-            if exec.workflowId == workflow_id
-        ]
-        # Sort by startedAt descending
-        executions.sort(key=lambda x: x.startedAt, reverse=True)
-        return executions[:limit]
+        """Get the latest executions of a workflow, newest first."""
+        return self.execution_store.latest(workflow_id, limit)
 
@@ -0,0 +1,118 @@
+"""Cancellation scopes that stop an execution's in-flight work.
+
+An execution runs as a tracked asyncio task inside a ``CancelScope``. The
+scope is bound with ``cancel_scope`` and, like the deadline, reaches
+everything the execution awaits through a context variable, including tasks
+and threads it spawns. ``CancelScope.cancel`` cancels the execution task and
+every call wrapped in ``run_cancellable`` (LLM calls, MCP tool requests), and
+wakes up ``cancellable_sleep``, so the work stops at its current await
+instead of at the next node boundary.
+"""
+from typing import Any, Awaitable, Optional, Set
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.exceptions import ExecutionCancelledError
+import asyncio
+import inspect
+import threading
+import time
+
+
+class CancelScope:
+    """Cancellation state of one execution and the tasks doing its work."""
+
+    def __init__(self, execution_id: Optional[str] = None):
+        self.execution_id = execution_id
+        self.task: Optional[asyncio.Task] = None  # The execution task, cancelled with the scope
+        self.reason = "Execution cancelled"
+        self._cancelled = threading.Event()  # Also wakes synchronous code waiting in threads
+        self._children: Set[asyncio.Future] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: Optional[str] = None):
+        """Cancel the execution task and its in-flight calls."""
+        if self.cancelled:
+            return
+        self.reason = reason or self.reason
+        self._cancelled.set()
+        for child in list(self._children):
+            child.cancel()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    def error(self) -> ExecutionCancelledError:
+        return ExecutionCancelledError(self.reason, execution_id=self.execution_id)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise self.error()
+
+    def wait(self, timeout: float) -> bool:
+        """Block the calling thread up to ``timeout`` seconds; True if cancelled meanwhile."""
+        return self._cancelled.wait(timeout)
+
+
+current_cancel_scope: ContextVar[Optional[CancelScope]] = ContextVar("cancel_scope", default=None)
+
+
+@contextmanager
+def cancel_scope(scope: CancelScope):
+    """Bind a cancellation scope for the duration of the block."""
+    token = current_cancel_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        current_cancel_scope.reset(token)
+
+
+def raise_if_cancelled():
+    """Raise ExecutionCancelledError if the current execution was cancelled."""
+    scope = current_cancel_scope.get()
+    if scope is not None:
+        scope.raise_if_cancelled()
+
+
+async def run_cancellable(awaitable: Awaitable[Any]) -> Any:
+    """Await a call that the current scope can cancel, wherever it runs.
+
+    Raises ExecutionCancelledError when the scope is cancelled before or
+    during the call. Cancellation of the awaiting task itself propagates as
+    usual.
+    """
+    scope = current_cancel_scope.get()
+    if scope is None:
+        return await awaitable
+    if scope.cancelled:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise scope.error()
+
+    future = asyncio.ensure_future(awaitable)
+    scope._children.add(future)
+    try:
+        return await future
+    except asyncio.CancelledError:
+        current = asyncio.current_task()
+        if scope.cancelled and not (current and current.cancelling()):
+            raise scope.error() from None
+        raise
+    finally:
+        scope._children.discard(future)
+
+
+async def cancellable_sleep(delay: float):
+    """Sleep that ends early with ExecutionCancelledError when the scope is cancelled."""
+    await run_cancellable(asyncio.sleep(delay))
+
+
+def cancellable_sleep_sync(delay: float):
+    """Blocking sleep for threads that ends early when the scope is cancelled."""
+    scope = current_cancel_scope.get()
+    if scope is None:
+        time.sleep(delay)
+        return
+    if scope.wait(delay):
+        raise scope.error()
@@ -0,0 +1,200 @@
+"""Columnar execution of list transforms over large lists of records.
+
+A ``ColumnarBatch`` views a list of dicts column by column. A column is
+extracted from the records the first time an operation needs it, and filters
+narrow a selection of row indices instead of copying records. Records or plain
+values are produced once, when the batch is converted back at the end of the
+columnar steps.
+
+With NumPy installed, columns are object arrays: comparisons run element-wise
+in C with Python equality semantics and selections are index arrays. Without
+it, the same operations run over lists with ``map``/``itertools.compress``.
+Reductions use Python's builtins on the selected values, so results are
+identical to the row-by-row transforms.
+"""
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from itertools import compress, repeat
+from operator import eq, itemgetter
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Transform types with a columnar implementation; terminal ones end the columnar steps
+COLUMNAR_TRANSFORMS = ("filter", "slice", "map", "project", "length", "aggregate")
+TERMINAL_TRANSFORMS = ("map", "project", "length", "aggregate")
+
+AGGREGATE_OPERATIONS = ("count", "sum", "mean", "min", "max")
+
+# Values numpy compares element-wise rather than broadcasting over
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+class ColumnarBatch:
+    """A list of dict records viewed as lazily extracted columns and a row selection."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.selection = None  # None selects every row
+        self._columns: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.records) if self.selection is None else len(self.selection)
+
+    def column(self, field: str) -> Any:
+        """Get the full-length column for a field (None where a record lacks it).
+
+        Raises AttributeError if a record is not a dict.
+        """
+        if field not in self._columns:
+            self._columns[field] = _to_array(_extract(self.records, field))
+        return self._columns[field]
+
+    def selected(self, field: str) -> Any:
+        """Get the column for a field restricted to the selected rows."""
+        if self.selection is None:
+            return self.column(field)
+        if field not in self._columns:
+            # Only read the field from the rows still selected
+            return _to_array(_extract(self._selected_records(), field))
+        column = self._columns[field]
+        if np is not None:
+            return column[self.selection]
+        return list(map(column.__getitem__, self.selection))
+
+    def filter_equals(self, field: str, value: Any):
+        """Keep the selected rows whose field equals the value."""
+        values = self.selected(field)
+        if np is not None:
+            if isinstance(value, _SCALAR_TYPES):
+                mask = values == value
+            else:
+                mask = np.fromiter(map(eq, values, repeat(value)), dtype=bool, count=len(values))
+            self.selection = np.flatnonzero(mask) if self.selection is None else self.selection[mask]
+        else:
+            rows = self.selection if self.selection is not None else range(len(self.records))
+            self.selection = list(compress(rows, map(eq, values, repeat(value))))
+
+    def slice(self, start: Optional[int], end: Optional[int]):
+        """Keep a slice of the selected rows."""
+        if self.selection is None:
+            self.selection = np.arange(len(self.records)) if np is not None else list(range(len(self.records)))
+        self.selection = self.selection[start:end]
+
+    def values(self, field: str) -> List[Any]:
+        """Get the field of each selected row."""
+        values = self.selected(field)
+        return values.tolist() if np is not None else list(values)
+
+    def project(self, fields: List[str]) -> List[Dict[str, Any]]:
+        """Build records holding only the given fields of each selected row."""
+        if not fields:
+            return [{} for _ in range(len(self))]
+        columns = [self.values(field) for field in fields]
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+    def aggregate(self, field: str, operation: str) -> Any:
+        """Reduce the field over the selected rows, ignoring missing values."""
+        return aggregate_values(self.values(field), operation)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Get the selected records."""
+        if self.selection is None:
+            return list(self.records)
+        return self._selected_records()
+
+    def _selected_records(self) -> List[Dict[str, Any]]:
+        rows = self.selection.tolist() if np is not None else self.selection
+        return list(map(self.records.__getitem__, rows))
+
+
+def aggregate_values(values: List[Any], operation: str) -> Any:
+    """Reduce a list of values, ignoring None."""
+    values = [value for value in values if value is not None]
+    if operation == "count":
+        return len(values)
+    if operation == "sum":
+        return sum(values)
+    if not values:
+        return None
+    if operation == "mean":
+        return sum(values) / len(values)
+    return min(values) if operation == "min" else max(values)
+
+
+def supports_columnar(transform_type: str, config: Dict[str, Any]) -> bool:
+    """Whether a transform step has a columnar implementation for its config."""
+    if transform_type not in COLUMNAR_TRANSFORMS:
+        return False
+    if transform_type in ("filter", "map"):
+        return bool(config.get("field")) and not config.get("path") and not config.get("where")
+    if transform_type == "aggregate":
+        return bool(config.get("field"))
+    return True
+
+
+def compile_columnar(
+    steps: List[Tuple[str, Dict[str, Any]]],
+    fallback: Callable[[Any], Any]
+) -> Callable[[Any], Any]:
+    """Compile supported steps into a function running them on a ColumnarBatch.
+
+    Only the last step may be terminal. Inputs that are not lists of dicts are
+    handed to ``fallback``, the row-by-row version of the same steps.
+    """
+    operations = [_operation(transform_type, config) for transform_type, config in steps]
+    terminal = steps[-1][0] in TERMINAL_TRANSFORMS
+
+    def run_columnar(input_data: Any) -> Any:
+        if not isinstance(input_data, list):
+            return fallback(input_data)
+        batch = ColumnarBatch(input_data)
+        try:
+            result = None
+            for operation in operations:
+                result = operation(batch)
+        except AttributeError:
+            # Some items are not records, so the row-by-row semantics apply
+            return fallback(input_data)
+        return result if terminal else batch.to_records()
+
+    return run_columnar
+
+
+def _operation(transform_type: str, config: Dict[str, Any]) -> Callable[[ColumnarBatch], Any]:
+    if transform_type == "filter":
+        field, value = config["field"], config.get("value")
+        return lambda batch: batch.filter_equals(field, value)
+    if transform_type == "slice":
+        start, end = config.get("start", 0), config.get("end")
+        return lambda batch: batch.slice(start, end)
+    if transform_type == "map":
+        field = config["field"]
+        return lambda batch: batch.values(field)
+    if transform_type == "project":
+        fields = list(config.get("fields") or [])
+        return lambda batch: batch.project(fields)
+    if transform_type == "length":
+        return len
+    field, operation = config["field"], config.get("operation", "count")
+    return lambda batch: batch.aggregate(field, operation)
+
+
+def _extract(records: List[Any], field: str) -> List[Any]:
+    try:
+        return list(map(itemgetter(field), records))
+    except (KeyError, TypeError):
+        # Missing keys read as None; non-dict items raise AttributeError here
+        return [record.get(field) for record in records]
+
+
+def _to_array(values: List[Any]) -> Any:
+    if np is None:
+        return values
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
@@ -0,0 +1,50 @@
+"""Concurrency helpers for running many async jobs with a bounded worker pool."""
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Tuple, Union
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def run_bounded(
+    items: Iterable[Any],
+    func: Callable[[Any], Awaitable[Any]],
+    limit: int
+) -> AsyncIterator[Tuple[int, Union[Any, BaseException]]]:
+    """Run ``func`` over items with at most ``limit`` calls in flight.
+
+    Yields ``(index, result)`` pairs in completion order. Exceptions raised by
+    ``func`` are yielded in place of the result rather than aborting the other
+    items. Only ``limit`` worker tasks exist at any time, so large inputs do not
+    create a task per item up front. Closing the iterator cancels the workers.
+    """
+    pending = iter(enumerate(items))
+    results: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def worker():
+        try:
+            for index, item in pending:
+                try:
+                    result = await func(item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result = e
+                await results.put((index, result))
+        finally:
+            await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, limit))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            entry = await results.get()
+            if entry is done:
+                remaining -= 1
+                continue
+            yield entry
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,113 @@
+"""Execution deadlines propagated to nodes, tool calls and retry loops.
+
+A deadline is bound to the running task with ``deadline_scope`` and is visible
+to everything the execution awaits (graph nodes, LLM calls, MCP tool requests,
+retry loops) through a context variable, so callers don't need to thread it
+through every signature.
+"""
+from typing import Any, Awaitable, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.exceptions import ExecutionTimeoutError
+import asyncio
+import inspect
+import time
+
+
+class Deadline:
+    """Absolute point in time by which an execution must finish."""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("execution_deadline", default=None)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left on the current deadline, or None if there is none."""
+    deadline = current_deadline.get()
+    return deadline.remaining() if deadline else None
+
+
+@contextmanager
+def deadline_scope(timeout_ms: Optional[float]):
+    """Bind a deadline for the duration of the block.
+
+    Nested scopes never extend an outer deadline; the earlier one wins. A
+    missing or non-positive timeout leaves the current deadline unchanged.
+    """
+    outer = current_deadline.get()
+    if not timeout_ms or timeout_ms <= 0:
+        yield outer
+        return
+
+    deadline = Deadline(timeout_ms / 1000)
+    if outer and outer.expires_at <= deadline.expires_at:
+        deadline = outer
+
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def effective_timeout(timeout: Optional[float] = None) -> Optional[float]:
+    """Combine a local timeout (seconds) with the remaining deadline budget."""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
+
+
+async def run_with_timeout(
+    awaitable: Awaitable[Any],
+    timeout: Optional[float] = None,
+    node_id: Optional[str] = None
+) -> Any:
+    """Await with the local timeout (seconds) and the current deadline applied."""
+    limit = effective_timeout(timeout)
+    if limit is None:
+        return await awaitable
+
+    deadline_bound = timeout is None or limit < timeout
+    if limit <= 0:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise _timeout_error(node_id, timeout, deadline_bound)
+
+    try:
+        return await asyncio.wait_for(awaitable, limit)
+    except asyncio.TimeoutError:
+        raise _timeout_error(node_id, timeout, deadline_bound)
+
+
+def _timeout_error(node_id: Optional[str], timeout: Optional[float], deadline_bound: bool) -> ExecutionTimeoutError:
+    timeout_ms = int(timeout * 1000) if timeout is not None else None
+    if deadline_bound:
+        deadline = current_deadline.get()
+        message = "Execution deadline exceeded"
+        if node_id:
+            message += f" while running node {node_id}"
+        return ExecutionTimeoutError(
+            message,
+            node_id=node_id,
+            timeout_ms=int(deadline.timeout * 1000) if deadline else timeout_ms
+        )
+    return ExecutionTimeoutError(
+        f"Node {node_id} timed out after {timeout_ms}ms" if node_id else f"Timed out after {timeout_ms}ms",
+        node_id=node_id,
+        timeout_ms=timeout_ms
+    )
@@ -1,4 +1,5 @@
 """Engine router for workflow execution."""
+from typing import Optional
 from app.models.engine import WorkflowEngine
 from app.models.workflow import Workflow
 from app.services.workflow_executor import WorkflowExecutor
@@ -7,8 +8,8 @@ from app.services.workflow_executor import WorkflowExecutor
 class EngineRouter:
     """Router for selecting and executing workflows with different engines."""
     
-    def __init__(self):
-        self.executor = WorkflowExecutor()
+    def __init__(self, executor: Optional[WorkflowExecutor] = None):
+        self.executor = executor or WorkflowExecutor()
     
     async def route_execution(
         self,
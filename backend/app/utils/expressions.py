@@ -0,0 +1,157 @@
+"""Safe predicate expressions evaluated against workflow state."""
+from typing import Dict, Any, Callable
+import ast
+import logging
+
+logger = logging.getLogger(__name__)
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.Name, ast.Load, ast.Constant, ast.Attribute, ast.Subscript, ast.Slice,
+    ast.List, ast.Tuple, ast.Call, ast.IfExp
+)
+
+_FUNCTIONS: Dict[str, Callable] = {
+    "len": len,
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "lower": lambda value: str(value).lower(),
+    "upper": lambda value: str(value).upper()
+}
+
+
+def _get(value: Any, key: Any) -> Any:
+    """Null-safe lookup used for attribute and subscript access."""
+    if isinstance(value, dict):
+        return value.get(key)
+    if isinstance(value, (list, tuple, str)) and isinstance(key, (int, slice)):
+        try:
+            return value[key]
+        except IndexError:
+            return None
+    return None
+
+
+def _mul(left: Any, right: Any) -> Any:
+    """Multiplication that refuses to repeat strings and sequences (``"a" * 10**9``)."""
+    if isinstance(left, (str, bytes, list, tuple)) or isinstance(right, (str, bytes, list, tuple)):
+        raise TypeError("Repeating strings or sequences is not supported in expressions")
+    return left * right
+
+
+_HELPERS: Dict[str, Callable] = {"_get": _get, "_mul": _mul}
+
+
+class _StateNamespace(dict):
+    """Name lookup that resolves functions, then state keys, else None."""
+
+    def __init__(self, state: Dict[str, Any]):
+        super().__init__()
+        self.state = state
+
+    def __getitem__(self, name: str) -> Any:
+        if name in _HELPERS:
+            return _HELPERS[name]
+        if name in _FUNCTIONS:
+            return _FUNCTIONS[name]
+        if name == "state":
+            return self.state
+        return self.state.get(name)
+
+
+class _AccessRewriter(ast.NodeTransformer):
+    """Rewrite ``a.b`` and ``a[b]`` into null-safe ``_get`` calls, and ``a * b`` into ``_mul`` calls."""
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Mult):
+            return node
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id="_mul", ctx=ast.Load()),
+                args=[node.left, node.right],
+                keywords=[]
+            ),
+            node
+        )
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        self.generic_visit(node)
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id="_get", ctx=ast.Load()),
+                args=[node.value, ast.Constant(value=node.attr)],
+                keywords=[]
+            ),
+            node
+        )
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.AST:
+        self.generic_visit(node)
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id="_get", ctx=ast.Load()),
+                args=[node.value, node.slice],
+                keywords=[]
+            ),
+            node
+        )
+
+
+def _validate(tree: ast.AST, expression: str):
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(
+                f"Unsupported syntax '{type(node).__name__}' in expression: {expression}"
+            )
+        if isinstance(node, ast.Name) and node.id.startswith("_"):
+            raise ValueError(f"Invalid name '{node.id}' in expression: {expression}")
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise ValueError(f"Invalid attribute '{node.attr}' in expression: {expression}")
+        if isinstance(node, ast.Call) and (
+            not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords
+        ):
+            raise ValueError(f"Unsupported function call in expression: {expression}")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult) and any(
+            isinstance(operand, (ast.List, ast.Tuple))
+            or (isinstance(operand, ast.Constant) and isinstance(operand.value, (str, bytes)))
+            for operand in (node.left, node.right)
+        ):
+            raise ValueError(f"Repeating strings or sequences is not supported in expression: {expression}")
+
+
+def compile_predicate(expression: str, log_failures: bool = True) -> Callable[[Dict[str, Any]], bool]:
+    """Compile a predicate expression into a callable taking the workflow state.
+
+    Expressions use a small Python subset: comparisons, boolean logic, arithmetic,
+    ``in``, literals and dotted/indexed access into state (``output.score > 0.5``,
+    ``"error" in lower(output)``). Missing keys evaluate to ``None``. An
+    expression that fails to evaluate (e.g. ``None > 1``) is false, and so is
+    one repeating a string or list with ``*``, which could allocate without bound.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression '{expression}': {e.msg}")
+
+    _validate(tree, expression)
+    tree = ast.fix_missing_locations(_AccessRewriter().visit(tree))
+    code = compile(tree, f"<predicate: {expression}>", "eval")
+
+    def predicate(state: Dict[str, Any]) -> bool:
+        try:
+            return bool(eval(code, {"__builtins__": {}}, _StateNamespace(state)))
+        except Exception as e:
+            if log_failures:
+                logger.warning(f"Predicate '{expression}' failed, treating as false: {str(e)}")
+            return False
+
+    return predicate
@@ -0,0 +1,25 @@
+"""Content-addressed cache for compiled workflow graphs."""
+from app.models.workflow import WorkflowDefinition
+from app.utils.lru_cache import LRUCache
+import hashlib
+import json
+
+
+def compute_definition_hash(definition: WorkflowDefinition) -> str:
+    """Compute a canonical hash of a workflow definition.
+
+    Layout-only fields (viewport, node positions) are excluded so that moving
+    nodes around in the editor does not change the hash.
+    """
+    data = definition.model_dump(
+        mode="json",
+        exclude={"viewport": True, "nodes": {"__all__": {"position"}}}
+    )
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class GraphCache(LRUCache):
+    """Size-bounded LRU cache for compiled graphs keyed by definition hash."""
+
+    item = "compiled graph"
@@ -0,0 +1,195 @@
+"""Static optimization of converted Langgraph workflow configurations.
+
+Runs between ``WorkflowConverter.convert_to_langgraph`` and ``StateGraph``
+construction. Each pass only rewrites the graph where the result is observably
+equivalent: the same nodes do the same work on the same inputs, except that
+passthrough nodes no longer stamp their id into ``node_id``.
+"""
+from typing import Dict, Any, List, Callable, Iterable, Tuple
+from app.utils.graph_planner import END_TARGETS, find_entry_node
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Node types that keep their own graph step even when they do no work
+PROTECTED_TYPES = ("condition",)
+
+
+def optimize_graph(
+    graph_config: Dict[str, Any],
+    is_passthrough: Callable[[Dict[str, Any]], bool],
+    protected_types: Iterable[str] = PROTECTED_TYPES
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Prune unreachable nodes, collapse passthroughs and fuse adjacent transforms.
+
+    Returns the optimized graph configuration (the input is not modified) and a
+    report of what changed.
+    """
+    nodes = [dict(node) for node in graph_config["nodes"]]
+    edges = [dict(edge) for edge in graph_config["edges"]]
+    protected_types = set(protected_types)
+    report = {
+        "nodesBefore": len(nodes),
+        "nodesAfter": len(nodes),
+        "prunedNodes": [],
+        "collapsedNodes": [],
+        "fusedNodes": {}
+    }
+
+    entry = find_entry_node(nodes)
+    if entry is None:
+        return {**graph_config, "nodes": nodes, "edges": edges}, report
+
+    report["prunedNodes"] = _prune_unreachable(nodes, edges, entry)
+    report["collapsedNodes"] = _collapse_passthroughs(nodes, edges, entry, is_passthrough, protected_types)
+    report["fusedNodes"] = _fuse_transforms(nodes, edges, entry)
+    report["nodesAfter"] = len(nodes)
+
+    if report["nodesAfter"] != report["nodesBefore"]:
+        logger.info(
+            f"Optimized graph from {report['nodesBefore']} to {report['nodesAfter']} nodes: "
+            f"pruned {report['prunedNodes']}, collapsed {report['collapsedNodes']}, "
+            f"fused {report['fusedNodes']}"
+        )
+    return {**graph_config, "nodes": nodes, "edges": edges}, report
+
+
+def _remove_nodes(nodes: List[Dict[str, Any]], node_ids: set):
+    nodes[:] = [node for node in nodes if node["id"] not in node_ids]
+
+
+def _prune_unreachable(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], entry: str) -> List[str]:
+    """Remove nodes that cannot be reached from the entry node."""
+    successors: Dict[str, List[str]] = {}
+    for edge in edges:
+        successors.setdefault(edge["source"], []).append(edge["target"])
+
+    reachable = {entry}
+    frontier = [entry]
+    while frontier:
+        for target in successors.get(frontier.pop(), []):
+            if target not in reachable and target not in END_TARGETS:
+                reachable.add(target)
+                frontier.append(target)
+
+    pruned = [node["id"] for node in nodes if node["id"] not in reachable]
+    if pruned:
+        _remove_nodes(nodes, set(pruned))
+        edges[:] = [edge for edge in edges if edge["source"] in reachable]
+    return pruned
+
+
+def _collapse_passthroughs(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    entry: str,
+    is_passthrough: Callable[[Dict[str, Any]], bool],
+    protected_types: set
+) -> List[str]:
+    """Splice out passthrough nodes that sit on a single, unbranched path."""
+    node_types = {node["id"]: node.get("type") for node in nodes}
+    collapsed = []
+
+    for node in list(nodes):
+        node_id = node["id"]
+        if node_id == entry or node.get("type") in protected_types or not is_passthrough(node):
+            continue
+
+        in_edges = [edge for edge in edges if edge["target"] == node_id]
+        out_edges = [edge for edge in edges if edge["source"] == node_id]
+        if len(in_edges) != 1 or len(out_edges) > 1:
+            continue
+
+        in_edge = in_edges[0]
+        predecessor = in_edge["source"]
+        routes = node_types.get(predecessor) in protected_types
+        # Removing a branch of a fan-out would change what its join receives
+        if not routes and sum(1 for edge in edges if edge["source"] == predecessor) != 1:
+            continue
+
+        target = out_edges[0]["target"] if out_edges else None
+        if target == predecessor:
+            continue
+
+        if target is not None:
+            in_edge["target"] = target
+        elif routes:
+            # The condition route now ends the graph where the passthrough did
+            in_edge["target"] = "END"
+        else:
+            edges.remove(in_edge)
+        for edge in out_edges:
+            edges.remove(edge)
+
+        _remove_nodes(nodes, {node_id})
+        collapsed.append(node_id)
+
+    return collapsed
+
+
+def _transform_steps(node: Dict[str, Any]) -> List[Any]:
+    transform = (node.get("config") or {}).get("transform")
+    config = (transform.get("config") or {}) if isinstance(transform, dict) else {}
+    # Pipelines with options of their own (e.g. columnar) stay a single nested step
+    if isinstance(transform, dict) and transform.get("type") == "pipeline" and set(config) <= {"steps"}:
+        return list(config.get("steps") or [])
+    return [transform] if transform else []
+
+
+def _is_fusible_transform(node: Dict[str, Any]) -> bool:
+    config = node.get("config") or {}
+    # Timed and sandboxed nodes keep their own timeout, so they run on their own
+    return (
+        node.get("type") == "transform"
+        and bool(_transform_steps(node))
+        and "timeoutMs" not in config
+        and not config.get("sandbox")
+        and not callable(config.get("transform"))
+    )
+
+
+def _fuse_transforms(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], entry: str) -> Dict[str, List[str]]:
+    """Merge chains of transform nodes into one ``pipeline`` transform node.
+
+    The fused node keeps the id of the last node in the chain, so downstream
+    consumers (``node_id``, ``branch_outputs``) see the same id as before.
+    """
+    fused: Dict[str, List[str]] = {}
+
+    changed = True
+    while changed:
+        changed = False
+        by_id = {node["id"]: node for node in nodes}
+        for node in nodes:
+            if node["id"] == entry or not _is_fusible_transform(node):
+                continue
+            out_edges = [edge for edge in edges if edge["source"] == node["id"]]
+            if len(out_edges) != 1 or out_edges[0]["target"] not in by_id:
+                continue
+
+            successor = by_id[out_edges[0]["target"]]
+            if (
+                successor["id"] == node["id"]
+                or not _is_fusible_transform(successor)
+                or bool(node["config"].get("streaming")) != bool(successor["config"].get("streaming"))
+                or sum(1 for edge in edges if edge["target"] == successor["id"]) != 1
+            ):
+                continue
+
+            steps = _transform_steps(node) + _transform_steps(successor)
+            successor["config"] = {
+                **(successor.get("config") or {}),
+                "transform": {"type": "pipeline", "config": {"steps": steps}}
+            }
+
+            edges.remove(out_edges[0])
+            for edge in edges:
+                if edge["target"] == node["id"]:
+                    edge["target"] = successor["id"]
+
+            fused[successor["id"]] = fused.pop(node["id"], [node["id"]]) + fused.pop(successor["id"], [successor["id"]])
+            _remove_nodes(nodes, {node["id"]})
+            changed = True
+            break
+
+    return fused
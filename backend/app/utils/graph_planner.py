@@ -0,0 +1,190 @@
+"""Topology analysis for compiling LangGraph workflows."""
+from typing import Dict, Any, List, Optional, Iterable, Callable, Tuple
+from app.exceptions import GraphCompilationError
+from app.utils.expressions import compile_predicate
+
+END_TARGETS = ("END", "__end__")
+DEFAULT_HANDLES = (None, "", "default", "else")
+
+
+class ParallelRegion:
+    """A fan-out node, the independent branches it starts and their join node."""
+
+    def __init__(self, source: str, branches: List[List[str]], join: Optional[str]):
+        self.source = source
+        self.branches = branches
+        self.join = join
+
+    @property
+    def node_id(self) -> str:
+        """Id of the graph node that runs the branches."""
+        return f"{self.source}__parallel"
+
+    @property
+    def members(self) -> List[str]:
+        """Ids of all nodes executed inside the branches."""
+        return [node_id for branch in self.branches for node_id in branch]
+
+
+def find_entry_node(nodes: List[Dict[str, Any]]) -> Optional[str]:
+    """Get the id of the graph entry point: the first input node, else the first node."""
+    for node in nodes:
+        if node.get("type") == "input":
+            return node["id"]
+    return nodes[0]["id"] if nodes else None
+
+
+def build_adjacency(node_ids: Iterable[str], edges: List[Dict[str, Any]]):
+    """Build outgoing and incoming adjacency lists, ignoring edges to END."""
+    outgoing: Dict[str, List[str]] = {node_id: [] for node_id in node_ids}
+    incoming: Dict[str, List[str]] = {node_id: [] for node_id in outgoing}
+    for edge in edges:
+        source, target = edge["source"], edge["target"]
+        if target in END_TARGETS:
+            continue
+        if source not in outgoing or target not in incoming:
+            raise GraphCompilationError(
+                f"Edge {source} -> {target} references an unknown node",
+                node_id=source if source not in outgoing else target
+            )
+        if target not in outgoing[source]:
+            outgoing[source].append(target)
+            incoming[target].append(source)
+    return outgoing, incoming
+
+
+def find_parallel_regions(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    exclude_types: Iterable[str] = ()
+) -> List[ParallelRegion]:
+    """Find fan-out nodes whose successors can run concurrently.
+
+    Each successor of a fan-out node must start a linear branch. All branches
+    either meet at a single join node that has no other predecessors, or all
+    of them end the graph.
+    """
+    exclude_types = set(exclude_types)
+    outgoing, incoming = build_adjacency([n["id"] for n in nodes], edges)
+    node_types = {n["id"]: n.get("type") for n in nodes}
+
+    regions = []
+    claimed = set()
+    for node in nodes:
+        source = node["id"]
+        if len(outgoing[source]) < 2 or node_types[source] in exclude_types:
+            continue
+
+        branches = []
+        joins = set()
+        tails = set()
+        for successor in outgoing[source]:
+            branch = []
+            current = successor
+            join = None
+            while True:
+                if len(incoming[current]) > 1:
+                    join = current
+                    break
+                if len(outgoing[current]) > 1:
+                    raise GraphCompilationError(
+                        f"Nested fan-out at node {current} is not supported inside "
+                        f"the parallel branches of node {source}",
+                        node_id=current
+                    )
+                branch.append(current)
+                if not outgoing[current]:
+                    break
+                current = outgoing[current][0]
+            branches.append(branch)
+            joins.add(join)
+            tails.add(branch[-1] if branch else source)
+
+        if len(joins) != 1:
+            raise GraphCompilationError(
+                f"Parallel branches of node {source} must all meet at the same join node",
+                node_id=source
+            )
+        join = joins.pop()
+        if join is not None and set(incoming[join]) != tails:
+            raise GraphCompilationError(
+                f"Join node {join} has predecessors outside the branches of node {source}",
+                node_id=join
+            )
+
+        region = ParallelRegion(source, branches, join)
+        overlap = claimed.intersection(region.members)
+        if overlap:
+            raise GraphCompilationError(
+                f"Node {sorted(overlap)[0]} belongs to more than one parallel region",
+                node_id=sorted(overlap)[0]
+            )
+        claimed.update(region.members)
+        regions.append(region)
+
+    return regions
+
+
+def compile_condition_routes(
+    node_config: Dict[str, Any],
+    edges: List[Dict[str, Any]]
+) -> Tuple[Callable[[Dict[str, Any]], str], Dict[str, str]]:
+    """Compile the outgoing edges of a condition node into a router.
+
+    Each edge's ``sourceHandle`` selects when it is taken: ``"true"``/``"false"``
+    test the node's ``condition`` expression, ``"default"``/``"else"`` (or no
+    handle) is the fallback, and any other handle is itself a predicate
+    expression. Edges are tested in order and the first match wins. When
+    nothing matches and there is no fallback, the graph ends.
+
+    Returns the router callable and the mapping from its results to targets.
+    """
+    node_id = node_config["id"]
+    condition = (node_config.get("config") or {}).get("condition")
+
+    def compile_expression(expression: str):
+        try:
+            return compile_predicate(expression)
+        except ValueError as e:
+            raise GraphCompilationError(str(e), node_id=node_id, context={"expression": expression})
+
+    node_predicate = compile_expression(condition) if condition else None
+
+    routes: List[Tuple[str, Callable[[Dict[str, Any]], bool]]] = []
+    mapping: Dict[str, str] = {}
+    default_key = None
+    for index, edge in enumerate(edges):
+        key = f"branch_{index}"
+        target = edge["target"]
+        mapping[key] = "__end__" if target in END_TARGETS else target
+        handle = edge.get("source_handle")
+
+        if handle in DEFAULT_HANDLES:
+            if default_key is None:
+                default_key = key
+            continue
+
+        if handle in ("true", "false"):
+            if node_predicate is None:
+                raise GraphCompilationError(
+                    f"Condition node {node_id} uses '{handle}' handles but has no condition expression",
+                    node_id=node_id
+                )
+            predicate = node_predicate
+            if handle == "false":
+                predicate = (lambda p: lambda state: not p(state))(node_predicate)
+        else:
+            predicate = compile_expression(handle)
+        routes.append((key, predicate))
+
+    if default_key is None:
+        default_key = "__default__"
+        mapping[default_key] = "__end__"
+
+    def router(state: Dict[str, Any]) -> str:
+        for key, predicate in routes:
+            if predicate(state):
+                return key
+        return default_key
+
+    return router, mapping
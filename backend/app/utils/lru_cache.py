@@ -0,0 +1,65 @@
+"""Size-bounded least recently used cache with hit, miss and eviction counters."""
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Size-bounded LRU cache; ``item`` names what it holds in log messages."""
+
+    item = "entry"
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, marking it as most recently used."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entries."""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            logger.debug(f"Evicted {self.item} {evicted_key[:12]} from cache")
+
+    def invalidate(self, key: str) -> bool:
+        """Remove a value from the cache."""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """Remove all values from the cache."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": self.hits / total if total else 0.0
+        }
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,200 @@
+"""Path expressions for reading values out of nested payloads.
+
+A path is compiled once into an accessor function that walks a value:
+
+- ``a.b.c`` and ``a['key.with.dots']`` read dict keys
+- ``items[0]`` and ``items[-1]`` index lists
+- ``items[*]`` / ``data.*`` fan out over list items or dict values
+- ``items[1:3]`` fans out over a slice of a list
+- ``items[?(@.score > 0.5)]`` fans out over the items matching a predicate
+  (see ``compile_predicate``; ``@`` is the item and bare names are its keys)
+
+A leading ``$`` or ``$.`` is allowed. Missing keys and out-of-range indices
+evaluate to ``None``. Once a path fans out, its result is a list of the values
+found along each branch (nested fan-outs are flattened) and missing values are
+dropped.
+"""
+from typing import Any, Callable, List, Tuple
+from functools import lru_cache
+from app.utils.expressions import compile_predicate
+import re
+
+Accessor = Callable[[Any], Any]
+
+_ITEM_REFERENCE = re.compile(r"('[^']*'|\"[^\"]*\")|@")
+
+
+@lru_cache(maxsize=512)
+def compile_path(expression: str) -> Accessor:
+    """Compile a path expression into an accessor function.
+
+    Compiled accessors are cached by expression, so every graph using the same
+    path shares one accessor. Raises ValueError for invalid paths.
+    """
+    segments = _parse(expression)
+    accessor, _ = _compile_segments(segments)
+    return accessor
+
+
+def _parse(expression: str) -> List[Tuple[str, Any]]:
+    path = expression.strip()
+    if path.startswith("$"):
+        path = path[1:]
+    if not path:
+        return []
+
+    segments: List[Tuple[str, Any]] = []
+    position = 0
+    expect_name = not path.startswith((".", "["))
+    while position < len(path):
+        char = path[position]
+        if expect_name or char == ".":
+            if char == ".":
+                position += 1
+            end = position
+            while end < len(path) and path[end] not in ".[]":
+                end += 1
+            name = path[position:end].strip()
+            if not name:
+                raise ValueError(f"Empty key in path: {expression}")
+            segments.append(("wildcard", None) if name == "*" else ("key", name))
+            position = end
+            expect_name = False
+        elif char == "[":
+            end = _find_closing_bracket(path, position, expression)
+            segments.append(_parse_bracket(path[position + 1:end].strip(), expression))
+            position = end + 1
+        else:
+            raise ValueError(f"Unexpected '{char}' in path: {expression}")
+    return segments
+
+
+def _find_closing_bracket(path: str, start: int, expression: str) -> int:
+    depth = 0
+    quote = None
+    for position in range(start, len(path)):
+        char = path[position]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return position
+    raise ValueError(f"Unclosed '[' in path: {expression}")
+
+
+def _parse_bracket(content: str, expression: str) -> Tuple[str, Any]:
+    if content == "*":
+        return ("wildcard", None)
+    if content.startswith("?"):
+        predicate = content[1:].strip()
+        if predicate.startswith("(") and predicate.endswith(")"):
+            predicate = predicate[1:-1]
+        predicate = _ITEM_REFERENCE.sub(lambda match: match.group(1) or "state", predicate)
+        # Items missing the tested keys are common, so they don't each log a warning
+        return ("filter", compile_predicate(predicate, log_failures=False))
+    if len(content) >= 2 and content[0] == content[-1] and content[0] in "'\"":
+        return ("key", content[1:-1])
+    try:
+        if ":" in content:
+            start, _, end = content.partition(":")
+            return ("slice", slice(int(start) if start.strip() else None, int(end) if end.strip() else None))
+        return ("index", int(content))
+    except ValueError:
+        raise ValueError(f"Invalid index '[{content}]' in path: {expression}")
+
+
+def _compile_segments(segments: List[Tuple[str, Any]]) -> Tuple[Accessor, bool]:
+    """Build the accessor from the last segment backwards; returns (accessor, fans_out)."""
+    accessor = None
+    fans_out = False
+    keys: List[Any] = []
+    for kind, argument in reversed(segments):
+        if kind == "key":
+            # Runs of plain keys are walked by one function rather than nested calls
+            keys.insert(0, argument)
+            continue
+        if keys:
+            accessor = _keys_step(keys, accessor)
+            keys = []
+        if kind == "index":
+            accessor = _index_step(argument, accessor)
+        else:
+            accessor = _fan_out_step(kind, argument, accessor, fans_out)
+            fans_out = True
+    if keys:
+        accessor = _keys_step(keys, accessor)
+    return accessor or _identity, fans_out
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _keys_step(keys: List[Any], rest: Accessor) -> Accessor:
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get_key(value: Any) -> Any:
+            value = value.get(key) if isinstance(value, dict) else None
+            return value if rest is None else rest(value)
+        return get_key
+
+    keys = tuple(keys)
+
+    def get_keys(value: Any) -> Any:
+        for key in keys:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+        return value if rest is None else rest(value)
+    return get_keys
+
+
+def _index_step(index: int, rest: Accessor) -> Accessor:
+    def get_index(value: Any) -> Any:
+        if isinstance(value, (list, tuple)):
+            try:
+                value = value[index]
+            except IndexError:
+                value = None
+        else:
+            value = None
+        return value if rest is None else rest(value)
+    return get_index
+
+
+def _fan_out_step(kind: str, argument: Any, rest: Accessor, rest_fans_out: bool) -> Accessor:
+    def children(value: Any) -> Any:
+        if kind == "slice":
+            return value[argument] if isinstance(value, (list, tuple)) else ()
+        if isinstance(value, (list, tuple)):
+            items = value
+        elif isinstance(value, dict) and kind == "wildcard":
+            items = value.values()
+        else:
+            return ()
+        if kind == "filter":
+            return [item for item in items if argument(item)]
+        return items
+
+    if rest is None:
+        def fan_out(value: Any) -> List[Any]:
+            return [item for item in children(value) if item is not None]
+    elif rest_fans_out:
+        def fan_out(value: Any) -> List[Any]:
+            results: List[Any] = []
+            for item in children(value):
+                results.extend(rest(item))
+            return results
+    else:
+        def fan_out(value: Any) -> List[Any]:
+            results = [rest(item) for item in children(value)]
+            return [result for result in results if result is not None]
+    return fan_out
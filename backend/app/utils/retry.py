@@ -1,7 +1,11 @@
 """Retry utilities for handling transient failures."""
 from typing import Callable, Any, Optional
+from app.utils.deadline import remaining_time
+from app.utils.cancellation import cancellable_sleep, cancellable_sleep_sync
+from app.exceptions import ExecutionCancelledError
 import asyncio
 import logging
+import time
 from functools import wraps
 
 logger = logging.getLogger(__name__)
@@ -25,6 +29,12 @@ class RetryConfig:
         self.jitter = jitter
 
 
+def _has_budget_for_retry(delay: float, attempt_duration: float) -> bool:
+    """Whether the current deadline leaves time to wait and run another attempt."""
+    remaining = remaining_time()
+    return remaining is None or remaining > delay + attempt_duration
+
+
 def retry_on_failure(
     config: Optional[RetryConfig] = None,
     retryable_exceptions: tuple = (Exception,)
@@ -38,8 +48,11 @@ def retry_on_failure(
             last_exception = None
             
             for attempt in range(retry_config.max_attempts):
+                attempt_started = time.monotonic()
                 try:
                     return await func(*args, **kwargs)
+                except ExecutionCancelledError:
+                    raise
                 except retryable_exceptions as e:
                     last_exception = e
                     
@@ -55,12 +68,19 @@ def retry_on_failure(
                             import random
                             delay = delay * (0.5 + random.random() * 0.5)
                         
+                        if not _has_budget_for_retry(delay, time.monotonic() - attempt_started):
+                            logger.error(
+                                f"Attempt {attempt + 1}/{retry_config.max_attempts} failed for {func.__name__}: {str(e)}. "
+                                f"Not retrying, the execution deadline leaves no time for another attempt"
+                            )
+                            raise
+                        
                         logger.warning(
                             f"Attempt {attempt + 1}/{retry_config.max_attempts} failed for {func.__name__}: {str(e)}. "
                             f"Retrying in {delay:.2f}s..."
                         )
                         
-                        await asyncio.sleep(delay)
+                        await cancellable_sleep(delay)
                     else:
                         logger.error(f"All {retry_config.max_attempts} attempts failed for {func.__name__}")
                         raise
@@ -70,8 +90,11 @@ def retry_on_failure(
             last_exception = None
             
             for attempt in range(retry_config.max_attempts):
+                attempt_started = time.monotonic()
                 try:
                     return func(*args, **kwargs)
+                except ExecutionCancelledError:
+                    raise
                 except retryable_exceptions as e:
                     last_exception = e
                     
@@ -85,13 +108,19 @@ def retry_on_failure(
                             import random
                             delay = delay * (0.5 + random.random() * 0.5)
                         
+                        if not _has_budget_for_retry(delay, time.monotonic() - attempt_started):
+                            logger.error(
+                                f"Attempt {attempt + 1}/{retry_config.max_attempts} failed for {func.__name__}: {str(e)}. "
+                                f"Not retrying, the execution deadline leaves no time for another attempt"
+                            )
+                            raise
+                        
                         logger.warning(
                             f"Attempt {attempt + 1}/{retry_config.max_attempts} failed for {func.__name__}: {str(e)}. "
                             f"Retrying in {delay:.2f}s..."
                         )
                         
-                        import time
-                        time.sleep(delay)
+                        cancellable_sleep_sync(delay)
                     else:
                         logger.error(f"All {retry_config.max_attempts} attempts failed for {func.__name__}")
                         raise
@@ -0,0 +1,86 @@
+"""State reducers for merging parallel branch updates in LangGraph workflows."""
+from typing import Dict, Any, List, Callable
+from app.models.workflow import WorkflowDefinition
+from app.exceptions import GraphCompilationError
+import operator
+from functools import reduce
+
+
+def _append(values: List[Any]) -> List[Any]:
+    return list(values)
+
+
+def _extend(values: List[Any]) -> List[Any]:
+    result = []
+    for value in values:
+        if isinstance(value, list):
+            result.extend(value)
+        else:
+            result.append(value)
+    return result
+
+
+def _merge(values: List[Any]) -> Dict[str, Any]:
+    result = {}
+    for value in values:
+        if isinstance(value, dict):
+            result.update(value)
+    return result
+
+
+def _sum(values: List[Any]) -> Any:
+    return reduce(operator.add, values)
+
+
+REDUCERS: Dict[str, Callable[[List[Any]], Any]] = {
+    "last": lambda values: values[-1],
+    "first": lambda values: values[0],
+    "append": _append,
+    "extend": _extend,
+    "merge": _merge,
+    "sum": _sum
+}
+
+# Reducers applied when a definition does not declare one for a key
+DEFAULT_REDUCERS: Dict[str, str] = {
+    "output": "append"
+}
+
+
+def resolve_reducers(definition: WorkflowDefinition) -> Dict[str, str]:
+    """Collect reducers declared in the state schema and langgraphConfig.
+
+    Reducers can be declared per state property (``"reducer": "append"`` in the
+    state schema) or as a ``reducers`` mapping in ``langgraphConfig``; the
+    latter takes precedence.
+    """
+    reducers = dict(DEFAULT_REDUCERS)
+
+    properties = (definition.stateSchema or {}).get("properties", {})
+    for key, prop_def in properties.items():
+        if isinstance(prop_def, dict) and prop_def.get("reducer"):
+            reducers[key] = prop_def["reducer"]
+
+    reducers.update((definition.langgraphConfig or {}).get("reducers", {}))
+
+    for key, name in reducers.items():
+        if name not in REDUCERS:
+            raise GraphCompilationError(
+                f"Unknown reducer '{name}' for state key '{key}'. "
+                f"Supported reducers: {', '.join(sorted(REDUCERS))}",
+                context={"state_key": key, "reducer": name}
+            )
+    return reducers
+
+
+def merge_branch_updates(updates: List[Dict[str, Any]], reducers: Dict[str, str]) -> Dict[str, Any]:
+    """Merge the state updates of parallel branches, in branch order."""
+    values: Dict[str, List[Any]] = {}
+    for update in updates:
+        for key, value in update.items():
+            values.setdefault(key, []).append(value)
+
+    return {
+        key: REDUCERS[reducers.get(key, "last")](key_values)
+        for key, key_values in values.items()
+    }
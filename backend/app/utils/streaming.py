@@ -0,0 +1,281 @@
+"""Streaming transforms over oversized text and list payloads.
+
+In streaming mode, ``split``, ``join``, ``replace``, ``to_json``, ``uppercase``
+and ``length`` consume their input as an iterable of chunks (text) or items
+(lists) and return lazy values instead of building full copies. A chain of
+streaming transform nodes therefore passes lazy values along and the data is
+produced once, chunk by chunk, when a consumer finally needs it.
+
+Lazy values are re-iterable (each iteration re-runs the chain from its source)
+and cache their concrete value once ``materialize`` has been called, so any
+number of consumers can share one. Other transforms, and every non-transform
+node, materialize their input first.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from itertools import islice
+from app.utils.transforms import (
+    TransformFunction,
+    compile_transform,
+    transform_type_and_config
+)
+import json
+
+# Characters per chunk when a concrete string is streamed
+CHUNK_SIZE = 64 * 1024
+
+# Items joined into one chunk at a time
+JOIN_BATCH_SIZE = 4096
+
+_UNSET = object()
+
+
+class LazyValue:
+    """A value produced on demand by re-running a chain of generators."""
+
+    def __init__(self, produce: Callable[[], Iterator[Any]]):
+        self._produce = produce
+        self._value = _UNSET
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._value is not _UNSET:
+            return self._iter_value(self._value)
+        return self._produce()
+
+    def materialize(self) -> Any:
+        """Build (once) and return the concrete value."""
+        if self._value is _UNSET:
+            self._value = self._build(self._produce())
+        return self._value
+
+    def _build(self, iterator: Iterator[Any]) -> Any:
+        raise NotImplementedError
+
+    def _iter_value(self, value: Any) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        state = "materialized" if self._value is not _UNSET else "pending"
+        return f"<{type(self).__name__} {state}>"
+
+
+class LazyText(LazyValue):
+    """Lazy string, iterated as chunks of text."""
+
+    def _build(self, iterator: Iterator[str]) -> str:
+        return "".join(iterator)
+
+    def _iter_value(self, value: str) -> Iterator[str]:
+        return text_chunks(value)
+
+
+class LazyList(LazyValue):
+    """Lazy list, iterated item by item."""
+
+    def _build(self, iterator: Iterator[Any]) -> List[Any]:
+        return list(iterator)
+
+    def _iter_value(self, value: List[Any]) -> Iterator[Any]:
+        return iter(value)
+
+
+def materialize(value: Any) -> Any:
+    """Get the concrete value of a possibly lazy value."""
+    return value.materialize() if isinstance(value, LazyValue) else value
+
+
+def has_lazy_values(values: Dict[str, Any]) -> bool:
+    """Whether a state or state update holds lazy values."""
+    return any(isinstance(value, LazyValue) for value in values.values())
+
+
+def materialize_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Materialize the lazy values of a state or state update."""
+    if not has_lazy_values(values):
+        return values
+    return {key: materialize(value) for key, value in values.items()}
+
+
+def text_chunks(text: Any) -> Iterator[str]:
+    """Iterate a string, or a lazy string, in chunks."""
+    if isinstance(text, LazyText):
+        return iter(text)
+    return (text[start:start + CHUNK_SIZE] for start in range(0, len(text), CHUNK_SIZE))
+
+
+def compile_streaming_transform(transform_func: Any) -> TransformFunction:
+    """Compile a transform that accepts and, where it can, returns lazy values.
+
+    Raises ValueError for invalid configurations, like ``compile_transform``.
+    """
+    eager = compile_transform(transform_func)
+    transform_type, config = transform_type_and_config(transform_func)
+
+    if transform_type == "pipeline" and not config.get("columnar"):
+        steps = [compile_streaming_transform(step) for step in config.get("steps") or []]
+
+        def stream_pipeline(value: Any) -> Any:
+            for step in steps:
+                value = step(value)
+            return value
+        return stream_pipeline
+
+    compiler = _streaming_compilers.get(transform_type)
+    streaming = compiler(config) if compiler else None
+
+    def apply(value: Any) -> Any:
+        if streaming is not None:
+            result = streaming(value)
+            if result is not NotImplemented:
+                return result
+        return eager(materialize(value))
+    return apply
+
+
+StreamingCompiler = Callable[[Dict[str, Any]], Callable[[Any], Any]]
+_streaming_compilers: Dict[str, StreamingCompiler] = {}
+
+
+def _streaming(transform_type: str):
+    def decorator(compiler: StreamingCompiler) -> StreamingCompiler:
+        _streaming_compilers[transform_type] = compiler
+        return compiler
+    return decorator
+
+
+def _is_text(value: Any) -> bool:
+    return isinstance(value, (str, LazyText))
+
+
+def _is_list(value: Any) -> bool:
+    return isinstance(value, (list, LazyList))
+
+
+@_streaming("replace")
+def _stream_replace(config: Dict[str, Any]):
+    old = config.get("old", "")
+    new = config.get("new", "")
+
+    def replace(value: Any) -> Any:
+        # An empty pattern matches between every character, chunk boundaries included
+        if not _is_text(value) or not old:
+            return NotImplemented
+        return LazyText(lambda: _replace_chunks(text_chunks(value), old, new))
+    return replace
+
+
+def _replace_chunks(chunks: Iterable[str], old: str, new: str) -> Iterator[str]:
+    """Replace across chunk boundaries, matching ``str.replace`` left to right."""
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk
+        # Cut where no occurrence of the pattern spans the boundary: the text
+        # before it then replaces exactly as it would within the whole string
+        boundary = len(text) - len(old) + 1
+        while boundary > 0:
+            found = text.find(old, max(0, boundary - len(old) + 1), boundary + len(old) - 1)
+            if found == -1 or found >= boundary:
+                break
+            boundary = found
+        boundary = max(boundary, 0)
+        carry = text[boundary:]
+        if boundary:
+            yield text[:boundary].replace(old, new)
+    if carry:
+        yield carry.replace(old, new)
+
+
+@_streaming("split")
+def _stream_split(config: Dict[str, Any]):
+    separator = config.get("separator", " ")
+
+    def split(value: Any) -> Any:
+        # None splits on runs of whitespace; "" is rejected by str.split
+        if not _is_text(value) or not isinstance(separator, str) or not separator:
+            return NotImplemented
+        return LazyList(lambda: _split_items(text_chunks(value), separator))
+    return split
+
+
+def _split_items(chunks: Iterable[str], separator: str) -> Iterator[str]:
+    """Split chunked text, matching ``str.split`` with an explicit separator."""
+    pending: List[str] = []  # Text since the last separator
+    tail_size = len(separator) - 1
+    tail = ""
+    for chunk in chunks:
+        if separator not in tail + chunk:
+            pending.append(chunk)
+            tail = (tail + chunk)[-tail_size:] if tail_size else ""
+            continue
+        parts = ("".join(pending) + chunk).split(separator)
+        yield from parts[:-1]
+        pending = [parts[-1]]
+        tail = parts[-1][-tail_size:] if tail_size else ""
+    yield "".join(pending)
+
+
+@_streaming("join")
+def _stream_join(config: Dict[str, Any]):
+    separator = config.get("separator", " ")
+
+    def join(value: Any) -> Any:
+        if not _is_list(value):
+            return NotImplemented
+        return LazyText(lambda: _join_chunks(value, separator))
+    return join
+
+
+def _join_chunks(items: Iterable[Any], separator: str) -> Iterator[str]:
+    iterator = iter(items)
+    first = True
+    while True:
+        batch = list(islice(iterator, JOIN_BATCH_SIZE))
+        if not batch:
+            break
+        text = separator.join(map(str, batch))
+        yield text if first else separator + text
+        first = False
+    if first:
+        yield ""
+
+
+@_streaming("to_json")
+def _stream_to_json(config: Dict[str, Any]):
+    def to_json(value: Any) -> Any:
+        # Parsing needs the whole text, so only encoding lists streams
+        if not _is_list(value):
+            return NotImplemented
+        return LazyText(lambda: _json_array_chunks(value))
+    return to_json
+
+
+def _json_array_chunks(items: Iterable[Any]) -> Iterator[str]:
+    """Encode items as a JSON array, matching ``json.dumps`` output."""
+    return _join_chunks(_bracketed(json.dumps(item) for item in items), "")
+
+
+def _bracketed(encoded: Iterator[str]) -> Iterator[str]:
+    yield "["
+    for index, item in enumerate(encoded):
+        yield item if index == 0 else ", " + item
+    yield "]"
+
+
+@_streaming("uppercase")
+def _stream_uppercase(config: Dict[str, Any]):
+    # Upper-casing is per character, unlike lowercase (final sigma) or trim
+    def uppercase(value: Any) -> Any:
+        if not _is_text(value):
+            return NotImplemented
+        return LazyText(lambda: (chunk.upper() for chunk in text_chunks(value)))
+    return uppercase
+
+
+@_streaming("length")
+def _stream_length(config: Dict[str, Any]):
+    def length(value: Any) -> Any:
+        if isinstance(value, LazyText):
+            return sum(map(len, value))
+        if isinstance(value, LazyList):
+            return sum(1 for _ in value)
+        return NotImplemented
+    return length
@@ -0,0 +1,429 @@
+"""Compiled transform functions for transform nodes.
+
+A transform config (a type name, a ``{"type": ..., "config": ...}`` dict or a
+callable) is compiled once into a plain ``input -> output`` function. The
+type lookup and config parsing happen at compile time, so applying the
+compiled transform only does the work itself. The ``pipeline`` type chains
+several transforms in one function without writing intermediate results to
+the graph state.
+
+``extract_field``, ``filter`` and ``map`` accept a ``path`` (see
+``app.utils.path_expressions``) in place of a top-level ``field``. Invalid
+configurations raise ValueError at compile time. A pipeline with
+``"columnar": true`` runs its list steps column-wise (see ``app.utils.columnar``).
+
+This module is the transform engine of both ``ChainService`` and
+``LanggraphService``. ``get_transform`` caches compiled transforms by a hash of
+their config, so every graph and chain using the same config shares one
+compiled function.
+"""
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from app.utils.path_expressions import compile_path
+from app.utils.lru_cache import LRUCache
+from app.utils.columnar import (
+    AGGREGATE_OPERATIONS,
+    TERMINAL_TRANSFORMS,
+    aggregate_values,
+    compile_columnar,
+    supports_columnar
+)
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+TransformFunction = Callable[[Any], Any]
+TransformCompiler = Callable[[Dict[str, Any]], TransformFunction]
+
+_compilers: Dict[str, TransformCompiler] = {}
+
+
+class TransformCache(LRUCache):
+    """Size-bounded LRU cache for compiled transforms keyed by config hash."""
+
+    item = "compiled transform"
+
+
+# Distinct transform configs whose compiled functions are kept
+TRANSFORM_CACHE_SIZE = 1024
+_compiled_cache = TransformCache(max_size=TRANSFORM_CACHE_SIZE)
+
+
+def register_transform(*transform_types: str):
+    """Register a compiler for one or more transform types."""
+    def decorator(compiler: TransformCompiler) -> TransformCompiler:
+        for transform_type in transform_types:
+            _compilers[transform_type] = compiler
+        # Cached transforms may have been compiled by the previous compiler
+        _compiled_cache.clear()
+        return compiler
+    return decorator
+
+
+def transform_types() -> List[str]:
+    """Get the registered transform types."""
+    return sorted(_compilers)
+
+
+def compile_transform(transform_func: Any) -> TransformFunction:
+    """Compile a transform config into a function applying it."""
+    if not transform_func:
+        return _identity
+
+    if isinstance(transform_func, str):
+        return _compile_named(transform_func, {})
+
+    if isinstance(transform_func, dict):
+        return _compile_named(
+            transform_func.get("type", "passthrough"),
+            transform_func.get("config") or {}
+        )
+
+    if callable(transform_func):
+        def apply_callable(input_data: Any) -> Any:
+            try:
+                return transform_func(input_data)
+            except MemoryError:
+                raise
+            except Exception as e:
+                logger.error(f"Transform function execution failed: {str(e)}")
+                return input_data
+        return apply_callable
+
+    return _identity
+
+
+def compute_transform_hash(transform_func: Any) -> Optional[str]:
+    """Compute a canonical hash of a transform config (None for callables)."""
+    try:
+        canonical = json.dumps(transform_func, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_transform(transform_func: Any) -> TransformFunction:
+    """Get the compiled function for a transform config, compiling each distinct config once.
+
+    Raises ValueError for invalid configurations, like ``compile_transform``.
+    """
+    key = compute_transform_hash(transform_func)
+    if key is None:
+        return compile_transform(transform_func)
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = compile_transform(transform_func)
+        _compiled_cache.put(key, compiled)
+    return compiled
+
+
+def transform_cache_stats() -> Dict[str, Any]:
+    """Get statistics of the compiled transform cache."""
+    return _compiled_cache.stats()
+
+
+def compile_pipeline(steps: List[Any], columnar: bool = False) -> TransformFunction:
+    """Compile a list of transforms into one function applying them in order.
+
+    With ``columnar``, runs of list steps that have a columnar implementation
+    (see ``app.utils.columnar``) execute on a ColumnarBatch and convert back to
+    Python values once at the end of the run.
+    """
+    compiled = [compile_transform(step) for step in steps]
+    if columnar:
+        compiled = _columnar_runs(steps, compiled)
+    return _chain(compiled)
+
+
+def _chain(compiled: List[TransformFunction]) -> TransformFunction:
+    compiled = [step for step in compiled if step is not _identity]
+    if not compiled:
+        return _identity
+    if len(compiled) == 1:
+        return compiled[0]
+
+    def apply_pipeline(input_data: Any) -> Any:
+        for step in compiled:
+            input_data = step(input_data)
+        return input_data
+    return apply_pipeline
+
+
+def _columnar_runs(steps: List[Any], compiled: List[TransformFunction]) -> List[TransformFunction]:
+    """Replace runs of columnar-capable steps with one columnar function per run."""
+    result: List[TransformFunction] = []
+    run: List[Any] = []
+
+    def flush():
+        # Runs of only slice/length gain nothing from extracting columns
+        if any(transform_type in ("filter", "map", "project", "aggregate") for transform_type, _, _ in run):
+            fallback = _chain([function for _, _, function in run])
+            result.append(compile_columnar([(t, config) for t, config, _ in run], fallback))
+        else:
+            result.extend(function for _, _, function in run)
+        run.clear()
+
+    for step, function in zip(steps, compiled):
+        transform_type, config = transform_type_and_config(step)
+        if transform_type is None or not supports_columnar(transform_type, config):
+            flush()
+            result.append(function)
+            continue
+        run.append((transform_type, config, function))
+        if transform_type in TERMINAL_TRANSFORMS:
+            flush()
+    flush()
+    return result
+
+
+def transform_type_and_config(step: Any) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Split a transform config into its type and options (None for callables)."""
+    if isinstance(step, str):
+        return step, {}
+    if isinstance(step, dict):
+        return step.get("type", "passthrough"), step.get("config") or {}
+    return None, {}
+
+
+def apply_transform(input_data: Any, transform_func: Any) -> Any:
+    """Apply a transform, compiling its config on first use."""
+    return get_transform(transform_func)(input_data)
+
+
+def _compile_named(transform_type: str, config: Dict[str, Any]) -> TransformFunction:
+    compiler = _compilers.get(transform_type)
+    if compiler is None:
+        logger.warning(f"Unknown transform type: {transform_type}, using passthrough")
+        return _identity
+    return compiler(config)
+
+
+def _identity(input_data: Any) -> Any:
+    return input_data
+
+
+@register_transform("passthrough", "identity")
+def _compile_identity(config: Dict[str, Any]) -> TransformFunction:
+    return _identity
+
+
+@register_transform("pipeline")
+def _compile_pipeline_config(config: Dict[str, Any]) -> TransformFunction:
+    return compile_pipeline(config.get("steps") or [], columnar=bool(config.get("columnar")))
+
+
+@register_transform("to_string")
+def _compile_to_string(config: Dict[str, Any]) -> TransformFunction:
+    return str
+
+
+@register_transform("to_json")
+def _compile_to_json(config: Dict[str, Any]) -> TransformFunction:
+    def to_json(input_data: Any) -> Any:
+        if isinstance(input_data, str):
+            try:
+                return json.loads(input_data)
+            except json.JSONDecodeError:
+                return input_data
+        return json.dumps(input_data) if input_data is not None else "{}"
+    return to_json
+
+
+@register_transform("extract_field")
+def _compile_extract_field(config: Dict[str, Any]) -> TransformFunction:
+    if config.get("path"):
+        return compile_path(config["path"])
+
+    field = config.get("field")
+    if not field:
+        return _identity
+
+    def extract_field(input_data: Any) -> Any:
+        if isinstance(input_data, dict):
+            return input_data.get(field)
+        return input_data
+    return extract_field
+
+
+@register_transform("set_field")
+def _compile_set_field(config: Dict[str, Any]) -> TransformFunction:
+    field = config.get("field")
+    value = config.get("value")
+    if not field:
+        return _identity
+
+    def set_field(input_data: Any) -> Any:
+        if isinstance(input_data, dict):
+            return {**input_data, field: value}
+        return input_data
+    return set_field
+
+
+@register_transform("merge")
+def _compile_merge(config: Dict[str, Any]) -> TransformFunction:
+    merge_data = config.get("data", {})
+    if not isinstance(merge_data, dict):
+        return _identity
+
+    def merge(input_data: Any) -> Any:
+        if isinstance(input_data, dict):
+            return {**input_data, **merge_data}
+        return input_data
+    return merge
+
+
+@register_transform("filter")
+def _compile_filter(config: Dict[str, Any]) -> TransformFunction:
+    field = config.get("field")
+    value = config.get("value")
+
+    if config.get("where"):
+        # Bare names in the predicate are keys of the item, "@" is the item itself
+        matching = compile_path(f"[?({config['where']})]")
+
+        def filter_where(input_data: Any) -> Any:
+            return matching(input_data) if isinstance(input_data, list) else input_data
+        return filter_where
+
+    if config.get("path"):
+        accessor = compile_path(config["path"])
+
+        def filter_path(input_data: Any) -> Any:
+            if isinstance(input_data, list):
+                return [item for item in input_data if accessor(item) == value]
+            return input_data
+        return filter_path
+
+    if not field:
+        return _identity
+
+    def filter_items(input_data: Any) -> Any:
+        if isinstance(input_data, list):
+            return [item for item in input_data if isinstance(item, dict) and item.get(field) == value]
+        return input_data
+    return filter_items
+
+
+@register_transform("map")
+def _compile_map(config: Dict[str, Any]) -> TransformFunction:
+    if config.get("path"):
+        accessor = compile_path(config["path"])
+
+        # One value per item (None where the path is missing) so results stay aligned
+        def map_path(input_data: Any) -> Any:
+            if isinstance(input_data, list):
+                return [accessor(item) for item in input_data]
+            return input_data
+        return map_path
+
+    field = config.get("field")
+    if not field:
+        return _identity
+
+    def map_items(input_data: Any) -> Any:
+        if isinstance(input_data, list):
+            return [item.get(field) if isinstance(item, dict) else item for item in input_data]
+        return input_data
+    return map_items
+
+
+@register_transform("project")
+def _compile_project(config: Dict[str, Any]) -> TransformFunction:
+    fields = list(config.get("fields") or [])
+
+    def project(input_data: Any) -> Any:
+        if isinstance(input_data, list):
+            return [
+                {field: item.get(field) for field in fields} if isinstance(item, dict) else item
+                for item in input_data
+            ]
+        return input_data
+    return project
+
+
+@register_transform("aggregate")
+def _compile_aggregate(config: Dict[str, Any]) -> TransformFunction:
+    field = config.get("field")
+    operation = config.get("operation", "count")
+    if operation not in AGGREGATE_OPERATIONS:
+        raise ValueError(f"Unknown aggregate operation '{operation}', expected one of {AGGREGATE_OPERATIONS}")
+
+    def aggregate(input_data: Any) -> Any:
+        if not isinstance(input_data, list):
+            return input_data
+        if field:
+            return aggregate_values([item.get(field) for item in input_data if isinstance(item, dict)], operation)
+        return aggregate_values(input_data, operation)
+    return aggregate
+
+
+def _string_method(method: Callable[[str], str]) -> TransformFunction:
+    def apply(input_data: Any) -> Any:
+        return method(input_data if isinstance(input_data, str) else str(input_data))
+    return apply
+
+
+@register_transform("uppercase")
+def _compile_uppercase(config: Dict[str, Any]) -> TransformFunction:
+    return _string_method(str.upper)
+
+
+@register_transform("lowercase")
+def _compile_lowercase(config: Dict[str, Any]) -> TransformFunction:
+    return _string_method(str.lower)
+
+
+@register_transform("trim")
+def _compile_trim(config: Dict[str, Any]) -> TransformFunction:
+    return _string_method(str.strip)
+
+
+@register_transform("replace")
+def _compile_replace(config: Dict[str, Any]) -> TransformFunction:
+    old = config.get("old", "")
+    new = config.get("new", "")
+    return _string_method(lambda text: text.replace(old, new))
+
+
+@register_transform("split")
+def _compile_split(config: Dict[str, Any]) -> TransformFunction:
+    separator = config.get("separator", " ")
+
+    def split(input_data: Any) -> Any:
+        if isinstance(input_data, str):
+            return input_data.split(separator)
+        return [str(input_data)]
+    return split
+
+
+@register_transform("join")
+def _compile_join(config: Dict[str, Any]) -> TransformFunction:
+    separator = config.get("separator", " ")
+
+    def join(input_data: Any) -> Any:
+        if isinstance(input_data, list):
+            return separator.join(str(item) for item in input_data)
+        return str(input_data)
+    return join
+
+
+@register_transform("length")
+def _compile_length(config: Dict[str, Any]) -> TransformFunction:
+    def length(input_data: Any) -> Any:
+        if isinstance(input_data, (str, list, dict)):
+            return len(input_data)
+        return 0
+    return length
+
+
+@register_transform("slice")
+def _compile_slice(config: Dict[str, Any]) -> TransformFunction:
+    start = config.get("start", 0)
+    end: Optional[int] = config.get("end")
+
+    def slice_items(input_data: Any) -> Any:
+        if isinstance(input_data, (str, list)):
+            return input_data[start:end]
+        return input_data
+    return slice_items
@@ -0,0 +1,109 @@
+"""Benchmark: the same transform workflow on the Langchain and Langgraph engines.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_engines [--size 10000] [--repeat 3]
+
+Both engines run one chain of transform nodes through the shared transform
+engine (``app.utils.transforms``), so the numbers compare the engines'
+own overhead: a ``TransformChain`` invocation against a compiled graph
+execution (with and without the graph optimizer fusing the nodes). Build
+times show the compiled transform cache at work: the first build compiles
+each transform config, later builds reuse the compiled functions.
+"""
+from typing import Any, Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import time
+
+from app.models.workflow import ChainConfig, WorkflowConnection, WorkflowDefinition, WorkflowNode
+from app.services.chain_service import ChainService
+from app.services.checkpoint_store import InMemoryCheckpointStore
+from app.services.langgraph_service import LanggraphService
+from benchmarks.bench_transforms import PIPELINE_STEPS, make_records
+
+
+def chain_config() -> ChainConfig:
+    node_ids = [f"step-{index}" for index in range(len(PIPELINE_STEPS))]
+    return ChainConfig(
+        chainType="transform",
+        nodes=node_ids,
+        transforms=dict(zip(node_ids, PIPELINE_STEPS))
+    )
+
+
+def graph_definition(optimize: bool) -> WorkflowDefinition:
+    node_ids = ["input-1"] + [f"step-{index}" for index in range(len(PIPELINE_STEPS))] + ["output-1"]
+    nodes = [WorkflowNode(id="input-1", type="input", label="Input", data={})]
+    nodes += [
+        WorkflowNode(id=node_id, type="transform", label=node_id, data={"transform": step})
+        for node_id, step in zip(node_ids[1:-1], PIPELINE_STEPS)
+    ]
+    nodes.append(WorkflowNode(id="output-1", type="output", label="Output", data={}))
+    return WorkflowDefinition(
+        nodes=nodes,
+        connections=[
+            WorkflowConnection(id=f"c{index}", source=source, target=target)
+            for index, (source, target) in enumerate(zip(node_ids, node_ids[1:]))
+        ],
+        langgraphConfig={"optimize": optimize}
+    )
+
+
+async def best_of(func: Callable[[], Awaitable[Any]], number: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        timings.append((time.perf_counter() - started) / number)
+    return min(timings)
+
+
+async def run(size: int, repeat: int):
+    chain_service = ChainService()
+    graph_service = LanggraphService(checkpoint_store=InMemoryCheckpointStore())
+
+    async def build_chain():
+        return chain_service._create_transform_chain(chain_config())
+
+    async def build_graph(optimize: bool):
+        return await graph_service.create_graph(graph_definition(optimize), use_cache=False)
+
+    chain = await build_chain()
+    graphs = {optimize: await build_graph(optimize) for optimize in (False, True)}
+    engines: Dict[str, Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = {
+        "langchain": lambda records: chain.ainvoke({"input": records}),
+        "langgraph": lambda records: graph_service.execute_graph(graphs[False], records),
+        "langgraph (fused)": lambda records: graph_service.execute_graph(graphs[True], records)
+    }
+
+    print(f"build ({len(PIPELINE_STEPS)} transform nodes, compiled transforms cached)")
+    for label, build in (
+        ("langchain", build_chain),
+        ("langgraph", lambda: build_graph(False)),
+        ("langgraph (fused)", lambda: build_graph(True))
+    ):
+        print(f"  {label:<18} {await best_of(build, 10, repeat) * 1e3:10.2f} ms")
+
+    for name, records, number in (("large list", make_records(size), 2), ("small list", make_records(10), 100)):
+        outputs = []
+        print(f"{name} ({len(records)} records)")
+        for label, execute in engines.items():
+            result = await execute(records)
+            outputs.append(result["output"])
+            timing = await best_of(lambda: execute(records), number, repeat)
+            print(f"  {label:<18} {timing * 1e3:10.3f} ms/run")
+        assert all(output == outputs[0] for output in outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10_000, help="records in the large list")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark: execution history lookups and memory, dict scan vs indexed store.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_execution_store [--executions 200000] [--workflows 1000]
+
+Records executions spread over many workflows, then times "latest 10
+executions of a workflow" with the previous approach (scan every execution
+and sort) and with the indexed store, and compares memory held by the
+unbounded dict with the store under its default retention limits. Then
+writes executions to the SQLite store, one commit per save vs batched, and
+times history pages with and without payloads.
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.models.execution import WorkflowExecution, ExecutionStatus
+from app.services.execution_store import create_execution_store, SQLiteExecutionStore
+
+
+def make_execution(index: int, workflows: int) -> WorkflowExecution:
+    return WorkflowExecution(
+        id=f"exec-{index}",
+        workflowId=f"wf-{index % workflows}",
+        status=ExecutionStatus.COMPLETED,
+        startedAt=f"2024-01-01T00:00:00.{index:09d}",
+        input={"input": f"request {index}"},
+        output={"output": f"result {index} " * 200}
+    )
+
+
+def scan_latest(executions: dict, workflow_id: str, limit: int) -> list:
+    matching = [execution for execution in executions.values() if execution.workflowId == workflow_id]
+    matching.sort(key=lambda x: x.startedAt, reverse=True)
+    return matching[:limit]
+
+
+def run(count: int, workflows: int, queries: int):
+    print(f"{count} executions over {workflows} workflows")
+
+    tracemalloc.start()
+    executions = {}
+    started = time.perf_counter()
+    for index in range(count):
+        execution = make_execution(index, workflows)
+        executions[execution.id] = execution
+    insert = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for query in range(queries):
+        scan_latest(executions, f"wf-{query % workflows}", 10)
+    lookup = (time.perf_counter() - started) / queries
+    print(f"  dict scan   insert {insert * 1e6 / count:7.2f} us/exec   latest-10 {lookup * 1e3:9.3f} ms   "
+          f"held {memory / 1e6:8.1f} MB ({len(executions)} executions)")
+    del executions
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = create_execution_store()
+    started = time.perf_counter()
+    for index in range(count):
+        store.save(make_execution(index, workflows))
+    insert = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for query in range(queries):
+        store.latest(f"wf-{query % workflows}", 10)
+    lookup = (time.perf_counter() - started) / queries
+    print(f"  store       insert {insert * 1e6 / count:7.2f} us/exec   latest-10 {lookup * 1e3:9.3f} ms   "
+          f"held {memory / 1e6:8.1f} MB ({len(store)} executions)")
+    tracemalloc.stop()
+
+
+def run_sqlite(count: int, workflows: int, queries: int):
+    count = min(count, 50000)
+    print(f"SQLite store, {count} executions")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "unbatched.db"
+        store = SQLiteExecutionStore(str(path), max_executions=0)
+        store.close()
+        conn = sqlite3.connect(str(path), isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        started = time.perf_counter()
+        for index in range(count // 10):
+            # One transaction per save, the way a write-through store would commit
+            conn.execute(
+                "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                store._to_row(make_execution(index, workflows).model_dump(mode="json"))
+            )
+        unbatched = (time.perf_counter() - started) / (count // 10)
+        conn.close()
+
+        store = SQLiteExecutionStore(str(Path(directory) / "executions.db"), max_executions=0)
+        started = time.perf_counter()
+        for index in range(count):
+            store.save(make_execution(index, workflows))
+        store.flush()
+        batched = (time.perf_counter() - started) / count
+        print(f"  writes      per-save commit {unbatched * 1e6:7.1f} us/exec   batched {batched * 1e6:7.1f} us/exec")
+
+        for payload in (True, False):
+            started = time.perf_counter()
+            for query in range(queries):
+                cursor = None
+                for _ in range(3):
+                    _, cursor = store.page(f"wf-{query % workflows}", 10, cursor=cursor, payload=payload)
+            elapsed = (time.perf_counter() - started) / (queries * 3)
+            print(f"  page of 10  payload={str(payload):<5} {elapsed * 1e3:7.3f} ms")
+        size = (Path(directory) / "executions.db").stat().st_size
+        print(f"  database    {size / 1e6:7.1f} MB ({count} executions, payloads compressed)")
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executions", type=int, default=200000)
+    parser.add_argument("--workflows", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.executions, args.workflows, args.queries)
+    run_sqlite(args.executions, args.workflows, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: interactive queue wait while a large batch is running.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_lanes [--items 10000] [--item-ms 5] [--interactive 50]
+
+Queues a batch of simulated executions (each sleeps ``--item-ms``) and, while
+it drains, submits interactive executions every 20 ms. Reports how long the
+interactive executions waited for a worker with a single shared lane and with
+the default interactive/batch lanes.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import settings
+from app.services.execution_queue import ExecutionQueue
+
+
+async def measure(lanes, items: int, item_seconds: float, interactive: int) -> list:
+    queue = ExecutionQueue(
+        workers=settings.execution_workers,
+        max_size=items + interactive,
+        lanes=lanes
+    )
+    batch_lane = "batch" if lanes and "batch" in lanes else None
+    waits = []
+
+    async def batch_item():
+        await asyncio.sleep(item_seconds)
+
+    for index in range(items):
+        queue.submit(f"batch-{index}", "langgraph", batch_item, batch_lane)
+
+    def interactive_job(submitted_at: float):
+        async def run():
+            waits.append(time.perf_counter() - submitted_at)
+            await asyncio.sleep(item_seconds)
+        return run
+
+    for index in range(interactive):
+        await asyncio.sleep(0.02)
+        queue.submit(f"interactive-{index}", "langgraph", interactive_job(time.perf_counter()))
+    await queue.join()
+    await queue.shutdown()
+    return waits
+
+
+async def run(items: int, item_ms: float, interactive: int):
+    lane_limits = {
+        name: {**config, "maxQueued": items + interactive}
+        for name, config in settings.execution_lanes.items()
+    }
+    print(f"{items} batch items of {item_ms} ms on {settings.execution_workers} workers, "
+          f"{interactive} interactive submissions")
+    for label, lanes in (("single lane", None), ("lanes", lane_limits)):
+        started = time.perf_counter()
+        waits = sorted(await measure(lanes, items, item_ms / 1000, interactive))
+        elapsed = time.perf_counter() - started
+        p99 = waits[min(len(waits) - 1, int(len(waits) * 0.99))]
+        print(f"  {label:<12} interactive wait p50 {statistics.median(waits) * 1e3:9.1f} ms   "
+              f"p99 {p99 * 1e3:9.1f} ms   max {waits[-1] * 1e3:9.1f} ms   total {elapsed:6.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--item-ms", type=float, default=5)
+    parser.add_argument("--interactive", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.item_ms, args.interactive))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Micro-benchmark: compiled path accessors vs per-call path interpretation.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_path_expressions [--size 100000] [--repeat 5]
+
+Each case maps or filters a list of nested tool-result records. The
+interpreted path splits and walks the path string for every item; the compiled
+path uses the accessor built once by ``compile_path``. A hand-written
+comprehension is included as the lower bound.
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import timeit
+
+from app.utils.path_expressions import compile_path
+from app.utils.transforms import compile_transform
+
+
+def make_records(size: int) -> List[Dict[str, Any]]:
+    """Build a list of nested search-result-like records."""
+    return [
+        {"id": i, "doc": {"meta": {"lang": "en" if i % 4 else "de", "title": f"title-{i}"}}, "score": i % 100}
+        for i in range(size)
+    ]
+
+
+def interpret_path(value: Any, path: str) -> Any:
+    """Walk a dotted path, parsing it on every call."""
+    for key in path.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def bench(label: str, func: Callable[[], Any], repeat: int) -> float:
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"  {label:<12} {best * 1e3:10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="records in the list")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.size)
+    title = compile_path("doc.meta.title")
+    titles = compile_path("[*].doc.meta.title")
+    english = compile_transform({"type": "filter", "config": {"path": "doc.meta.lang", "value": "en"}})
+    relevant = compile_transform({"type": "filter", "config": {"where": "score > 50 and doc.meta.lang == 'en'"}})
+
+    cases = [
+        ("map doc.meta.title", {
+            "interpreted": lambda: [interpret_path(item, "doc.meta.title") for item in records],
+            "compiled": lambda: [title(item) for item in records],
+            "wildcard": lambda: titles(records),
+            "hand-written": lambda: [item["doc"]["meta"]["title"] for item in records]
+        }),
+        ("filter doc.meta.lang == 'en'", {
+            "interpreted": lambda: [item for item in records if interpret_path(item, "doc.meta.lang") == "en"],
+            "compiled": lambda: english(records),
+            "hand-written": lambda: [item for item in records if item["doc"]["meta"]["lang"] == "en"]
+        }),
+        ("filter where predicate", {
+            "compiled": lambda: relevant(records),
+            "hand-written": lambda: [
+                item for item in records if item["score"] > 50 and item["doc"]["meta"]["lang"] == "en"
+            ]
+        })
+    ]
+    for name, runners in cases:
+        results = [runner() for runner in runners.values()]
+        assert all(result == results[0] for result in results)
+        print(f"{name} ({len(records)} records)")
+        for label, runner in runners.items():
+            bench(label, runner, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
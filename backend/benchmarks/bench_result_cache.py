@@ -0,0 +1,73 @@
+"""Benchmark: repeated executions of a deterministic workflow with and without the result cache.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_result_cache [--size 1000] [--runs 50]
+
+Executes the transform graph of ``bench_engines`` through the workflow
+executor with the same input again and again, once as usual (every run
+executes every node) and once with ``langgraphConfig.resultCache`` (runs
+after the first are answered from the cache). Then times cache lookups
+served from memory and from the SQLite disk tier.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from app.models.workflow import Workflow, WorkflowEngine
+from app.services.result_cache import ExecutionResultCache
+from app.services.workflow_executor import WorkflowExecutor
+from benchmarks.bench_engines import graph_definition
+from benchmarks.bench_transforms import make_records
+
+
+async def run(size: int, runs: int):
+    workflow = Workflow(
+        id="bench-result-cache",
+        name="Result cache",
+        engine=WorkflowEngine.LANGGRAPH,
+        createdAt="2024-01-01T00:00:00",
+        updatedAt="2024-01-01T00:00:00"
+    )
+    records = make_records(size)
+    print(f"{runs} executions of the same input ({size} records)")
+    for cached in (False, True):
+        executor = WorkflowExecutor()
+        executor.result_cache = ExecutionResultCache()
+        definition = graph_definition(optimize=True)
+        if cached:
+            definition.langgraphConfig["resultCache"] = True
+        await executor.execute_workflow(workflow, definition, {"records": records})  # Warm the compiled graph
+        started = time.perf_counter()
+        for _ in range(runs):
+            execution = await executor.execute_workflow(workflow, definition, {"records": records})
+        elapsed = (time.perf_counter() - started) / runs
+        label = "result cache" if cached else "no cache"
+        print(f"  {label:<13} {elapsed * 1e3:9.3f} ms/execution   {execution.status.value}, cache hit: {execution.cacheHit}")
+
+    result = {"output": make_records(size)}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, cache in (
+            ("memory", ExecutionResultCache()),
+            ("disk", ExecutionResultCache(max_entries=0, disk_path=directory))
+        ):
+            cache.put("fingerprint", workflow.id, result, 3600)
+            started = time.perf_counter()
+            for _ in range(runs):
+                cache.get("fingerprint")
+            elapsed = (time.perf_counter() - started) / runs
+            print(f"  lookup {label:<6} {elapsed * 1e3:9.3f} ms")
+            cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000, help="records in the workflow input")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.runs))
+
+
+if __name__ == "__main__":
+    main()
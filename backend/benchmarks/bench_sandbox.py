@@ -0,0 +1,91 @@
+"""Benchmark: inline vs sandboxed CPU-heavy transforms, and large payload transfer.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sandbox [--calls 4] [--seconds 0.25] [--megabytes 16]
+
+Runs CPU-bound callable transforms concurrently with a probe that should wake
+every 10 ms, and reports the longest the event loop was blocked. Then sends a
+large string through a worker with shared memory and with plain pickling.
+"""
+from typing import Any, Awaitable, Callable
+import argparse
+import asyncio
+import time
+
+from app.services.transform_sandbox import TransformSandbox
+from app.utils.transforms import get_transform
+
+
+def spin(seconds: float) -> float:
+    """CPU-bound stand-in for a heavy user transform."""
+    ends_at = time.monotonic() + seconds
+    total = 0.0
+    while time.monotonic() < ends_at:
+        total += 1
+    return total
+
+
+async def max_stall(work: Callable[[], Awaitable[Any]]) -> float:
+    """Run work and return the longest gap between 10 ms probe wake-ups."""
+    stall = 0.0
+
+    async def probe():
+        nonlocal stall
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stall = max(stall, time.perf_counter() - started - 0.01)
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    await work()
+    task.cancel()
+    return stall
+
+
+async def run(calls: int, seconds: float, megabytes: int):
+    sandbox = TransformSandbox(max_workers=2, shared_memory_threshold=1024 * 1024)
+    await asyncio.gather(*(sandbox.run(spin, 0) for _ in range(2)))  # Start the workers
+
+    async def inline():
+        transform = get_transform(spin)
+        for _ in range(calls):
+            transform(seconds)
+            await asyncio.sleep(0)
+
+    async def sandboxed():
+        await asyncio.gather(*(sandbox.run(spin, seconds) for _ in range(calls)))
+
+    print(f"{calls} transforms of {seconds * 1e3:.0f} ms CPU each")
+    for label, work in (("inline", inline), ("sandboxed", sandboxed)):
+        started = time.perf_counter()
+        stall = await max_stall(work)
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<10} {elapsed * 1e3:9.1f} ms total   loop blocked up to {stall * 1e3:8.1f} ms")
+
+    sandbox.shutdown()
+
+    text = "x" * (megabytes * 1024 * 1024)
+    print(f"{megabytes} MB string round trip through a worker")
+    for label, threshold in (("shared", 1024 * 1024), ("pickled", 0)):
+        sandbox = TransformSandbox(max_workers=1, shared_memory_threshold=threshold)
+        await sandbox.run("passthrough", text)
+        started = time.perf_counter()
+        for _ in range(5):
+            assert len(await sandbox.run("passthrough", text)) == len(text)
+        print(f"  {label:<10} {(time.perf_counter() - started) / 5 * 1e3:9.1f} ms/call")
+        sandbox.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=0.25, help="CPU time per transform")
+    parser.add_argument("--megabytes", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.seconds, args.megabytes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Tests for execution cancellation."""
+import asyncio
+import time
+import pytest
+import httpx
+from app.utils.cancellation import CancelScope, cancel_scope, run_cancellable, cancellable_sleep_sync
+from app.utils.retry import retry_on_failure, RetryConfig
+from app.services.llm_service import LLMService
+from app.services.mcp_adapter import MCPToolWrapper
+from app.services.workflow_executor import WorkflowExecutor
+from app.models.execution import ExecutionStatus
+from app.models.workflow import WorkflowDefinition
+from app.exceptions import ExecutionCancelledError
+
+
+class SlowLLM:
+    """Stand-in chat model whose calls hang until cancelled."""
+    
+    def __init__(self):
+        self.cancelled = asyncio.Event()
+    
+    async def ainvoke(self, messages, config=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+
+@pytest.mark.asyncio
+async def test_cancel_reaches_calls_in_spawned_tasks():
+    """Test cancelling a scope stops cancellable calls in tasks that inherited it."""
+    scope = CancelScope("exec-1")
+    with cancel_scope(scope):
+        child = asyncio.create_task(run_cancellable(asyncio.sleep(10)))
+    await asyncio.sleep(0.01)
+    
+    started = time.perf_counter()
+    scope.cancel("stop")
+    with pytest.raises(ExecutionCancelledError) as error:
+        await child
+    
+    assert time.perf_counter() - started < 0.1
+    assert error.value.message == "stop"
+    assert error.value.context["execution_id"] == "exec-1"
+
+
+@pytest.mark.asyncio
+async def test_cancel_interrupts_retry_sleep():
+    """Test a cancelled execution stops waiting between retries and is not retried."""
+    calls = []
+    
+    @retry_on_failure(config=RetryConfig(max_attempts=3, initial_delay=10, jitter=False))
+    async def flaky():
+        calls.append(1)
+        raise RuntimeError("unavailable")
+    
+    scope = CancelScope()
+    with cancel_scope(scope):
+        task = asyncio.create_task(flaky())
+    await asyncio.sleep(0.01)
+    scope.cancel()
+    
+    with pytest.raises(ExecutionCancelledError):
+        await asyncio.wait_for(task, 1)
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_cancel_wakes_sleeping_threads():
+    """Test blocking sleeps in worker threads end when the scope is cancelled."""
+    scope = CancelScope()
+    with cancel_scope(scope):
+        sleeper = asyncio.create_task(asyncio.to_thread(cancellable_sleep_sync, 10))
+    await asyncio.sleep(0.01)
+    scope.cancel()
+    
+    with pytest.raises(ExecutionCancelledError):
+        await asyncio.wait_for(sleeper, 1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_tool_call_raises_instead_of_returning_error(monkeypatch):
+    """Test a cancelled MCP tool request aborts the execution rather than reporting a tool error."""
+    async def slow_post(self, *args, **kwargs):
+        await asyncio.sleep(10)
+    
+    monkeypatch.setattr(httpx.AsyncClient, "post", slow_post)
+    tool = MCPToolWrapper(name="search", description="Search", mcp_tool_id="search")
+    scope = CancelScope()
+    with cancel_scope(scope):
+        call = asyncio.create_task(tool._arun(query="x"))
+    await asyncio.sleep(0.01)
+    scope.cancel()
+    
+    with pytest.raises(ExecutionCancelledError):
+        await asyncio.wait_for(call, 1)
+
+
+@pytest.mark.asyncio
+async def test_cancel_execution_stops_in_flight_llm_call(monkeypatch, sample_workflow):
+    """Test cancelling a running execution aborts its LLM call within milliseconds."""
+    executor = WorkflowExecutor()
+    llm = SlowLLM()
+    
+    async def execute_engine(workflow, definition, input_data, execution_id):
+        await LLMService().invoke(llm, [])
+        return {"output": "unreachable"}
+    
+    monkeypatch.setattr(executor, "_execute_engine", execute_engine)
+    workflow = sample_workflow
+    execution = executor.submit_workflow(workflow, WorkflowDefinition(), {"input": "hi"})
+    while execution.status != ExecutionStatus.RUNNING:
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.01)
+    
+    started = time.perf_counter()
+    assert executor.cancel_execution(execution.id) is execution
+    await executor.execution_queue.join()
+    
+    assert time.perf_counter() - started < 0.1
+    assert llm.cancelled.is_set()
+    assert execution.status == ExecutionStatus.CANCELLED
+    assert execution.error == "Execution cancelled by user"
+    assert executor.cancel_execution(execution.id) is None
+    await executor.execution_queue.shutdown()
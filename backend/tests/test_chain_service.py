@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import Mock, patch
 from app.services.chain_service import ChainService
 from app.models.workflow import ChainConfig
-from app.exceptions import LLMExecutionError, TransformExecutionError
+from app.exceptions import LLMExecutionError, TransformExecutionError, WorkflowExecutionError
 
 
 @pytest.mark.asyncio
@@ -44,6 +44,44 @@ async def test_create_transform_chain():
     assert chain is not None
 
 
+def test_transform_chain_uses_shared_transforms():
+    """Test transform chains apply every transform type, in node order."""
+    service = ChainService()
+    
+    config = ChainConfig(
+        chainType="transform",
+        nodes=["split", "count"],
+        transforms={
+            "count": "length",
+            "split": {"type": "split", "config": {"separator": ","}}
+        }
+    )
+    
+    chain = service._create_transform_chain(config)
+    assert chain.invoke({"input": "a,b,c"})["output"] == 3
+
+
+def test_transform_chain_errors():
+    """Test invalid transforms fail at creation and failing transforms at execution."""
+    service = ChainService()
+    
+    with pytest.raises(WorkflowExecutionError) as error:
+        service._create_transform_chain(ChainConfig(
+            chainType="transform",
+            nodes=["stats"],
+            transforms={"stats": {"type": "aggregate", "config": {"operation": "median"}}}
+        ))
+    assert error.value.context["node_id"] == "stats"
+    
+    chain = service._create_transform_chain(ChainConfig(
+        chainType="transform",
+        nodes=["sum"],
+        transforms={"sum": {"type": "aggregate", "config": {"operation": "sum"}}}
+    ))
+    with pytest.raises(TransformExecutionError):
+        chain.invoke({"input": [1, "a"]})
+
+
 @pytest.mark.asyncio
 async def test_execute_chain():
     """Test chain execution."""
@@ -0,0 +1,117 @@
+"""Tests for checkpoint stores."""
+import pytest
+from app.services.checkpoint_store import (
+    InMemoryCheckpointStore,
+    SQLiteCheckpointStore,
+    FileCheckpointStore,
+    CheckpointRecorder,
+    compute_delta,
+    materialize_state
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "file"])
+def make_store(request, tmp_path):
+    """Factory for each checkpoint store backend."""
+    def factory(**kwargs):
+        if request.param == "memory":
+            return InMemoryCheckpointStore(**kwargs)
+        if request.param == "sqlite":
+            return SQLiteCheckpointStore(str(tmp_path / "checkpoints.db"), **kwargs)
+        return FileCheckpointStore(str(tmp_path / "checkpoints"), **kwargs)
+    return factory
+
+
+def test_compute_delta_keeps_changed_keys():
+    """Test deltas only contain changed or new keys."""
+    delta = compute_delta({"input": "x", "output": "a"}, {"input": "x", "output": "b", "node_id": "n"})
+    assert delta == {"output": "b", "node_id": "n"}
+
+
+def test_records_and_materializes(make_store):
+    """Test checkpoints round-trip and rebuild the state."""
+    store = make_store()
+    recorder = CheckpointRecorder(store, "exec-1")
+    recorder.record("initial", {"input": "hi"})
+    recorder.record("node", {"output": "HI"}, node_id="upper")
+    recorder.record("error", {}, node_id="llm", error="boom")
+    
+    checkpoints = store.list("exec-1")
+    assert [c["type"] for c in checkpoints] == ["initial", "node", "error"]
+    assert [c["sequence"] for c in checkpoints] == [1, 2, 3]
+    assert checkpoints[2]["error"] == "boom"
+    assert materialize_state(checkpoints) == {"input": "hi", "output": "HI"}
+    assert materialize_state(checkpoints, upto=1) == {"input": "hi"}
+
+
+def test_per_execution_limit_compacts_into_snapshot(make_store):
+    """Test older checkpoints are folded into a snapshot."""
+    store = make_store(max_checkpoints_per_execution=3)
+    recorder = CheckpointRecorder(store, "exec-1")
+    recorder.record("initial", {"input": 0})
+    for i in range(1, 6):
+        recorder.record("node", {"output": i, f"step_{i}": True}, node_id=f"n{i}")
+    store.flush()
+    
+    checkpoints = store.list("exec-1")
+    assert len(checkpoints) == 3
+    assert checkpoints[0]["type"] == "snapshot"
+    assert checkpoints[-1]["sequence"] == 6
+    state = materialize_state(checkpoints)
+    assert state["output"] == 5
+    assert all(state[f"step_{i}"] for i in range(1, 6))
+
+
+def test_max_executions_evicts_oldest(make_store):
+    """Test the store keeps only the most recent executions."""
+    store = make_store(max_executions=2)
+    for i in range(4):
+        CheckpointRecorder(store, f"exec-{i}").record("initial", {"input": i})
+    store.flush()
+    
+    assert store.list("exec-0") == []
+    assert len(store.list("exec-3")) == 1
+    assert len(store.execution_ids()) == 2
+
+
+def test_delete(make_store):
+    """Test deleting an execution's checkpoints."""
+    store = make_store()
+    CheckpointRecorder(store, "exec-1").record("initial", {"input": 1})
+    store.delete("exec-1")
+    assert store.list("exec-1") == []
+
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    """Test SQLite checkpoints persist across store instances."""
+    path = str(tmp_path / "checkpoints.db")
+    store = SQLiteCheckpointStore(path)
+    CheckpointRecorder(store, "exec-1").record("initial", {"input": "persisted"})
+    store.close()
+    
+    reopened = SQLiteCheckpointStore(path)
+    recorder = CheckpointRecorder(reopened, "exec-1")
+    recorder.record("node", {"output": 1}, node_id="n")
+    assert [c["sequence"] for c in reopened.list("exec-1")] == [1, 2]
+
+
+@pytest.mark.parametrize("store_class", [SQLiteCheckpointStore, FileCheckpointStore])
+def test_persistent_stores_write_in_background(store_class, tmp_path):
+    """Test recording only queues checkpoints, which are listed before and after the writer runs."""
+    store = store_class(str(tmp_path / "checkpoints"), flush_interval_ms=60000, max_checkpoints_per_execution=2)
+    recorder = CheckpointRecorder(store, "exec-1")
+    recorder.record("initial", {"input": 1})
+    recorder.record("node", {"output": 2}, node_id="n")
+    recorder.record("node", {"output": 3}, node_id="n")
+    
+    assert store._load("exec-1") == []
+    assert [c["sequence"] for c in store.list("exec-1")] == [1, 2, 3]
+    
+    store.flush()
+    assert [c["sequence"] for c in store._load("exec-1")] == [2, 3]
+    assert materialize_state(store.list("exec-1")) == {"input": 1, "output": 3}
+    
+    recorder.record("node", {"output": 4}, node_id="n")
+    store.flush()
+    assert [c["sequence"] for c in store._load("exec-1")] == [3, 4]
+    store.close()
@@ -0,0 +1,59 @@
+"""Tests for bounded concurrency helpers."""
+import asyncio
+import pytest
+from app.utils.concurrency import run_bounded
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_limits_in_flight_calls():
+    """Test no more than the limit of calls run at once."""
+    active = 0
+    peak = 0
+    
+    async def work(item):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return item * 2
+    
+    results = [entry async for entry in run_bounded(range(10), work, limit=3)]
+    
+    assert peak == 3
+    assert sorted(results) == [(i, i * 2) for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_yields_in_completion_order_and_errors():
+    """Test results stream as they finish and errors do not abort other items."""
+    async def work(delay):
+        await asyncio.sleep(delay)
+        if delay == 0.02:
+            raise ValueError("bad item")
+        return delay
+    
+    results = [entry async for entry in run_bounded([0.05, 0.0, 0.02], work, limit=3)]
+    
+    assert [index for index, _ in results] == [1, 2, 0]
+    assert isinstance(results[1][1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_close_cancels_workers():
+    """Test closing the iterator early cancels in-flight calls."""
+    cancelled = []
+    
+    async def work(item):
+        try:
+            await asyncio.sleep(0 if item == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+        return item
+    
+    results = run_bounded(range(3), work, limit=3)
+    assert await results.__anext__() == (0, 0)
+    await results.aclose()
+    
+    assert sorted(cancelled) == [1, 2]
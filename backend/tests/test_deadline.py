@@ -0,0 +1,61 @@
+"""Tests for execution deadlines."""
+import asyncio
+import pytest
+from app.utils.deadline import deadline_scope, effective_timeout, remaining_time, run_with_timeout
+from app.utils.retry import retry_on_failure, RetryConfig
+from app.exceptions import ExecutionTimeoutError
+
+
+def test_no_deadline_by_default():
+    """Test there is no remaining budget outside a deadline scope."""
+    assert remaining_time() is None
+    assert effective_timeout(5.0) == 5.0
+
+
+def test_nested_scope_never_extends_outer_deadline():
+    """Test the earlier of nested deadlines wins."""
+    with deadline_scope(100) as outer:
+        with deadline_scope(10000) as inner:
+            assert inner is outer
+            assert effective_timeout(30.0) <= 0.1
+        with deadline_scope(10) as inner:
+            assert inner is not outer
+            assert remaining_time() <= 0.01
+
+
+@pytest.mark.asyncio
+async def test_run_with_timeout_node_timeout():
+    """Test a local timeout raises an ExecutionTimeoutError naming the node."""
+    with pytest.raises(ExecutionTimeoutError) as exc_info:
+        await run_with_timeout(asyncio.sleep(1), timeout=0.01, node_id="slow")
+    
+    assert exc_info.value.context["node_id"] == "slow"
+    assert exc_info.value.context["timeout_ms"] == 10
+    assert "timed out" in exc_info.value.message
+
+
+@pytest.mark.asyncio
+async def test_run_with_timeout_deadline():
+    """Test the deadline bounds calls without a local timeout."""
+    with deadline_scope(10):
+        with pytest.raises(ExecutionTimeoutError) as exc_info:
+            await run_with_timeout(asyncio.sleep(1), timeout=30.0)
+    
+    assert "deadline" in exc_info.value.message
+
+
+@pytest.mark.asyncio
+async def test_retry_skipped_when_deadline_too_short():
+    """Test retries stop when the deadline cannot cover another attempt."""
+    calls = []
+    
+    @retry_on_failure(config=RetryConfig(max_attempts=3, initial_delay=0.5, jitter=False))
+    async def flaky():
+        calls.append(1)
+        raise RuntimeError("unavailable")
+    
+    with deadline_scope(200):
+        with pytest.raises(RuntimeError):
+            await flaky()
+    
+    assert len(calls) == 1
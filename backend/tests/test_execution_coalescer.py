@@ -0,0 +1,65 @@
+"""Tests for idempotency keys and coalescing of identical executions."""
+import asyncio
+import pytest
+from app.services.execution_coalescer import ExecutionCoalescer, compute_execution_fingerprint
+from app.services.workflow_executor import WorkflowExecutor
+from app.models.execution import ExecutionStatus
+from app.models.workflow import WorkflowDefinition
+from app.exceptions import IdempotencyKeyConflictError
+
+
+def test_fingerprint_ignores_layout_and_key_order(sample_workflow):
+    """Test fingerprints depend on definition and input content, not layout or key order."""
+    workflow = sample_workflow
+    definition = WorkflowDefinition(viewport={"x": 0})
+    moved = WorkflowDefinition(viewport={"x": 100})
+    
+    assert compute_execution_fingerprint(workflow, definition, {"a": 1, "b": 2}) == \
+        compute_execution_fingerprint(workflow, moved, {"b": 2, "a": 1})
+    assert compute_execution_fingerprint(workflow, definition, {"a": 1}) != \
+        compute_execution_fingerprint(workflow, definition, {"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_idempotency_keys_replay_and_expire():
+    """Test a key maps to its execution, rejects other requests and expires."""
+    coalescer = ExecutionCoalescer(idempotency_ttl_seconds=60)
+    coalescer.register("exec-1", "wf-1", "fingerprint-a", idempotency_key="key-1")
+    
+    assert coalescer.find("wf-1", "fingerprint-a", "key-1") == "exec-1"
+    assert coalescer.find("wf-2", "fingerprint-a", "key-1") is None
+    with pytest.raises(IdempotencyKeyConflictError) as error:
+        coalescer.find("wf-1", "fingerprint-b", "key-1")
+    assert error.value.context["idempotency_key"] == "key-1"
+    
+    coalescer._keys[("wf-1", "key-1")] = ("fingerprint-a", "exec-1", 0)
+    assert coalescer.find("wf-1", "fingerprint-a", "key-1") is None
+
+
+@pytest.mark.asyncio
+async def test_identical_executions_share_one_run(monkeypatch, sample_workflow):
+    """Test an identical request attaches to the execution in flight instead of running again."""
+    executor = WorkflowExecutor()
+    calls = []
+    
+    async def execute_engine(workflow, definition, input_data, execution_id):
+        calls.append(execution_id)
+        await asyncio.sleep(0.05)
+        return {"output": input_data["text"].upper()}
+    
+    monkeypatch.setattr(executor, "_execute_engine", execute_engine)
+    workflow = sample_workflow
+    definition = WorkflowDefinition(langgraphConfig={"coalesce": True})
+    
+    leader = asyncio.create_task(executor.execute_workflow(workflow, definition, {"text": "hi"}))
+    await asyncio.sleep(0.01)
+    follower = executor.find_duplicate(workflow, definition, {"text": "hi"})
+    other = executor.find_duplicate(workflow, definition, {"text": "bye"})
+    shared = await executor.wait_for_execution(follower)
+    
+    assert other is None
+    assert shared is await leader
+    assert shared.status == ExecutionStatus.COMPLETED and shared.output == "HI"
+    assert len(calls) == 1
+    assert executor.find_duplicate(workflow, definition, {"text": "hi"}) is None
+    assert executor.coalescer.stats()["coalesced"] == 1
@@ -0,0 +1,247 @@
+"""Tests for the execution queue and submitted executions."""
+import asyncio
+import pytest
+from app.services.execution_queue import ExecutionQueue
+from app.services.workflow_executor import WorkflowExecutor
+from app.models.execution import ExecutionStatus
+from app.models.workflow import WorkflowDefinition, WorkflowNode, WorkflowConnection
+from app.exceptions import ExecutionCancelledError, ExecutionQueueFullError
+
+
+@pytest.mark.asyncio
+async def test_workers_drain_queue_within_engine_limits():
+    """Test queued executions all run, never more at once than the engine limit."""
+    queue = ExecutionQueue(workers=4, engine_limits={"langchain": 1})
+    running = {"langgraph": 0, "langchain": 0}
+    peak = {"langgraph": 0, "langchain": 0}
+
+    def job(engine):
+        async def run():
+            running[engine] += 1
+            peak[engine] = max(peak[engine], running[engine])
+            await asyncio.sleep(0.01)
+            running[engine] -= 1
+        return run
+
+    for index in range(6):
+        engine = "langchain" if index % 2 else "langgraph"
+        queue.submit(f"execution-{index}", engine, job(engine))
+    await queue.join()
+
+    assert peak["langchain"] == 1
+    assert peak["langgraph"] == 3
+    assert queue.stats()["queued"] == 0
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_submissions():
+    """Test submissions beyond the queue size fail fast, and failing jobs don't stop workers."""
+    queue = ExecutionQueue(workers=1, max_size=2)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    queue.submit("running", "langgraph", blocked)
+    await asyncio.sleep(0)
+    queue.submit("queued-1", "langgraph", failing)
+    queue.submit("queued-2", "langgraph", blocked)
+    with pytest.raises(ExecutionQueueFullError) as error:
+        queue.submit("rejected", "langgraph", blocked)
+
+    assert error.value.context["max_size"] == 2
+    release.set()
+    await queue.join()
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_submitted_execution_runs_in_background(sample_workflow):
+    """Test submit_workflow returns a queued execution that a worker completes."""
+    executor = WorkflowExecutor()
+    workflow = sample_workflow
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="input-1", type="input", label="Input", data={}),
+            WorkflowNode(id="length", type="transform", label="Length", data={"transform": "length"})
+        ],
+        connections=[WorkflowConnection(id="c1", source="input-1", target="length")]
+    )
+
+    execution = executor.submit_workflow(workflow, definition, {"a": 1, "b": 2})
+
+    assert execution.status == ExecutionStatus.QUEUED
+    assert executor.get_execution(execution.id) is execution
+    await executor.execution_queue.join()
+    assert execution.status == ExecutionStatus.COMPLETED
+    assert execution.output == 2
+    assert execution.queuedAt <= execution.startedAt
+    await executor.execution_queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lanes_share_workers_by_weight():
+    """Test a weighted lane overtakes a backlog in a lighter lane instead of waiting behind it."""
+    queue = ExecutionQueue(workers=1, lanes={"interactive": {"weight": 4}, "batch": {"weight": 1}})
+    order = []
+    release = asyncio.Event()
+    
+    def job(name):
+        async def run():
+            order.append(name)
+            await release.wait()
+        return run
+    
+    for index in range(10):
+        queue.submit(f"batch-{index}", "langgraph", job("batch"), "batch")
+    await asyncio.sleep(0)
+    for index in range(4):
+        queue.submit(f"interactive-{index}", "langgraph", job("interactive"), "interactive")
+    release.set()
+    await queue.join()
+    
+    # Interactive runs overtake the batch backlog as soon as the running batch item finishes
+    assert order[:6] == ["batch"] + ["interactive"] * 4 + ["batch"]
+    assert order.count("batch") == 10
+    assert queue.stats()["lanes"]["interactive"]["dispatched"] == 4
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lane_quota_reserves_workers():
+    """Test a lane at its running quota leaves the remaining workers to other lanes."""
+    queue = ExecutionQueue(workers=2, lanes={"interactive": {}, "batch": {"maxRunning": 1, "maxQueued": 2}})
+    release = asyncio.Event()
+    
+    async def blocked():
+        await release.wait()
+    
+    queue.submit("batch-1", "langgraph", blocked, "batch")
+    queue.submit("batch-2", "langgraph", blocked, "batch")
+    await asyncio.sleep(0)
+    with pytest.raises(ExecutionQueueFullError) as error:
+        queue.submit("batch-3", "langgraph", blocked, "batch")
+        queue.submit("batch-4", "langgraph", blocked, "batch")
+    assert error.value.context["lane"] == "batch"
+    with pytest.raises(ValueError):
+        queue.submit("unknown", "langgraph", blocked, "bulk")
+    
+    result = await asyncio.wait_for(queue.run("langgraph", lambda: asyncio.sleep(0, result="done")), 1)
+    
+    assert result == "done"
+    assert queue.stats()["lanes"]["batch"]["running"] == 1
+    release.set()
+    await queue.join()
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_max_size_caps_waiting_executions_across_lanes():
+    """Test the queue's max_size applies to all lanes together, on top of each lane's limit."""
+    queue = ExecutionQueue(workers=1, max_size=3, lanes={"interactive": {"maxQueued": 2}, "batch": {"maxQueued": 2}})
+    release = asyncio.Event()
+    
+    async def blocked():
+        await release.wait()
+    
+    queue.submit("running", "langgraph", blocked)
+    await asyncio.sleep(0)
+    queue.submit("interactive-1", "langgraph", blocked)
+    queue.submit("batch-1", "langgraph", blocked, "batch")
+    queue.submit("batch-2", "langgraph", blocked, "batch")
+    with pytest.raises(ExecutionQueueFullError) as error:
+        queue.submit("interactive-2", "langgraph", blocked)
+    
+    assert error.value.context["max_size"] == 3
+    release.set()
+    await queue.join()
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_caller_that_stops_waiting_cancels_running_call():
+    """Test cancelling a run() caller cancels its call while it runs, and the worker carries on."""
+    queue = ExecutionQueue(workers=1)
+    started = asyncio.Event()
+    stopped = asyncio.Event()
+    
+    async def long_running():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        finally:
+            stopped.set()
+    
+    caller = asyncio.create_task(queue.run("langgraph", long_running))
+    await started.wait()
+    caller.cancel()
+    
+    await asyncio.wait_for(stopped.wait(), 1)
+    assert await asyncio.wait_for(queue.run("langgraph", lambda: asyncio.sleep(0, result="ok")), 1) == "ok"
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_and_shutdown_never_leave_callers_waiting():
+    """Test run() callers get ExecutionCancelledError on cancellation or shutdown and workers survive."""
+    queue = ExecutionQueue(workers=1, lanes={"interactive": {}, "batch": {"maxRunning": 1}})
+    
+    async def cancelled():
+        raise asyncio.CancelledError()
+    
+    with pytest.raises(ExecutionCancelledError):
+        await asyncio.wait_for(queue.run("langgraph", cancelled, "batch"), 1)
+    assert await asyncio.wait_for(queue.run("langgraph", lambda: asyncio.sleep(0, result="ok")), 1) == "ok"
+    
+    started = asyncio.Event()
+    
+    async def blocked():
+        started.set()
+        await asyncio.sleep(10)
+    
+    running = asyncio.create_task(queue.run("langgraph", blocked, "batch"))
+    waiting = asyncio.create_task(queue.run("langgraph", blocked, "batch"))
+    await started.wait()
+    await queue.shutdown()
+    
+    for call in (running, waiting):
+        with pytest.raises(ExecutionCancelledError):
+            await asyncio.wait_for(call, 1)
+
+
+@pytest.mark.asyncio
+async def test_shutdown_fails_unfinished_executions_and_releases_waiters(monkeypatch, sample_workflow):
+    """Test executions interrupted or dropped at shutdown are failed and their followers released."""
+    executor = WorkflowExecutor()
+    executor.execution_queue = ExecutionQueue(workers=1)
+    started = asyncio.Event()
+    
+    async def execute_engine(workflow, definition, input_data, execution_id):
+        started.set()
+        await asyncio.sleep(10)
+        return {"output": "late"}
+    
+    monkeypatch.setattr(executor, "_execute_engine", execute_engine)
+    workflow = sample_workflow
+    definition = WorkflowDefinition()
+    running = executor.submit_workflow(workflow, definition, {"n": 1})
+    queued = executor.submit_workflow(workflow, definition, {"n": 2}, idempotency_key="retry-2")
+    await started.wait()
+    follower = asyncio.create_task(
+        executor.wait_for_execution(executor.find_duplicate(workflow, definition, {"n": 2}, "retry-2"))
+    )
+    await asyncio.sleep(0)
+    
+    await executor.execution_queue.shutdown()
+    
+    assert (await asyncio.wait_for(follower, 1)) is queued
+    for execution in (running, queued):
+        assert execution.status == ExecutionStatus.FAILED
+        assert executor.execution_store.get(execution.id).status == ExecutionStatus.FAILED
+    assert "shut down" in queued.error
+    assert executor.coalescer.stats()["inFlight"] == 0
+
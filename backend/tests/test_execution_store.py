@@ -0,0 +1,232 @@
+"""Tests for the execution history stores."""
+import subprocess
+import sys
+import pytest
+from app.services.execution_store import InMemoryExecutionStore, SQLiteExecutionStore, execution_size
+from app.models.execution import WorkflowExecution, ExecutionStatus
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Factory for each execution store backend."""
+    stores = []
+    
+    def factory(**kwargs):
+        if request.param == "memory":
+            store = InMemoryExecutionStore(**kwargs)
+        else:
+            store = SQLiteExecutionStore(str(tmp_path / "executions.db"), **kwargs)
+        stores.append(store)
+        return store
+    
+    yield factory
+    for store in stores:
+        store.close()
+
+
+def make_execution(index: int, workflow_id: str = "wf-1", status=ExecutionStatus.COMPLETED, **kwargs):
+    return WorkflowExecution(
+        id=f"exec-{index}",
+        workflowId=workflow_id,
+        status=status,
+        startedAt=f"2024-01-01T00:00:{index:02d}",
+        **kwargs
+    )
+
+
+def test_latest_returns_newest_first_per_workflow():
+    """Test latest executions come from the workflow's index, newest first."""
+    store = InMemoryExecutionStore()
+    for index in range(6):
+        store.save(make_execution(index, "wf-1" if index % 2 else "wf-2"))
+    store.save(make_execution(0, "wf-3").model_copy(update={"id": "late", "startedAt": "2023-12-31T00:00:00"}))
+    
+    assert [e.id for e in store.latest("wf-1", 2)] == ["exec-5", "exec-3"]
+    assert [e.id for e in store.latest("wf-2", 10)] == ["exec-4", "exec-2", "exec-0"]
+    assert store.latest("missing") == []
+    assert store.get("exec-3").workflowId == "wf-1"
+    
+    store.delete("exec-5")
+    assert [e.id for e in store.latest("wf-1", 2)] == ["exec-3", "exec-1"]
+    assert store.stats()["workflows"] == 3
+
+
+def test_count_limit_evicts_oldest_finished_executions():
+    """Test the count limit drops the oldest finished executions but keeps running ones."""
+    store = InMemoryExecutionStore(max_executions=3)
+    store.save(make_execution(0, status=ExecutionStatus.RUNNING))
+    for index in range(1, 5):
+        store.save(make_execution(index))
+    
+    assert len(store) == 3
+    assert store.get("exec-0") is not None
+    assert store.get("exec-1") is None and store.get("exec-2") is None
+    assert [e.id for e in store.latest("wf-1", 10)] == ["exec-4", "exec-3", "exec-0"]
+    assert store.stats()["evicted"] == 2
+
+
+def test_byte_limit_counts_updated_executions():
+    """Test the byte limit tracks executions whose output grew after they were stored."""
+    small = execution_size(make_execution(0))
+    store = InMemoryExecutionStore(max_bytes=small * 3)
+    for index in range(3):
+        store.save(make_execution(index))
+    
+    execution = store.get("exec-2")
+    execution.output = {"text": "x" * small}
+    store.save(execution)
+    
+    assert store.get("exec-0") is None
+    assert store.get("exec-2") is not None
+    assert store.stats()["bytes"] <= small * 3
+
+
+def test_ttl_drops_expired_executions():
+    """Test executions older than the TTL are dropped on the next insert."""
+    store = InMemoryExecutionStore(ttl_seconds=60)
+    store.save(make_execution(0))
+    store._entries["exec-0"].created -= 120
+    store.save(make_execution(1))
+    
+    assert store.get("exec-0") is None
+    assert [e.id for e in store.latest("wf-1")] == ["exec-1"]
+
+
+def test_retention_skips_running_executions_in_place():
+    """Test running executions keep their place, so eviction stays oldest first and expired ones behind them go."""
+    store = InMemoryExecutionStore(max_executions=3, ttl_seconds=60)
+    store.save(make_execution(0, status=ExecutionStatus.RUNNING))
+    store.save(make_execution(1))
+    store.save(make_execution(2))
+    store._entries["exec-0"].created -= 120
+    store._entries["exec-1"].created -= 120
+    
+    store.save(make_execution(3))
+    assert list(store._entries) == ["exec-0", "exec-2", "exec-3"]
+    
+    finished = store.get("exec-0").model_copy(update={"status": ExecutionStatus.COMPLETED})
+    store.save(finished)
+    store.save(make_execution(4))
+    store.save(make_execution(5))
+    assert list(store._entries) == ["exec-3", "exec-4", "exec-5"]
+
+
+def test_ttl_applies_without_inserts():
+    """Test expired executions are dropped when read, not only when another one is inserted."""
+    store = InMemoryExecutionStore(ttl_seconds=60)
+    store.save(make_execution(0))
+    store.save(make_execution(1))
+    store._entries["exec-0"].created -= 120
+    
+    assert [e.id for e in store.latest("wf-1")] == ["exec-1"]
+    store._entries["exec-1"].created -= 120
+    assert store.get("exec-1") is None
+    assert store.stats()["executions"] == 0
+
+
+def test_cursor_pagination(make_store):
+    """Test cursors walk a workflow's history page by page, with status filters."""
+    store = make_store()
+    for index in range(7):
+        status = ExecutionStatus.FAILED if index % 3 == 0 else ExecutionStatus.COMPLETED
+        store.save(make_execution(index, output={"output": index}, status=status))
+    store.save(make_execution(9, "wf-2"))
+    
+    pages, cursor = [], None
+    while True:
+        page, cursor = store.page("wf-1", 3, cursor=cursor)
+        pages.append([e.id for e in page])
+        if cursor is None:
+            break
+    
+    assert pages == [["exec-6", "exec-5", "exec-4"], ["exec-3", "exec-2", "exec-1"], ["exec-0"]]
+    failed, cursor = store.page("wf-1", 10, status=ExecutionStatus.FAILED)
+    assert [e.id for e in failed] == ["exec-6", "exec-3", "exec-0"] and cursor is None
+    summaries, _ = store.page("wf-1", 1, payload=False)
+    assert summaries[0].output is None and summaries[0].status == ExecutionStatus.FAILED
+    assert store.get("exec-6").output == {"output": 6}
+    with pytest.raises(ValueError):
+        store.page("wf-1", cursor="not-a-cursor")
+
+
+def test_sqlite_store_persists_compressed_payloads(tmp_path):
+    """Test executions survive a reopen, large payloads are compressed and interrupted runs fail."""
+    path = str(tmp_path / "executions.db")
+    store = SQLiteExecutionStore(path, flush_interval_ms=10, compress_threshold=100)
+    store.save(make_execution(1, output={"text": "x" * 10000}))
+    store.save(make_execution(2, status=ExecutionStatus.RUNNING))
+    store.close()
+    
+    store = SQLiteExecutionStore(path)
+    size = store._conn.execute("SELECT LENGTH(output) FROM executions WHERE id = 'exec-1'").fetchone()[0]
+    assert size < 1000
+    assert store.get("exec-1").output == {"text": "x" * 10000}
+    interrupted = store.get("exec-2")
+    assert interrupted.status == ExecutionStatus.FAILED
+    assert interrupted.error == "Interrupted by a restart"
+    assert store.stats()["executions"] == 2
+    store.close()
+
+
+def test_sqlite_store_fails_only_orphaned_executions(tmp_path):
+    """Test opening a store shared with a live process leaves its running executions alone."""
+    path = str(tmp_path / "executions.db")
+    sibling = SQLiteExecutionStore(path)
+    for index in range(3):
+        sibling.save(make_execution(index, status=ExecutionStatus.RUNNING))
+    sibling.flush()
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    host = sibling.owner.split(":")[0]
+    sibling._conn.execute("UPDATE executions SET owner = ? WHERE id = 'exec-1'", (f"{host}:{exited.stdout.strip()}:0",))
+    sibling._conn.execute("UPDATE executions SET owner = NULL WHERE id = 'exec-2'")
+    
+    store = SQLiteExecutionStore(path)
+    
+    assert store.get("exec-0").status == ExecutionStatus.RUNNING
+    assert store.get("exec-1").status == ExecutionStatus.FAILED
+    assert store.get("exec-2").status == ExecutionStatus.FAILED
+    store.close()
+    sibling.close()
+
+
+def test_sqlite_retention_keeps_a_running_count(tmp_path):
+    """Test the row count follows inserts, updates and evictions without counting the table."""
+    store = SQLiteExecutionStore(str(tmp_path / "executions.db"), flush_interval_ms=60000, max_executions=3)
+    for index in range(3):
+        store.save(make_execution(index, status=ExecutionStatus.RUNNING))
+    store.flush()
+    for index in range(3):
+        store.save(make_execution(index))
+    store.save(make_execution(3))
+    store.save(make_execution(4))
+    store._retention_checked = 0.0
+    store.flush()
+    
+    assert store._count == 3
+    assert store.stats()["executions"] == 3 and store.stats()["evicted"] == 2
+    store.delete("exec-4")
+    assert store._count == 2
+    store.close()
+
+
+def test_sqlite_pages_merge_unwritten_executions(tmp_path):
+    """Test history pages include executions waiting to be written without forcing a write."""
+    store = SQLiteExecutionStore(str(tmp_path / "executions.db"), flush_interval_ms=60000, batch_size=1000)
+    for index in range(4):
+        store.save(make_execution(index, status=ExecutionStatus.RUNNING))
+    store.flush()
+    store.save(make_execution(1, status=ExecutionStatus.FAILED))
+    store.save(make_execution(5))
+    
+    page, cursor = store.page("wf-1", 2)
+    rest, last = store.page("wf-1", 10, cursor=cursor)
+    failed, _ = store.page("wf-1", 10, status=ExecutionStatus.FAILED)
+    running, _ = store.page("wf-1", 10, status=ExecutionStatus.RUNNING)
+    
+    assert [e.id for e in page] == ["exec-5", "exec-3"]
+    assert [e.id for e in rest] == ["exec-2", "exec-1", "exec-0"] and last is None
+    assert [e.id for e in failed] == ["exec-1"]
+    assert [e.id for e in running] == ["exec-3", "exec-2", "exec-0"]
+    assert store.stats()["pending"] == 2
+    store.close()
+
@@ -0,0 +1,51 @@
+"""Tests for predicate expressions."""
+import pytest
+from app.utils.expressions import compile_predicate
+
+
+def test_comparison_on_nested_state():
+    """Test dotted and indexed access into state."""
+    predicate = compile_predicate("output.score > 0.5 and output.tags[0] == 'urgent'")
+    
+    assert predicate({"output": {"score": 0.9, "tags": ["urgent"]}}) is True
+    assert predicate({"output": {"score": 0.1, "tags": ["urgent"]}}) is False
+
+
+def test_missing_keys_are_none():
+    """Test missing keys evaluate to None instead of raising."""
+    predicate = compile_predicate("output.result is None")
+    
+    assert predicate({}) is True
+
+
+def test_functions_and_membership():
+    """Test whitelisted functions and the in operator."""
+    predicate = compile_predicate("'error' in lower(output) or len(input) > 10")
+    
+    assert predicate({"output": "Error: timeout", "input": ""}) is True
+    assert predicate({"output": "ok", "input": "short"}) is False
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')",
+    "output.__class__",
+    "open('file')",
+    "[x for x in output]",
+    "lambda: 1",
+    "output =",
+    "'a' * 40000 * 40000",
+    "2 * [1, 2]"
+])
+def test_disallowed_syntax_rejected(expression):
+    """Test unsafe or invalid expressions are rejected at compile time."""
+    with pytest.raises(ValueError):
+        compile_predicate(expression)
+
+
+def test_sequence_repetition_is_false():
+    """Test multiplying state strings or lists fails as false while numbers still multiply."""
+    predicate = compile_predicate("len(output * count) > 0")
+    
+    assert predicate({"output": "a", "count": 40000}) is False
+    assert predicate({"output": ["a"], "count": 40000}) is False
+    assert compile_predicate("output.score * 2 > 1")({"output": {"score": 0.9}}) is True
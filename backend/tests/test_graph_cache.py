@@ -0,0 +1,57 @@
+"""Tests for GraphCache."""
+import pytest
+from app.utils.graph_cache import GraphCache, compute_definition_hash
+from app.models.workflow import WorkflowDefinition, WorkflowNode
+
+
+def test_definition_hash_ignores_layout(sample_workflow_definition):
+    """Test that node positions and viewport do not change the hash."""
+    moved = sample_workflow_definition.model_copy(deep=True)
+    moved.nodes[0].position = {"x": 100, "y": 200}
+    moved.viewport = {"zoom": 2}
+    
+    assert compute_definition_hash(moved) == compute_definition_hash(sample_workflow_definition)
+
+
+def test_definition_hash_changes_with_config(sample_workflow_definition):
+    """Test that node configuration changes the hash."""
+    changed = sample_workflow_definition.model_copy(deep=True)
+    changed.nodes[1].data = {"llm": {"provider": "anthropic", "model": "claude-3"}}
+    
+    assert compute_definition_hash(changed) != compute_definition_hash(sample_workflow_definition)
+
+
+def test_lru_eviction():
+    """Test least recently used entries are evicted first."""
+    cache = GraphCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_hit_miss_counters():
+    """Test hit and miss counters."""
+    cache = GraphCache()
+    assert cache.get("missing") is None
+    cache.put("key", "graph")
+    assert cache.get("key") == "graph"
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hitRate"] == 0.5
+
+
+def test_invalidate():
+    """Test explicit invalidation."""
+    cache = GraphCache()
+    cache.put("key", "graph")
+    
+    assert cache.invalidate("key") is True
+    assert cache.invalidate("key") is False
+    assert len(cache) == 0
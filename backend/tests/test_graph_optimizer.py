@@ -0,0 +1,127 @@
+"""Tests for the static graph optimizer."""
+from app.utils.graph_optimizer import optimize_graph
+from app.services.node_handlers import is_passthrough_node
+
+
+def _node(node_id, node_type="transform", **config):
+    return {"id": node_id, "type": node_type, "config": config}
+
+
+def _edges(*pairs):
+    return [{"source": source, "target": target} for source, target in pairs]
+
+
+def _optimize(nodes, edges):
+    return optimize_graph({"nodes": nodes, "edges": edges}, is_passthrough_node)
+
+
+def _ids(graph_config):
+    return [node["id"] for node in graph_config["nodes"]]
+
+
+def test_unreachable_nodes_pruned():
+    """Test nodes not reachable from the entry node are removed with their edges."""
+    graph_config, report = _optimize(
+        [_node("in", "input"), _node("a", "llm"), _node("dead", "llm"), _node("dead2", "llm")],
+        _edges(("in", "a"), ("dead", "dead2"))
+    )
+    
+    assert _ids(graph_config) == ["in", "a"]
+    assert graph_config["edges"] == _edges(("in", "a"))
+    assert report["prunedNodes"] == ["dead", "dead2"]
+
+
+def test_passthrough_chain_collapsed():
+    """Test passthrough and output nodes on a linear path are spliced out."""
+    graph_config, report = _optimize(
+        [_node("in", "input"), _node("a", "llm"), _node("noop"), _node("b", "llm"), _node("out", "output")],
+        _edges(("in", "a"), ("a", "noop"), ("noop", "b"), ("b", "out"))
+    )
+    
+    assert _ids(graph_config) == ["in", "a", "b"]
+    assert graph_config["edges"] == _edges(("in", "a"), ("a", "b"))
+    assert report["collapsedNodes"] == ["noop", "out"]
+
+
+def test_passthrough_in_fan_out_kept():
+    """Test a passthrough branch of a fan-out is kept so its join sees the same branches."""
+    graph_config, report = _optimize(
+        [_node("in", "input"), _node("a", "llm"), _node("out", "output"), _node("join", "llm")],
+        _edges(("in", "a"), ("in", "out"), ("a", "join"), ("out", "join"))
+    )
+    
+    assert "out" in _ids(graph_config)
+    assert report["collapsedNodes"] == []
+
+
+def test_condition_branch_sink_routes_to_end():
+    """Test collapsing an output node under a condition routes that branch to END."""
+    graph_config, report = _optimize(
+        [_node("in", "input"), _node("check", "condition"), _node("out", "output"), _node("b", "llm")],
+        _edges(("in", "check"), ("check", "out"), ("check", "b"))
+    )
+    
+    assert _ids(graph_config) == ["in", "check", "b"]
+    assert graph_config["edges"] == _edges(("in", "check"), ("check", "END"), ("check", "b"))
+    assert report["collapsedNodes"] == ["out"]
+
+
+def test_adjacent_transforms_fused_into_last_node():
+    """Test a chain of transforms becomes one node keeping the last node's id."""
+    graph_config, report = _optimize(
+        [
+            _node("in", "input"),
+            _node("t1", transform="uppercase"),
+            _node("t2", transform={"type": "pipeline", "config": {"steps": ["trim", "lowercase"]}}),
+            _node("t3", transform="length")
+        ],
+        _edges(("in", "t1"), ("t1", "t2"), ("t2", "t3"))
+    )
+    
+    assert _ids(graph_config) == ["in", "t3"]
+    assert graph_config["edges"] == _edges(("in", "t3"))
+    assert graph_config["nodes"][1]["config"] == {
+        "transform": {"type": "pipeline", "config": {"steps": ["uppercase", "trim", "lowercase", "length"]}}
+    }
+    assert report["fusedNodes"] == {"t3": ["t1", "t2", "t3"]}
+
+
+def test_transforms_with_timeout_or_fan_out_not_fused():
+    """Test transforms with their own timeout or several consumers keep their node."""
+    graph_config, report = _optimize(
+        [
+            _node("in", "input"),
+            _node("t1", transform="uppercase", timeoutMs=100),
+            _node("t2", transform="trim"),
+            _node("t3", transform="length"),
+            _node("t4", transform="lowercase")
+        ],
+        _edges(("in", "t1"), ("t1", "t2"), ("t2", "t3"), ("t2", "t4"))
+    )
+    
+    assert _ids(graph_config) == ["in", "t1", "t2", "t3", "t4"]
+    assert report["fusedNodes"] == {}
+
+
+def test_report_and_input_unchanged():
+    """Test the report counts nodes and the original configuration is not modified."""
+    nodes = [_node("in", "input"), _node("t1", transform="trim"), _node("t2", transform="length")]
+    edges = _edges(("in", "t1"), ("t1", "t2"))
+    
+    graph_config, report = _optimize(nodes, edges)
+    
+    assert report["nodesBefore"] == 3
+    assert report["nodesAfter"] == 2
+    assert nodes[2]["config"] == {"transform": "length"}
+    assert edges == _edges(("in", "t1"), ("t1", "t2"))
+
+
+def test_pipeline_options_survive_fusion():
+    """Test a pipeline with its own options is fused as one nested step."""
+    columnar = {"type": "pipeline", "config": {"steps": ["length"], "columnar": True}}
+    graph_config, _ = _optimize(
+        [_node("in", "input"), _node("t1", transform="trim"), _node("t2", transform=columnar)],
+        _edges(("in", "t1"), ("t1", "t2"))
+    )
+    
+    assert graph_config["nodes"][1]["config"]["transform"]["config"]["steps"] == ["trim", columnar]
@@ -0,0 +1,110 @@
+"""Tests for graph topology planning."""
+import pytest
+from app.utils.graph_planner import find_parallel_regions, compile_condition_routes
+from app.exceptions import GraphCompilationError
+
+
+def _nodes(*ids):
+    return [{"id": node_id, "type": "transform"} for node_id in ids]
+
+
+def _edges(*pairs):
+    return [{"source": source, "target": target} for source, target in pairs]
+
+
+def test_linear_graph_has_no_regions():
+    """Test a linear graph has no parallel regions."""
+    regions = find_parallel_regions(_nodes("a", "b", "c"), _edges(("a", "b"), ("b", "c")))
+    assert regions == []
+
+
+def test_fan_out_with_join():
+    """Test independent branches meeting at a join node."""
+    regions = find_parallel_regions(
+        _nodes("start", "a1", "a2", "b", "join"),
+        _edges(("start", "a1"), ("a1", "a2"), ("start", "b"), ("a2", "join"), ("b", "join"))
+    )
+    
+    assert len(regions) == 1
+    region = regions[0]
+    assert region.source == "start"
+    assert region.branches == [["a1", "a2"], ["b"]]
+    assert region.join == "join"
+    assert region.node_id == "start__parallel"
+
+
+def test_fan_out_to_sinks():
+    """Test branches that all end the graph."""
+    regions = find_parallel_regions(
+        _nodes("start", "a", "b"),
+        _edges(("start", "a"), ("start", "b"))
+    )
+    
+    assert regions[0].join is None
+
+
+def test_mismatched_joins_rejected():
+    """Test branches that do not meet at the same join are rejected."""
+    with pytest.raises(GraphCompilationError):
+        find_parallel_regions(
+            _nodes("start", "a", "b", "x", "y", "join-1", "join-2"),
+            _edges(
+                ("start", "a"), ("start", "b"),
+                ("a", "join-1"), ("x", "join-1"),
+                ("b", "join-2"), ("y", "join-2")
+            )
+        )
+
+
+def test_join_with_outside_predecessor_rejected():
+    """Test a join node fed from outside the branches is rejected."""
+    with pytest.raises(GraphCompilationError):
+        find_parallel_regions(
+            _nodes("start", "a", "b", "other", "join"),
+            _edges(("start", "a"), ("start", "b"), ("a", "join"), ("b", "join"), ("other", "join"))
+        )
+
+
+def test_nested_fan_out_rejected():
+    """Test nested fan-out inside a branch is rejected."""
+    with pytest.raises(GraphCompilationError):
+        find_parallel_regions(
+            _nodes("start", "a", "b", "c", "d"),
+            _edges(("start", "a"), ("start", "b"), ("a", "c"), ("a", "d"))
+        )
+
+
+def test_unknown_edge_target_rejected():
+    """Test edges referencing unknown nodes are rejected."""
+    with pytest.raises(GraphCompilationError):
+        find_parallel_regions(_nodes("a"), _edges(("a", "missing")))
+
+
+def test_condition_routes_true_false_and_default():
+    """Test condition routes select edges by handle."""
+    node_config = {"id": "check", "config": {"condition": "output > 10"}}
+    edges = [
+        {"source": "check", "target": "big", "source_handle": "true"},
+        {"source": "check", "target": "small", "source_handle": "false"}
+    ]
+    router, mapping = compile_condition_routes(node_config, edges)
+    
+    assert mapping[router({"output": 20})] == "big"
+    assert mapping[router({"output": 5})] == "small"
+
+
+def test_condition_routes_end_without_default():
+    """Test unmatched conditions end the graph when no default edge exists."""
+    node_config = {"id": "check", "config": {}}
+    edges = [{"source": "check", "target": "a", "source_handle": "output == 'a'"}]
+    router, mapping = compile_condition_routes(node_config, edges)
+    
+    assert mapping[router({"output": "a"})] == "a"
+    assert mapping[router({"output": "b"})] == "__end__"
+
+
+def test_condition_routes_require_condition_for_boolean_handles():
+    """Test true/false handles require a condition expression."""
+    edges = [{"source": "check", "target": "a", "source_handle": "true"}]
+    with pytest.raises(GraphCompilationError):
+        compile_condition_routes({"id": "check", "config": {}}, edges)
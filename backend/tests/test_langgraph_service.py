@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from app.services.langgraph_service import LanggraphService
 from app.models.workflow import WorkflowDefinition, WorkflowNode, WorkflowConnection
-from app.exceptions import LLMExecutionError, ToolExecutionError
+from app.exceptions import LLMExecutionError, ToolExecutionError, GraphCompilationError
 
 
 @pytest.mark.asyncio
@@ -140,3 +140,396 @@ async def test_stream_execution(sample_workflow_definition):
     assert len(events) > 0
     assert events[-1]["status"] in ["completed", "error"]
 
+
+
+@pytest.mark.asyncio
+async def test_create_graph_uses_cache(sample_workflow_definition):
+    """Test compiled graphs are reused for identical definitions."""
+    service = LanggraphService()
+    graph = await service.create_graph(sample_workflow_definition)
+    same_graph = await service.create_graph(sample_workflow_definition.model_copy(deep=True))
+    
+    assert same_graph is graph
+    assert service.get_graph_cache_stats()["hits"] == 1
+    
+    assert service.invalidate_graph(sample_workflow_definition) is True
+    rebuilt = await service.create_graph(sample_workflow_definition)
+    assert rebuilt is not graph
+
+
+@pytest.mark.asyncio
+async def test_mcp_tools_resolved_at_compile_time():
+    """Test MCP tools are fetched once when the graph is compiled."""
+    service = LanggraphService()
+    
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="tool-1", type="mcp-tool", label="Tool", data={}, mcpToolId="test-tool-1")
+        ],
+        connections=[]
+    )
+    
+    tool = Mock()
+    tool._arun = AsyncMock(return_value="tool result")
+    
+    with patch.object(service.mcp_adapter, 'get_mcp_tool', new=AsyncMock(return_value={"id": "test-tool-1"})) as mock_get, \
+         patch.object(service.mcp_adapter, 'create_langchain_tool', return_value=tool) as mock_create:
+        graph = await service.create_graph(definition)
+        await service.execute_graph(graph, {"query": "a"})
+        await service.execute_graph(graph, {"query": "b"})
+        
+        assert mock_get.await_count == 1
+        assert mock_create.call_count == 1
+        assert tool._arun.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_mcp_tool_fails_compilation():
+    """Test graph compilation fails fast when a tool is missing."""
+    service = LanggraphService()
+    
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="tool-1", type="mcp-tool", label="Tool", data={}, mcpToolId="missing-tool")
+        ],
+        connections=[]
+    )
+    
+    with patch.object(service.mcp_adapter, 'get_mcp_tool', new=AsyncMock(return_value=None)):
+        with pytest.raises(GraphCompilationError):
+            await service.create_graph(definition)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_branches_run_concurrently():
+    """Test independent branches run concurrently and merge at the join node."""
+    import asyncio
+    from app.services.node_handlers import register_node_handler, node_handlers
+    
+    running = {"now": 0, "peak": 0}
+    
+    @register_node_handler("slow")
+    def slow_handler(service, node_config, tool=None):
+        async def node_func(state):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.05)
+            running["now"] -= 1
+            return {"output": node_config["id"], "node_id": node_config["id"]}
+        return node_func
+    
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="input-1", type="input", label="Input", data={}),
+            WorkflowNode(id="search-1", type="slow", label="Search", data={}),
+            WorkflowNode(id="search-2", type="slow", label="Search", data={}),
+            WorkflowNode(id="search-3", type="slow", label="Search", data={}),
+            WorkflowNode(id="output-1", type="output", label="Output", data={})
+        ],
+        connections=[
+            WorkflowConnection(id="c1", source="input-1", target="search-1"),
+            WorkflowConnection(id="c2", source="input-1", target="search-2"),
+            WorkflowConnection(id="c3", source="input-1", target="search-3"),
+            WorkflowConnection(id="c4", source="search-1", target="output-1"),
+            WorkflowConnection(id="c5", source="search-2", target="output-1"),
+            WorkflowConnection(id="c6", source="search-3", target="output-1")
+        ],
+        langgraphConfig={"maxConcurrency": 2}
+    )
+    
+    try:
+        service = LanggraphService()
+        graph = await service.create_graph(definition)
+        result = await service.execute_graph(graph, "query")
+    finally:
+        node_handlers.unregister("slow")
+    
+    assert running["peak"] == 2
+    assert result["output"] == ["search-1", "search-2", "search-3"]
+    assert result["state"]["branch_outputs"]["search-3"] == "search-3"
+    assert result["state"]["input"] == "query"
+
+
+@pytest.mark.asyncio
+async def test_condition_node_runs_selected_branch():
+    """Test condition nodes only run the branch selected by their predicate."""
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="input-1", type="input", label="Input", data={}),
+            WorkflowNode(id="check", type="condition", label="Check", data={"condition": "len(output) > 3"}),
+            WorkflowNode(id="long", type="transform", label="Long", data={"transform": "uppercase"}),
+            WorkflowNode(id="short", type="transform", label="Short", data={"transform": "lowercase"})
+        ],
+        connections=[
+            WorkflowConnection(id="c1", source="input-1", target="check"),
+            WorkflowConnection(id="c2", source="check", target="long", sourceHandle="true"),
+            WorkflowConnection(id="c3", source="check", target="short", sourceHandle="false")
+        ]
+    )
+    
+    service = LanggraphService()
+    graph = await service.create_graph(definition)
+    
+    result = await service.execute_graph(graph, "Hello")
+    assert result["output"] == "HELLO"
+    assert result["state"]["node_id"] == "long"
+    
+    result = await service.execute_graph(graph, "Hi")
+    assert result["output"] == "hi"
+    assert result["state"]["node_id"] == "short"
+
+
+@pytest.mark.asyncio
+async def test_condition_handle_expressions_with_default():
+    """Test predicate expressions on sourceHandle with a default branch."""
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="route", type="condition", label="Route", data={}),
+            WorkflowNode(id="a", type="transform", label="A", data={"transform": "uppercase"}),
+            WorkflowNode(id="b", type="transform", label="B", data={"transform": "length"})
+        ],
+        connections=[
+            WorkflowConnection(id="c1", source="route", target="a", sourceHandle="input == 'shout'"),
+            WorkflowConnection(id="c2", source="route", target="b", sourceHandle="default")
+        ]
+    )
+    
+    service = LanggraphService()
+    graph = await service.create_graph(definition)
+    
+    assert (await service.execute_graph(graph, "shout"))["output"] == "SHOUT"
+    assert (await service.execute_graph(graph, "whisper"))["output"] == 7
+
+
+@pytest.mark.asyncio
+async def test_invalid_condition_expression_fails_compilation():
+    """Test invalid predicate expressions fail graph compilation."""
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="route", type="condition", label="Route", data={}),
+            WorkflowNode(id="a", type="output", label="A", data={})
+        ],
+        connections=[
+            WorkflowConnection(id="c1", source="route", target="a", sourceHandle="__import__('os')")
+        ]
+    )
+    
+    with pytest.raises(GraphCompilationError):
+        await LanggraphService().create_graph(definition)
+
+
+@pytest.mark.asyncio
+async def test_per_node_checkpoints_recorded():
+    """Test each node records a delta checkpoint that rebuilds the final state."""
+    from app.services.checkpoint_store import InMemoryCheckpointStore
+    
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="input-1", type="input", label="Input", data={}),
+            WorkflowNode(id="upper", type="transform", label="Upper", data={"transform": "uppercase"}),
+            WorkflowNode(id="length", type="transform", label="Length", data={"transform": "length"})
+        ],
+        connections=[
+            WorkflowConnection(id="c1", source="input-1", target="upper"),
+            WorkflowConnection(id="c2", source="upper", target="length")
+        ],
+        # Keep the transforms as separate nodes rather than fusing them
+        langgraphConfig={"optimize": False}
+    )
+    
+    service = LanggraphService(checkpoint_store=InMemoryCheckpointStore())
+    graph = await service.create_graph(definition)
+    result = await service.execute_graph(graph, "hello", enable_checkpointing=True, execution_id="exec-1")
+    
+    checkpoints = service.get_checkpoints("exec-1")
+    assert [c["type"] for c in checkpoints] == ["initial", "node", "node", "node", "final"]
+    assert [c["node_id"] for c in checkpoints[1:4]] == ["input-1", "upper", "length"]
+    assert checkpoints[2]["delta"] == {"output": "HELLO", "node_id": "upper"}
+    assert service.get_checkpoint_state("exec-1") == result["state"]
+    
+    service.clear_checkpoints("exec-1")
+    assert service.get_checkpoints("exec-1") == []
+
+
+@pytest.mark.asyncio
+async def test_optimized_graph_matches_unoptimized_output():
+    """Test pruning, collapsing and fusing nodes leaves the graph output unchanged."""
+    from app.services.checkpoint_store import InMemoryCheckpointStore
+    
+    def build_definition(optimize):
+        # Langgraph refuses to compile unreachable nodes, so only the optimized graph gets one
+        orphans = [WorkflowNode(id="orphan", type="llm", label="Orphan", data={})] if optimize else []
+        return WorkflowDefinition(
+            nodes=[
+                WorkflowNode(id="input-1", type="input", label="Input", data={}),
+                WorkflowNode(id="upper", type="transform", label="Upper", data={"transform": "uppercase"}),
+                WorkflowNode(id="noop", type="transform", label="Noop", data={}),
+                WorkflowNode(id="length", type="transform", label="Length", data={"transform": "length"}),
+                WorkflowNode(id="output-1", type="output", label="Output", data={})
+            ] + orphans,
+            connections=[
+                WorkflowConnection(id="c1", source="input-1", target="upper"),
+                WorkflowConnection(id="c2", source="upper", target="noop"),
+                WorkflowConnection(id="c3", source="noop", target="length"),
+                WorkflowConnection(id="c4", source="length", target="output-1")
+            ],
+            langgraphConfig={"optimize": optimize}
+        )
+    
+    service = LanggraphService(checkpoint_store=InMemoryCheckpointStore())
+    graph_config, report = service.plan_graph(build_definition(True))
+    
+    assert [node["id"] for node in graph_config["nodes"]] == ["input-1", "length"]
+    assert report["prunedNodes"] == ["orphan"]
+    assert report["collapsedNodes"] == ["noop", "output-1"]
+    assert report["fusedNodes"] == {"length": ["upper", "length"]}
+    assert service.plan_graph(build_definition(False))[1] is None
+    
+    optimized = await service.create_graph(build_definition(True))
+    unoptimized = await service.create_graph(build_definition(False))
+    optimized_result = await service.execute_graph(optimized, "hello")
+    unoptimized_result = await service.execute_graph(unoptimized, "hello")
+    
+    assert optimized_result["output"] == unoptimized_result["output"] == 5
+
+
+@pytest.mark.asyncio
+async def test_resume_reuses_completed_nodes():
+    """Test resuming a failed execution skips nodes that already completed."""
+    from app.services.node_handlers import register_node_handler, node_handlers
+    from app.services.checkpoint_store import InMemoryCheckpointStore
+    
+    calls = []
+    failures = {"remaining": 1}
+    
+    @register_node_handler("counted")
+    def counted_handler(service, node_config, tool=None):
+        node_id = node_config["id"]
+        
+        async def node_func(state):
+            calls.append(node_id)
+            if node_config["config"].get("flaky") and failures["remaining"]:
+                failures["remaining"] -= 1
+                raise RuntimeError("transient failure")
+            return {"output": f"{state.get('output')}>{node_id}", "node_id": node_id}
+        
+        return node_func
+    
+    try:
+        definition = WorkflowDefinition(
+            nodes=[
+                WorkflowNode(id="input-1", type="input", label="Input", data={}),
+                WorkflowNode(id="research", type="counted", label="Research", data={}),
+                WorkflowNode(id="summarize", type="counted", label="Summarize", data={"flaky": True}),
+                WorkflowNode(id="publish", type="counted", label="Publish", data={})
+            ],
+            connections=[
+                WorkflowConnection(id="c1", source="input-1", target="research"),
+                WorkflowConnection(id="c2", source="research", target="summarize"),
+                WorkflowConnection(id="c3", source="summarize", target="publish")
+            ]
+        )
+        
+        service = LanggraphService(checkpoint_store=InMemoryCheckpointStore())
+        graph = await service.create_graph(definition)
+        
+        with pytest.raises(Exception):
+            await service.execute_graph(graph, "q", enable_checkpointing=True, execution_id="exec-1")
+        assert calls == ["research", "summarize"]
+        assert service.get_checkpoints("exec-1")[-1]["type"] == "error"
+        
+        calls.clear()
+        result = await service.resume_graph(graph, "exec-1")
+        
+        assert calls == ["summarize", "publish"]
+        assert result["replayed_nodes"] == ["input-1", "research"]
+        assert result["output"] == "q>research>summarize>publish"
+        
+        with pytest.raises(Exception):
+            await service.resume_graph(graph, "exec-1")
+    finally:
+        node_handlers.unregister("counted")
+
+
+@pytest.mark.asyncio
+async def test_resume_without_checkpoints_fails():
+    """Test resuming an unknown execution raises an error."""
+    from app.services.checkpoint_store import InMemoryCheckpointStore
+    from app.exceptions import WorkflowExecutionError
+    
+    service = LanggraphService(checkpoint_store=InMemoryCheckpointStore())
+    with pytest.raises(WorkflowExecutionError):
+        await service.resume_graph(Mock(), "missing")
+
+
+@pytest.mark.asyncio
+async def test_node_timeout_and_deadline():
+    """Test per-node timeoutMs and the execution deadline bound node execution."""
+    import asyncio
+    from app.services.node_handlers import register_node_handler, node_handlers
+    from app.exceptions import ExecutionTimeoutError
+    
+    @register_node_handler("sleepy")
+    def sleepy_handler(service, node_config, tool=None):
+        async def node_func(state):
+            await asyncio.sleep(node_config["config"]["sleep"])
+            return {"output": "done", "node_id": node_config["id"]}
+        return node_func
+    
+    def definition(sleep, timeout_ms=None, deadline_ms=None):
+        data = {"sleep": sleep}
+        if timeout_ms:
+            data["timeoutMs"] = timeout_ms
+        return WorkflowDefinition(
+            nodes=[WorkflowNode(id="sleepy-1", type="sleepy", label="Sleepy", data=data)],
+            connections=[]
+        )
+    
+    try:
+        service = LanggraphService()
+        
+        graph = await service.create_graph(definition(1, timeout_ms=20))
+        with pytest.raises(ExecutionTimeoutError) as exc_info:
+            await service.execute_graph(graph, "x")
+        assert exc_info.value.context["node_id"] == "sleepy-1"
+        
+        graph = await service.create_graph(definition(1))
+        with pytest.raises(ExecutionTimeoutError):
+            await service.execute_graph(graph, "x", deadline_ms=20)
+        
+        graph = await service.create_graph(definition(0, timeout_ms=1000))
+        result = await service.execute_graph(graph, "x", deadline_ms=1000)
+        assert result["output"] == "done"
+        
+        with pytest.raises(GraphCompilationError):
+            await service.create_graph(definition(0, timeout_ms=-5))
+    finally:
+        node_handlers.unregister("sleepy")
+
+
+@pytest.mark.asyncio
+async def test_llm_nodes_refused_over_budget():
+    """Test LLM nodes stop running once the execution budget is used up."""
+    from app.services.usage_tracker import UsageTracker, usage_scope
+    from app.exceptions import BudgetExceededError
+    from tests.test_usage_tracker import UsageReportingChatModel
+    
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="llm-1", type="llm", label="Draft", data={"provider": "openai", "model": "gpt-4"}),
+            WorkflowNode(id="llm-2", type="llm", label="Refine", data={"provider": "openai", "model": "gpt-4"})
+        ],
+        connections=[WorkflowConnection(id="c1", source="llm-1", target="llm-2")]
+    )
+    
+    service = LanggraphService()
+    service.llm_service.create_llm = Mock(return_value=UsageReportingChatModel())
+    graph = await service.create_graph(definition)
+    
+    tracker = UsageTracker(max_tokens=100)
+    with usage_scope(tracker):
+        with pytest.raises(BudgetExceededError):
+            await service.execute_graph(graph, "question")
+    
+    assert tracker.llm_calls == 1
+    assert tracker.total_tokens == 150
@@ -0,0 +1,255 @@
+"""Tests for the node handler registry."""
+import pytest
+from app.services.langgraph_service import LanggraphService
+from app.services.node_handlers import (
+    NodeHandlerRegistry, node_handlers, register_node_handler,
+    passthrough_handler, parse_llm_config
+)
+from app.models.workflow import WorkflowDefinition, WorkflowNode, WorkflowConnection
+
+
+def test_resolve_falls_back_to_default():
+    """Test unknown node types resolve to the default handler."""
+    registry = NodeHandlerRegistry()
+    registry.set_default(passthrough_handler)
+    
+    assert registry.resolve("unknown-type") is passthrough_handler
+
+
+def test_resolve_without_default_raises():
+    """Test resolving an unknown type without default raises."""
+    registry = NodeHandlerRegistry()
+    
+    with pytest.raises(KeyError):
+        registry.resolve("unknown-type")
+
+
+def test_builtin_types_registered():
+    """Test built-in node types are registered."""
+    for node_type in ["input", "llm", "tool", "mcp-tool", "transform", "output"]:
+        assert node_type in node_handlers.types()
+
+
+def test_parse_llm_config():
+    """Test LLM config is read from the llm block with top-level fallbacks."""
+    parsed = parse_llm_config({
+        "llm": {"provider": "anthropic"},
+        "model": "claude-3",
+        "system_message": "Be brief"
+    })
+    
+    assert parsed["provider"] == "anthropic"
+    assert parsed["model"] == "claude-3"
+    assert parsed["system_message"] == "Be brief"
+    assert parsed["temperature"] is None
+
+
+@pytest.mark.asyncio
+async def test_custom_node_type():
+    """Test custom node types can be registered without touching the dispatcher."""
+    calls = []
+    
+    @register_node_handler("echo")
+    def echo_handler(service, node_config, tool=None):
+        calls.append(node_config["id"])
+        prefix = node_config["config"].get("prefix", "")
+        
+        async def node_func(state):
+            return {"output": f"{prefix}{state.get('input')}", "node_id": node_config["id"]}
+        
+        return node_func
+    
+    try:
+        service = LanggraphService()
+        definition = WorkflowDefinition(
+            nodes=[WorkflowNode(id="echo-1", type="echo", label="Echo", data={"prefix": "> "})],
+            connections=[]
+        )
+        graph = await service.create_graph(definition)
+        await service.execute_graph(graph, "hi")
+        result = await service.execute_graph(graph, "there")
+        
+        assert result["output"] == "> there"
+        assert calls == ["echo-1"]
+    finally:
+        node_handlers.unregister("echo")
+
+
+@pytest.mark.asyncio
+async def test_pipeline_transform_node():
+    """Test a transform node running a pipeline compiled when the graph is built."""
+    service = LanggraphService()
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="input-1", type="input", label="Input", data={}),
+            WorkflowNode(id="words", type="transform", label="Words", data={
+                "transform": {"type": "pipeline", "config": {"steps": [
+                    "trim",
+                    {"type": "split", "config": {"separator": " "}},
+                    {"type": "slice", "config": {"end": 2}}
+                ]}}
+            })
+        ],
+        connections=[WorkflowConnection(id="c1", source="input-1", target="words")]
+    )
+    graph = await service.create_graph(definition)
+    
+    result = await service.execute_graph(graph, "  one two three ")
+    
+    assert result["output"] == ["one", "two"]
+    assert result["state"]["node_id"] == "words"
+
+
+@pytest.mark.asyncio
+async def test_invalid_transform_fails_compilation():
+    """Test a transform with an invalid path fails when the graph is built."""
+    from app.exceptions import GraphCompilationError
+    
+    definition = WorkflowDefinition(
+        nodes=[WorkflowNode(id="pick", type="transform", label="Pick", data={
+            "transform": {"type": "extract_field", "config": {"path": "items[oops]"}}
+        })],
+        connections=[]
+    )
+    
+    with pytest.raises(GraphCompilationError):
+        await LanggraphService().create_graph(definition)
+
+
+@pytest.mark.asyncio
+async def test_streaming_transforms_pass_lazy_values():
+    """Test streaming transform nodes hand lazy values on and the result is materialized."""
+    from app.utils.streaming import LazyValue
+    
+    seen = []
+    
+    @register_node_handler("inspect")
+    def inspect_handler(service, node_config, tool=None):
+        async def node_func(state):
+            seen.append(state["output"])
+            return {"output": state["output"], "node_id": node_config["id"]}
+        return node_func
+    
+    try:
+        definition = WorkflowDefinition(
+            nodes=[
+                WorkflowNode(id="input-1", type="input", label="Input", data={}),
+                WorkflowNode(id="lines", type="transform", label="Lines", data={
+                    "streaming": True,
+                    "transform": {"type": "split", "config": {"separator": "\n"}}
+                }),
+                WorkflowNode(id="inspect-1", type="inspect", label="Inspect", data={}),
+                WorkflowNode(id="joined", type="transform", label="Joined", data={
+                    "streaming": True,
+                    "transform": {"type": "join", "config": {"separator": " | "}}
+                }),
+                WorkflowNode(id="upper", type="transform", label="Upper", data={
+                    "streaming": True,
+                    "transform": "uppercase"
+                })
+            ],
+            connections=[
+                WorkflowConnection(id="c1", source="input-1", target="lines"),
+                WorkflowConnection(id="c2", source="lines", target="inspect-1"),
+                WorkflowConnection(id="c3", source="inspect-1", target="joined"),
+                WorkflowConnection(id="c4", source="joined", target="upper")
+            ]
+        )
+        service = LanggraphService()
+        graph = await service.create_graph(definition)
+        
+        result = await service.execute_graph(graph, "a\nb\nc")
+        
+        assert isinstance(seen[0], LazyValue)
+        assert result["output"] == "A | B | C"
+    finally:
+        node_handlers.unregister("inspect")
+
+
+@pytest.mark.asyncio
+async def test_streaming_transforms_stay_lazy_with_checkpointing(sample_workflow):
+    """Test the executor, which records checkpoints, passes lazy values between streaming nodes."""
+    from app.services.workflow_executor import WorkflowExecutor
+    
+    seen = []
+    
+    @register_node_handler("inspect")
+    def inspect_handler(service, node_config, tool=None):
+        async def node_func(state):
+            seen.append(repr(state["output"]))
+            return {"output": state["output"], "node_id": node_config["id"]}
+        return node_func
+    
+    try:
+        definition = WorkflowDefinition(
+            nodes=[
+                WorkflowNode(id="input-1", type="input", label="Input", data={}),
+                WorkflowNode(id="text", type="transform", label="Text", data={
+                    "transform": {"type": "extract_field", "config": {"path": "text"}}
+                }),
+                WorkflowNode(id="lines", type="transform", label="Lines", data={
+                    "streaming": True,
+                    "transform": {"type": "split", "config": {"separator": "\n"}}
+                }),
+                WorkflowNode(id="inspect-1", type="inspect", label="Inspect", data={}),
+                WorkflowNode(id="joined", type="transform", label="Joined", data={
+                    "streaming": True,
+                    "transform": {"type": "join", "config": {"separator": " | "}}
+                }),
+                WorkflowNode(id="inspect-2", type="inspect", label="Inspect", data={}),
+                WorkflowNode(id="output-1", type="output", label="Output", data={})
+            ],
+            connections=[
+                WorkflowConnection(id="c0", source="input-1", target="text"),
+                WorkflowConnection(id="c1", source="text", target="lines"),
+                WorkflowConnection(id="c2", source="lines", target="inspect-1"),
+                WorkflowConnection(id="c3", source="inspect-1", target="joined"),
+                WorkflowConnection(id="c4", source="joined", target="inspect-2"),
+                WorkflowConnection(id="c5", source="inspect-2", target="output-1")
+            ],
+            langgraphConfig={"optimize": False}
+        )
+        workflow = sample_workflow
+        executor = WorkflowExecutor()
+        
+        execution = await executor.execute_workflow(workflow, definition, {"text": "a\nb\nc"})
+        
+        assert execution.status.value == "completed"
+        assert seen == ["<LazyList pending>", "<LazyText pending>"]
+        assert execution.output == "a | b | c"
+        checkpoints = executor.langgraph_service.get_checkpoints(execution.id)
+        recorded = [c["node_id"] for c in checkpoints if c["type"] == "node"]
+        assert "lines" not in recorded and "output-1" in recorded
+    finally:
+        node_handlers.unregister("inspect")
+
+
+@pytest.mark.asyncio
+async def test_sandboxed_transform_node(monkeypatch):
+    """Test sandboxed transform nodes run in the sandbox and are not fused with their neighbours."""
+    from app.services import transform_sandbox
+    
+    sandbox = transform_sandbox.TransformSandbox(max_workers=1)
+    monkeypatch.setattr(transform_sandbox, "_transform_sandbox", sandbox)
+    service = LanggraphService()
+    definition = WorkflowDefinition(
+        nodes=[
+            WorkflowNode(id="input-1", type="input", label="Input", data={}),
+            WorkflowNode(id="trim", type="transform", label="Trim", data={"transform": "trim"}),
+            WorkflowNode(id="upper", type="transform", label="Upper", data={"transform": "uppercase", "sandbox": True})
+        ],
+        connections=[
+            WorkflowConnection(id="c1", source="input-1", target="trim"),
+            WorkflowConnection(id="c2", source="trim", target="upper")
+        ]
+    )
+    
+    try:
+        graph = await service.create_graph(definition)
+        result = await service.execute_graph(graph, "  hello ")
+        
+        assert result["output"] == "HELLO"
+        assert sandbox.stats()["workers"] == 1
+        assert service.plan_graph(definition)[1]["fusedNodes"] == {}
+    finally:
+        sandbox.shutdown()
@@ -0,0 +1,52 @@
+"""Tests for path expressions."""
+import pytest
+from app.utils.path_expressions import compile_path
+
+PAYLOAD = {
+    "result": {
+        "items": [
+            {"id": 1, "name": "a", "meta": {"score": 0.9, "tags": ["x", "y"]}},
+            {"id": 2, "name": "b", "meta": {"score": 0.2, "tags": ["y"]}},
+            {"id": 3, "meta": {"score": 0.7, "tags": []}}
+        ],
+        "key.with.dots": "dotted"
+    }
+}
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("result.items[0].name", "a"),
+    ("$.result.items[-1].id", 3),
+    ("result.items[5].name", None),
+    ("result.missing.deeper", None),
+    ("result['key.with.dots']", "dotted"),
+    ("result.items[*].name", ["a", "b"]),
+    ("result.items[0:2].id", [1, 2]),
+    ("result.items[*].meta.tags[*]", ["x", "y", "y"]),
+    ("result.items[?(@.meta.score > 0.5)].id", [1, 3]),
+    ("result.items[?name == 'b'].meta.score", [0.2]),
+    ("result.items[0].meta.*", [0.9, ["x", "y"]]),
+    ("", PAYLOAD)
+])
+def test_paths(path, expected):
+    """Test keys, indices, slices, wildcards and predicates."""
+    assert compile_path(path)(PAYLOAD) == expected
+
+
+def test_non_container_values_are_none():
+    """Test walking into scalars and mismatched containers yields None or nothing."""
+    assert compile_path("a.b")({"a": 5}) is None
+    assert compile_path("a[0]")({"a": {"0": 1}}) is None
+    assert compile_path("a[*]")({"a": 5}) == []
+
+
+def test_compiled_paths_are_cached():
+    """Test the same expression compiles to the same accessor."""
+    assert compile_path("a.b[*]") is compile_path("a.b[*]")
+
+
+@pytest.mark.parametrize("path", ["a..b", "a[", "a[x]", "a]", "a[?(@.x >)]"])
+def test_invalid_paths_raise(path):
+    """Test malformed paths are rejected at compile time."""
+    with pytest.raises(ValueError):
+        compile_path(path)
@@ -0,0 +1,108 @@
+"""Tests for the execution result cache."""
+import pytest
+from app.services.result_cache import ExecutionResultCache, result_cache_ttl
+from app.services.workflow_executor import WorkflowExecutor
+from app.models.execution import ExecutionStatus
+from app.models.workflow import WorkflowDefinition
+
+
+def test_opt_in_and_ttl():
+    """Test only definitions that opt in are cached, with their own or the default TTL."""
+    assert result_cache_ttl(WorkflowDefinition()) is None
+    assert result_cache_ttl(WorkflowDefinition(langgraphConfig={"resultCache": {"enabled": False}})) is None
+    assert result_cache_ttl(WorkflowDefinition(langgraphConfig={"resultCache": {"ttlSeconds": 30}})) == 30
+    assert result_cache_ttl(WorkflowDefinition(langgraphConfig={"resultCache": True})) > 0
+
+
+def test_lru_expiry_and_invalidation():
+    """Test entries are evicted least recently used first, expire and drop per workflow."""
+    cache = ExecutionResultCache(max_entries=2)
+    cache.put("a", "wf-1", {"output": "A"}, 60)
+    cache.put("b", "wf-1", {"output": "B"}, 60)
+    assert cache.get("a")["output"] == "A"
+    cache.put("c", "wf-2", {"output": "C"}, 60)
+    
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    
+    cached = cache.get("a")
+    cached["output"] = "changed"
+    assert cache.get("a")["output"] == "A"
+    
+    cache.invalidate("wf-1")
+    assert cache.get("a") is None
+    assert cache.get("c")["output"] == "C"
+    
+    cache.put("d", "wf-2", {"output": "D"}, 0)
+    assert cache.get("d") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test results written to the disk tier are served by a new cache and dropped on invalidation."""
+    cache = ExecutionResultCache(max_entries=1, disk_path=str(tmp_path))
+    cache.put("a", "wf-1", {"output": "A"}, 60)
+    cache.put("b", "wf-2", {"output": "B"}, 60)
+    cache.close()
+    
+    reopened = ExecutionResultCache(max_entries=1, disk_path=str(tmp_path))
+    assert reopened.get("a")["output"] == "A"
+    assert reopened.stats()["diskHits"] == 1
+    reopened.invalidate("wf-2")
+    assert reopened.get("b") is None
+    reopened.close()
+    
+    disk_only = ExecutionResultCache(max_entries=0, disk_path=str(tmp_path))
+    assert disk_only.get("a")["output"] == "A"
+    assert disk_only.stats()["entries"] == 0
+    disk_only.close()
+
+
+@pytest.mark.asyncio
+async def test_executor_serves_repeated_execution_from_cache(monkeypatch, sample_workflow):
+    """Test an identical execution of an opted-in workflow completes without running the engine."""
+    executor = WorkflowExecutor()
+    executor.result_cache = ExecutionResultCache()
+    calls = []
+    
+    async def execute_engine(workflow, definition, input_data, execution_id):
+        calls.append(execution_id)
+        return {"output": input_data["text"].upper()}
+    
+    monkeypatch.setattr(executor, "_execute_engine", execute_engine)
+    workflow = sample_workflow
+    definition = WorkflowDefinition(langgraphConfig={"resultCache": True})
+    
+    first = await executor.execute_workflow(workflow, definition, {"text": "hi"})
+    second = await executor.execute_workflow(workflow, definition, {"text": "hi"})
+    other = await executor.execute_workflow(workflow, definition, {"text": "bye"})
+    
+    assert second.status == ExecutionStatus.COMPLETED and second.output == "HI"
+    assert second.cacheHit and second.cachedFrom == first.id
+    assert not first.cacheHit and not other.cacheHit
+    assert calls == [first.id, other.id]
+    
+    uncached = await executor.execute_workflow(workflow, WorkflowDefinition(), {"text": "hi"})
+    assert not uncached.cacheHit
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_writes_in_background(tmp_path):
+    """Test disk lookups see results and invalidations the writer hasn't committed, and non-JSON results aren't cached."""
+    cache = ExecutionResultCache(max_entries=0, disk_path=str(tmp_path), flush_interval_ms=60000)
+    assert cache.put("a", "wf-1", {"output": "A"}, 60)
+    assert (await cache.lookup("a"))["output"] == "A"
+    
+    cache.flush()
+    cache.put("b", "wf-1", {"output": "B"}, 60)
+    cache.invalidate("wf-1")
+    assert await cache.lookup("a") is None
+    assert await cache.lookup("b") is None
+    
+    assert not cache.put("c", "wf-2", {"output": {1, 2}}, 60)
+    assert await cache.lookup("c") is None
+    cache.close()
+    
+    reopened = ExecutionResultCache(max_entries=0, disk_path=str(tmp_path))
+    assert reopened.get("a") is None
+    reopened.close()
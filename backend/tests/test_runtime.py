@@ -0,0 +1,67 @@
+"""Tests for the shared execution runtime."""
+import pytest
+from app.services import execution_store as execution_store_module
+from app.services import runtime as runtime_module
+from app.services.runtime import ExecutionRuntime, close_runtime, get_runtime
+from app.services.execution_store import SQLiteExecutionStore, get_execution_store
+from app.services.result_cache import get_result_cache
+from app.models.execution import WorkflowExecution, ExecutionStatus
+
+
+@pytest.mark.asyncio
+async def test_closed_runtime_is_replaced_and_leaves_shared_stores_open(tmp_path, monkeypatch):
+    """Test closing the runtime closes only its own store and the next startup builds a new one."""
+    shared_store = SQLiteExecutionStore(str(tmp_path / "shared.db"), flush_interval_ms=10)
+    monkeypatch.setattr(execution_store_module, "_execution_store", shared_store)
+    monkeypatch.setattr(runtime_module, "_runtime", None)
+    monkeypatch.setattr(
+        runtime_module,
+        "create_execution_store",
+        lambda: SQLiteExecutionStore(str(tmp_path / "executions.db"), flush_interval_ms=10)
+    )
+    first = get_runtime()
+    assert get_runtime() is first
+    assert first.executor.execution_store is first.execution_store
+    assert first.executor.result_cache is first.result_cache
+    assert first.execution_store is not get_execution_store()
+    assert first.result_cache is not get_result_cache()
+    execution = WorkflowExecution(
+        id="exec-1",
+        workflowId="wf-1",
+        status=ExecutionStatus.COMPLETED,
+        startedAt="2024-01-01T00:00:00"
+    )
+    first.execution_store.save(execution)
+    
+    await close_runtime()
+    second = get_runtime()
+    
+    assert second is not first
+    assert second.execution_store.get("exec-1").status == ExecutionStatus.COMPLETED
+    assert first.http_client.is_closed and not second.http_client.is_closed
+    
+    # The process-wide store and cache still work after the runtime closed
+    get_execution_store().save(execution)
+    get_execution_store().flush()
+    assert get_execution_store().get("exec-1").status == ExecutionStatus.COMPLETED
+    get_result_cache().put("fingerprint", "wf-1", {"output": "cached"}, 60)
+    assert get_result_cache().get("fingerprint")["output"] == "cached"
+    get_result_cache().invalidate("wf-1")
+    await close_runtime()
+    assert runtime_module._runtime is None
+    shared_store.close()
+
+
+@pytest.mark.asyncio
+async def test_runtime_services_share_clients():
+    """Test the runtime's services share one LLM service and MCP adapter."""
+    runtime = ExecutionRuntime()
+    
+    assert runtime.agent_service.llm_service is runtime.llm_service
+    assert runtime.chain_service.llm_service is runtime.llm_service
+    assert runtime.langgraph_service.mcp_adapter is runtime.mcp_adapter
+    assert runtime.executor.langgraph_service is runtime.langgraph_service
+    assert runtime.mcp_adapter.http_client is runtime.http_client
+    assert runtime.mcp_adapter.create_langchain_tool({"id": "search"}).http_client is runtime.http_client
+    await runtime.close()
+    assert runtime.http_client.is_closed
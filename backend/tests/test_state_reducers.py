@@ -0,0 +1,43 @@
+"""Tests for state reducers."""
+import pytest
+from app.utils.state_reducers import resolve_reducers, merge_branch_updates
+from app.models.workflow import WorkflowDefinition
+from app.exceptions import GraphCompilationError
+
+
+def test_default_reducers():
+    """Test outputs are collected and other keys keep the last value."""
+    merged = merge_branch_updates(
+        [{"output": 1, "node_id": "a"}, {"output": 2, "node_id": "b"}],
+        resolve_reducers(WorkflowDefinition())
+    )
+    
+    assert merged == {"output": [1, 2], "node_id": "b"}
+
+
+def test_declared_reducers():
+    """Test reducers declared in the state schema and langgraphConfig."""
+    definition = WorkflowDefinition(
+        stateSchema={
+            "type": "object",
+            "properties": {"documents": {"type": "array", "reducer": "extend"}}
+        },
+        langgraphConfig={"reducers": {"score": "sum", "output": "last"}}
+    )
+    merged = merge_branch_updates(
+        [
+            {"documents": ["a"], "score": 1, "output": "x"},
+            {"documents": ["b", "c"], "score": 2, "output": "y"}
+        ],
+        resolve_reducers(definition)
+    )
+    
+    assert merged == {"documents": ["a", "b", "c"], "score": 3, "output": "y"}
+
+
+def test_unknown_reducer_rejected():
+    """Test unknown reducer names fail compilation."""
+    definition = WorkflowDefinition(langgraphConfig={"reducers": {"output": "median"}})
+    
+    with pytest.raises(GraphCompilationError):
+        resolve_reducers(definition)
@@ -0,0 +1,80 @@
+"""Tests for streaming transforms."""
+import pytest
+from app.utils import streaming
+from app.utils.streaming import (
+    LazyList, LazyText, compile_streaming_transform, materialize, materialize_values
+)
+from app.utils.transforms import compile_transform
+
+TEXT = "alpha, beta, gamma\ndelta, epsilon\n\nzeta, eta, theta, iota"
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Use tiny chunks so separators and patterns straddle chunk boundaries."""
+    monkeypatch.setattr(streaming, "CHUNK_SIZE", 4)
+
+
+@pytest.mark.parametrize("transform", [
+    {"type": "replace", "config": {"old": "a, ", "new": "A;"}},
+    {"type": "replace", "config": {"old": "eta", "new": ""}},
+    {"type": "replace", "config": {"old": "", "new": "-"}},
+    {"type": "split", "config": {"separator": ", "}},
+    {"type": "split", "config": {"separator": "\n"}},
+    {"type": "split"},
+    "uppercase",
+    "length",
+    {"type": "pipeline", "config": {"steps": [
+        {"type": "split", "config": {"separator": "\n"}},
+        {"type": "join", "config": {"separator": " / "}},
+        {"type": "replace", "config": {"old": " / ", "new": "|"}},
+        "uppercase"
+    ]}},
+    {"type": "pipeline", "config": {"steps": [{"type": "split", "config": {"separator": ", "}}, "to_json"]}},
+    {"type": "pipeline", "config": {"steps": [{"type": "split", "config": {"separator": ", "}}, "length"]}},
+    {"type": "pipeline", "config": {"steps": [{"type": "split", "config": {"separator": ", "}}, "lowercase"]}}
+])
+@pytest.mark.parametrize("input_data", [TEXT, "", ["a", 1, None], {"a": 1}])
+def test_streaming_matches_eager(small_chunks, transform, input_data):
+    """Test streaming transforms produce exactly what the eager transforms do."""
+    expected = compile_transform(transform)(input_data)
+    
+    assert materialize(compile_streaming_transform(transform)(input_data)) == expected
+
+
+@pytest.mark.parametrize("text, old", [
+    ("aaaaaaaaa", "aa"),
+    ("abababababa", "aba"),
+    ("xaaaybaaaab", "aaa"),
+    ("a" * 20 + "b", "ab")
+])
+def test_streaming_replace_with_overlapping_patterns(small_chunks, text, old):
+    """Test self-overlapping patterns replace like str.replace across chunk boundaries."""
+    transform = {"type": "replace", "config": {"old": old, "new": "<>"}}
+    
+    assert materialize(compile_streaming_transform(transform)(text)) == text.replace(old, "<>")
+
+
+def test_lazy_values_are_reusable_and_cached(small_chunks):
+    """Test a lazy value can be iterated repeatedly and materializes once."""
+    produced = []
+    
+    def produce():
+        produced.append(1)
+        return iter(["ab", "cd"])
+    
+    text = LazyText(produce)
+    
+    assert "".join(text) == "".join(text) == "abcd"
+    assert text.materialize() == "abcd"
+    assert text.materialize() is text.materialize()
+    assert len(produced) == 3
+    assert list(text) == ["abcd"]
+
+
+def test_materialize_values_only_copies_when_needed():
+    """Test state without lazy values is returned unchanged."""
+    state = {"output": "x", "input": "y"}
+    
+    assert materialize_values(state) is state
+    assert materialize_values({"output": LazyList(lambda: iter([1, 2]))}) == {"output": [1, 2]}
@@ -0,0 +1,145 @@
+"""Tests for the transform sandbox."""
+import asyncio
+import time
+import pytest
+from multiprocessing import shared_memory
+from app.services import transform_sandbox
+from app.services.transform_sandbox import TransformSandbox
+from app.exceptions import ExecutionTimeoutError, TransformExecutionError
+
+
+def double(value):
+    return value * 2
+
+
+def busy(value):
+    ends_at = time.monotonic() + value
+    while time.monotonic() < ends_at:
+        pass
+    return "done"
+
+
+def hang(value):
+    time.sleep(60)
+
+
+def allocate(value):
+    return bytearray(value * 1024 * 1024)
+
+
+@pytest.fixture
+def sandbox():
+    """A one-worker sandbox that moves strings of 16+ characters to shared memory."""
+    sandbox = TransformSandbox(max_workers=1, timeout_ms=10000, memory_limit_mb=64, shared_memory_threshold=16)
+    yield sandbox
+    sandbox.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_runs_transforms_in_worker_process(sandbox):
+    """Test callables and named transforms run in a reused worker process."""
+    assert await sandbox.run(double, 21) == 42
+    assert await sandbox.run("uppercase", "short") == "SHORT"
+    assert sandbox.stats() == {"maxWorkers": 1, "workers": 1, "idleWorkers": 1}
+
+
+@pytest.mark.asyncio
+async def test_large_payloads_use_shared_memory(sandbox):
+    """Test large strings and bytes round-trip through shared memory."""
+    text = "large payload é " * 1000
+    
+    assert await sandbox.run("uppercase", text) == text.upper()
+    assert await sandbox.run(double, b"0123456789abcdef") == b"0123456789abcdef" * 2
+
+
+@pytest.mark.asyncio
+async def test_hanging_transform_times_out_and_worker_is_replaced(sandbox):
+    """Test a timed out call kills its worker and later calls get a fresh one."""
+    with pytest.raises(ExecutionTimeoutError):
+        await sandbox.run(hang, None, timeout_ms=300, node_id="slow")
+    
+    assert sandbox.stats()["workers"] == 0
+    assert await sandbox.run(double, 2) == 4
+
+
+@pytest.mark.asyncio
+async def test_memory_limit(sandbox):
+    """Test a transform allocating past the memory limit fails without killing the worker."""
+    with pytest.raises(TransformExecutionError) as error:
+        await sandbox.run(allocate, 256)
+    
+    assert error.value.context["memory_limit_mb"] == 64
+    assert len(await sandbox.run(allocate, 1)) == 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive(sandbox):
+    """Test the loop keeps running other work while a CPU-heavy transform runs."""
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+    
+    await sandbox.run(double, 0)  # Start the worker outside the measurement
+    task = asyncio.create_task(ticker())
+    assert await sandbox.run(busy, 0.5) == "done"
+    task.cancel()
+    
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_unpicklable_transforms_run_in_threads():
+    """Test every transform, lambdas included, runs in a thread when the pool is disabled."""
+    sandbox = TransformSandbox(max_workers=0)
+    
+    assert not sandbox.can_sandbox(double)
+    assert not TransformSandbox().can_sandbox(lambda value: value)
+    assert await sandbox.run(lambda value: value + 1, 1) == 2
+    assert sandbox.stats()["workers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unpicklable_transforms_are_rejected(sandbox):
+    """Test a transform that can't be sent to a worker fails instead of running unkillable in a thread."""
+    with pytest.raises(TransformExecutionError):
+        await sandbox.run(lambda value: value, 1)
+    
+    assert sandbox.stats()["workers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_packing_keeps_worker_count(sandbox, monkeypatch):
+    """Test a payload that can't be moved to shared memory neither leaks a worker nor loses the pool's count."""
+    await sandbox.run(double, 1)
+    
+    def fail(value, threshold):
+        raise OSError("No space left on device")
+    
+    monkeypatch.setattr(transform_sandbox, "_pack", fail)
+    with pytest.raises(OSError):
+        await sandbox.run(double, 1)
+    monkeypatch.undo()
+    
+    assert sandbox.stats() == {"maxWorkers": 1, "workers": 1, "idleWorkers": 1}
+    assert await sandbox.run(double, 2) == 4
+
+
+@pytest.mark.asyncio
+async def test_stopped_worker_result_shared_memory_is_freed(sandbox):
+    """Test stopping a worker that already sent a shared-memory result unlinks the segment."""
+    worker = sandbox._start_worker()
+    worker.connection.send(("uppercase", ("inline", "a result large enough for shared memory")))
+    assert await asyncio.to_thread(worker.connection.poll, 10)
+    receive = asyncio.ensure_future(asyncio.to_thread(worker.connection.recv))
+    
+    await sandbox._stop_worker(worker, receive)
+    
+    status, (kind, (name, size, value_type)) = receive.result()
+    assert (status, kind) == ("ok", "shared")
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    assert sandbox.stats()["workers"] == 0
@@ -0,0 +1,158 @@
+"""Tests for compiled transforms."""
+import pytest
+from app.utils.transforms import (
+    compile_transform, compile_pipeline, apply_transform, register_transform, transform_types,
+    compute_transform_hash, get_transform, transform_cache_stats
+)
+
+
+@pytest.mark.parametrize("transform, input_data, expected", [
+    ("passthrough", {"a": 1}, {"a": 1}),
+    ("to_string", 42, "42"),
+    ("to_json", '{"a": 1}', {"a": 1}),
+    ("to_json", {"a": 1}, '{"a": 1}'),
+    ("to_json", "not json", "not json"),
+    ({"type": "extract_field", "config": {"field": "a"}}, {"a": 1}, 1),
+    ({"type": "set_field", "config": {"field": "b", "value": 2}}, {"a": 1}, {"a": 1, "b": 2}),
+    ({"type": "merge", "config": {"data": {"b": 2}}}, {"a": 1}, {"a": 1, "b": 2}),
+    ({"type": "filter", "config": {"field": "ok", "value": True}}, [{"ok": True}, {"ok": False}, 1], [{"ok": True}]),
+    ({"type": "map", "config": {"field": "a"}}, [{"a": 1}, {"a": 2}, 3], [1, 2, 3]),
+    ("uppercase", "hello", "HELLO"),
+    ("lowercase", 5, "5"),
+    ("trim", "  x  ", "x"),
+    ({"type": "replace", "config": {"old": "a", "new": "b"}}, "banana", "bbnbnb"),
+    ({"type": "split", "config": {"separator": ","}}, "a,b", ["a", "b"]),
+    ({"type": "join", "config": {"separator": "-"}}, [1, 2], "1-2"),
+    ("length", [1, 2, 3], 3),
+    ("length", None, 0),
+    ({"type": "slice", "config": {"start": 1, "end": 3}}, "abcd", "bc"),
+    ("no-such-transform", "x", "x")
+])
+def test_named_transforms(transform, input_data, expected):
+    """Test each built-in transform type."""
+    assert compile_transform(transform)(input_data) == expected
+
+
+def test_pipeline_applies_steps_in_order():
+    """Test a pipeline chains its steps, including nested pipelines."""
+    pipeline = compile_transform({
+        "type": "pipeline",
+        "config": {"steps": [
+            "trim",
+            {"type": "pipeline", "config": {"steps": ["uppercase", {"type": "split", "config": {"separator": " "}}]}},
+            "length"
+        ]}
+    })
+    
+    assert pipeline("  a b c  ") == 3
+
+
+def test_compile_pipeline_drops_identity_steps():
+    """Test a pipeline of a single real step is that step."""
+    upper = compile_transform("uppercase")
+    
+    assert compile_pipeline([]) is compile_transform(None)
+    assert compile_pipeline(["passthrough", "uppercase"])("x") == upper("x") == "X"
+
+
+def test_callable_transform_returns_input_on_error():
+    """Test callable transforms fall back to their input when they raise."""
+    assert apply_transform(2, lambda x: x * 10) == 20
+    assert apply_transform("x", lambda x: 1 / 0) == "x"
+
+
+def test_config_parsed_once_at_compile_time():
+    """Test custom transforms are compiled once and the result applied many times."""
+    compilations = []
+    
+    @register_transform("add")
+    def compile_add(config):
+        compilations.append(config)
+        amount = config["amount"]
+        return lambda value: value + amount
+    
+    assert "add" in transform_types()
+    add = compile_transform({"type": "add", "config": {"amount": 2}})
+    
+    assert [add(value) for value in range(3)] == [2, 3, 4]
+    assert compilations == [{"amount": 2}]
+
+
+def test_path_based_list_transforms():
+    """Test extract_field, filter and map with nested paths."""
+    payload = {"data": {"hits": [
+        {"doc": {"title": "a", "lang": "en"}, "score": 3},
+        {"doc": {"title": "b", "lang": "de"}, "score": 1},
+        {"doc": {"lang": "en"}, "score": 2}
+    ]}}
+    pipeline = compile_pipeline([
+        {"type": "extract_field", "config": {"path": "data.hits"}},
+        {"type": "filter", "config": {"path": "doc.lang", "value": "en"}},
+        {"type": "map", "config": {"path": "doc.title"}}
+    ])
+    
+    assert pipeline(payload) == ["a", None]
+    assert apply_transform(
+        payload["data"]["hits"],
+        {"type": "filter", "config": {"where": "score >= 2 and doc.lang == 'en'"}}
+    ) == [payload["data"]["hits"][0], payload["data"]["hits"][2]]
+
+
+def test_invalid_path_fails_at_compile_time():
+    """Test invalid paths are reported when compiling, not when applying."""
+    with pytest.raises(ValueError):
+        compile_transform({"type": "map", "config": {"path": "items[?"}})
+
+
+@pytest.mark.parametrize("steps", [
+    [{"type": "filter", "config": {"field": "lang", "value": "en"}}, {"type": "map", "config": {"field": "id"}}],
+    [{"type": "slice", "config": {"start": 1}}, {"type": "filter", "config": {"field": "lang", "value": None}}],
+    [{"type": "filter", "config": {"field": "tags", "value": ["x"]}}, "length"],
+    [{"type": "filter", "config": {"field": "lang", "value": "en"}}, {"type": "project", "config": {"fields": ["id"]}}],
+    [{"type": "aggregate", "config": {"field": "score", "operation": "mean"}}],
+    [{"type": "aggregate", "config": {"field": "lang", "operation": "count"}}],
+    [{"type": "filter", "config": {"field": "lang", "value": "en"}}, "uppercase"]
+])
+@pytest.mark.parametrize("numpy_available", [True, False])
+def test_columnar_pipeline_matches_row_pipeline(steps, numpy_available, monkeypatch):
+    """Test columnar pipelines give the same results as row-by-row ones, with and without numpy."""
+    from app.utils import columnar
+    
+    if not numpy_available:
+        monkeypatch.setattr(columnar, "np", None)
+    records = [
+        {"id": 1, "lang": "en", "score": 3, "tags": ["x"]},
+        {"id": 2, "lang": "de", "score": 4, "tags": []},
+        {"id": 3, "score": None, "tags": ["x"]},
+        {"id": 4, "lang": "en", "score": 8, "tags": ["y"]}
+    ]
+    rows = compile_transform({"type": "pipeline", "config": {"steps": steps}})
+    columns = compile_transform({"type": "pipeline", "config": {"steps": steps, "columnar": True}})
+    
+    for input_data in (records, records + ["not a record"], [], "text"):
+        assert columns(input_data) == rows(input_data)
+
+
+def test_aggregate_and_project_transforms():
+    """Test the aggregate and project transforms on their own."""
+    records = [{"n": 1, "m": "a"}, {"n": None}, {"n": 5}, "skipped"]
+    
+    assert apply_transform(records, {"type": "aggregate", "config": {"field": "n", "operation": "sum"}}) == 6
+    assert apply_transform(records, {"type": "aggregate", "config": {"field": "n", "operation": "max"}}) == 5
+    assert apply_transform([], {"type": "aggregate", "config": {"operation": "mean"}}) is None
+    assert apply_transform(records[:2], {"type": "project", "config": {"fields": ["m"]}}) == [{"m": "a"}, {"m": None}]
+    with pytest.raises(ValueError):
+        compile_transform({"type": "aggregate", "config": {"operation": "median"}})
+
+
+def test_compiled_transforms_are_cached_by_config():
+    """Test equal configs share one compiled function and callables are not cached."""
+    config = {"type": "replace", "config": {"old": "a", "new": "b"}}
+    reordered = {"config": {"new": "b", "old": "a"}, "type": "replace"}
+    hits = transform_cache_stats()["hits"]
+    
+    assert compute_transform_hash(config) == compute_transform_hash(reordered)
+    assert get_transform(config) is get_transform(reordered)
+    assert transform_cache_stats()["hits"] == hits + 1
+    assert compute_transform_hash(str.upper) is None
+    assert get_transform(str.upper)("x") == "X"
@@ -0,0 +1,93 @@
+"""Tests for token usage and budget tracking."""
+import pytest
+from typing import Any, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from app.services.llm_service import LLMService
+from app.services.usage_tracker import UsageTracker, usage_scope, get_model_pricing, estimate_cost
+from app.exceptions import BudgetExceededError
+
+
+class UsageReportingChatModel(BaseChatModel):
+    """Chat model returning a fixed reply and reporting token usage."""
+    
+    reply: str = "ok"
+    prompt_tokens: Optional[int] = 100
+    completion_tokens: Optional[int] = 50
+    
+    @property
+    def _llm_type(self) -> str:
+        return "usage-reporting"
+    
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        llm_output = {"model_name": "gpt-4"}
+        if self.prompt_tokens is not None:
+            llm_output["token_usage"] = {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens
+            }
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=self.reply))],
+            llm_output=llm_output
+        )
+
+
+def test_pricing_matches_model_prefix():
+    """Test dated model names use their base model's pricing."""
+    assert get_model_pricing("gpt-4o-mini-2024-07-18") == get_model_pricing("gpt-4o-mini")
+    assert get_model_pricing("unknown-model") == get_model_pricing("default")
+    assert estimate_cost("gpt-4", 1000, 1000) == pytest.approx(0.09)
+
+
+def test_tracker_budget():
+    """Test the tracker refuses calls once a budget is used up."""
+    tracker = UsageTracker(max_tokens=200)
+    tracker.check()
+    tracker.record("gpt-4", 150, 50)
+    
+    with pytest.raises(BudgetExceededError) as exc_info:
+        tracker.check()
+    assert exc_info.value.context["usage"]["totalTokens"] == 200
+
+
+@pytest.mark.asyncio
+async def test_llm_invoke_records_usage_and_enforces_budget():
+    """Test LLM calls report usage and are refused over budget."""
+    service = LLMService()
+    llm = UsageReportingChatModel()
+    tracker = UsageTracker(max_cost=0.01)
+    
+    with usage_scope(tracker):
+        await service.invoke(llm, [HumanMessage(content="hi")])
+        snapshot = tracker.snapshot()
+        assert snapshot["totalTokens"] == 150
+        assert snapshot["cost"] == pytest.approx(0.006)
+        
+        await service.invoke(llm, [HumanMessage(content="hi")])
+        with pytest.raises(BudgetExceededError):
+            await service.invoke(llm, [HumanMessage(content="hi")])
+    
+    assert tracker.llm_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_usage_estimated_when_not_reported():
+    """Test usage is estimated from text when the provider reports none."""
+    service = LLMService()
+    llm = UsageReportingChatModel(reply="x" * 40, prompt_tokens=None)
+    tracker = UsageTracker()
+    
+    with usage_scope(tracker):
+        await service.invoke(llm, [HumanMessage(content="y" * 80)])
+    
+    assert tracker.completion_tokens == 10
+    assert tracker.prompt_tokens == 20
+    assert tracker.snapshot()["estimated"] is True
+
+
+@pytest.mark.asyncio
+async def test_no_tracking_outside_scope():
+    """Test LLM calls outside an execution are not tracked."""
+    response = await LLMService().invoke(UsageReportingChatModel(), [HumanMessage(content="hi")])
+    assert response.content == "ok"
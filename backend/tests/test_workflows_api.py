@@ -0,0 +1,166 @@
+"""Tests for workflow API endpoints."""
+import asyncio
+import json
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.runtime import get_runtime
+
+client = TestClient(app)
+
+
+def _create_graph_workflow():
+    response = client.post("/api/workflows", json={
+        "name": "Batch Workflow",
+        "engine": "langgraph",
+        "workflowType": "graph"
+    })
+    workflow_id = response.json()["id"]
+    client.put(f"/api/workflows/{workflow_id}/definition", json={
+        "nodes": [
+            {"id": "input-1", "type": "input", "label": "Input"},
+            {"id": "upper", "type": "transform", "label": "Upper", "data": {"transform": "uppercase"}}
+        ],
+        "connections": [{"id": "c1", "source": "input-1", "target": "upper"}]
+    })
+    return workflow_id
+
+
+def test_execute_batch_json_array():
+    """Test batch execution of a JSON array streams one NDJSON result per input."""
+    workflow_id = _create_graph_workflow()
+    
+    response = client.post(
+        f"/api/workflows/{workflow_id}/execute-batch?concurrency=2",
+        json=["a", "b", "c"]
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted((r["index"], r["output"]) for r in results) == [(0, "A"), (1, "B"), (2, "C")]
+    assert all(r["status"] == "completed" for r in results)
+
+
+def test_execute_batch_ndjson():
+    """Test batch execution accepts NDJSON input."""
+    workflow_id = _create_graph_workflow()
+    
+    response = client.post(
+        f"/api/workflows/{workflow_id}/execute-batch",
+        content='"x"\n"y"\n',
+        headers={"content-type": "application/x-ndjson"}
+    )
+    
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r["output"] for r in results) == ["X", "Y"]
+
+
+def test_execute_batch_invalid_body():
+    """Test malformed batch input is rejected."""
+    workflow_id = _create_graph_workflow()
+    
+    response = client.post(
+        f"/api/workflows/{workflow_id}/execute-batch",
+        content="not json",
+        headers={"content-type": "application/x-ndjson"}
+    )
+    
+    assert response.status_code == 400
+
+
+def test_execute_batch_unknown_workflow():
+    """Test batch execution of an unknown workflow returns 404."""
+    response = client.post("/api/workflows/missing/execute-batch", json=[1])
+    assert response.status_code == 404
+
+
+def test_execute_without_waiting_returns_202():
+    """Test wait=false queues the execution and the execution endpoints follow it to completion."""
+    workflow_id = _create_graph_workflow()
+    
+    # One client context keeps one event loop, so the queue workers outlive the request
+    with TestClient(app) as session:
+        response = session.post(f"/api/workflows/{workflow_id}/execute?wait=false", json={"text": "hi"})
+        
+        assert response.status_code == 202
+        execution = response.json()
+        assert execution["status"] == "queued"
+        assert response.headers["location"] == f"/api/workflows/{workflow_id}/executions/{execution['id']}"
+        
+        for _ in range(100):
+            execution = session.get(response.headers["location"]).json()
+            if execution["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.01)
+        
+        assert execution["status"] == "completed"
+        assert execution["queuedAt"] is not None
+        history = session.get(f"/api/workflows/{workflow_id}/executions").json()
+        assert [item["id"] for item in history] == [execution["id"]]
+
+
+def test_execution_history_pages_with_cursor():
+    """Test the history endpoint pages through executions with the X-Next-Cursor header."""
+    workflow_id = _create_graph_workflow()
+    for text in ("a", "b", "c"):
+        client.post(f"/api/workflows/{workflow_id}/execute", json={"text": text})
+    
+    first = client.get(f"/api/workflows/{workflow_id}/executions?limit=2&payload=false")
+    second = client.get(
+        f"/api/workflows/{workflow_id}/executions?limit=2&cursor={first.headers['x-next-cursor']}"
+    )
+    
+    assert len(first.json()) == 2
+    assert all(item["input"] is None for item in first.json())
+    assert len(second.json()) == 1
+    assert "x-next-cursor" not in second.headers
+    assert second.json()[0]["input"] == {"text": "a"}
+    assert client.get(f"/api/workflows/{workflow_id}/executions?cursor=bad").status_code == 400
+
+
+def test_idempotency_key_returns_the_same_execution():
+    """Test repeating an Idempotency-Key replays its execution and rejects different input."""
+    workflow_id = _create_graph_workflow()
+    headers = {"Idempotency-Key": "order-42"}
+    
+    first = client.post(f"/api/workflows/{workflow_id}/execute", json={"text": "hi"}, headers=headers)
+    second = client.post(f"/api/workflows/{workflow_id}/execute", json={"text": "hi"}, headers=headers)
+    conflict = client.post(f"/api/workflows/{workflow_id}/execute", json={"text": "bye"}, headers=headers)
+    
+    assert first.status_code == 200 and "x-execution-reused" not in first.headers
+    assert second.status_code == 200
+    assert second.headers["x-execution-reused"] == "true"
+    assert second.json()["id"] == first.json()["id"]
+    assert conflict.status_code == 422
+    history = client.get(f"/api/workflows/{workflow_id}/executions").json()
+    assert len(history) == 1
+
+
+def test_routers_share_one_runtime(monkeypatch):
+    """Test an execution queued through the workflows router is cancelled through the executions router."""
+    runtime = get_runtime()
+    assert runtime.agent_service.llm_service is runtime.llm_service
+    assert runtime.chain_service.mcp_adapter is runtime.mcp_adapter
+    assert runtime.langgraph_service is runtime.executor.langgraph_service
+    
+    async def execute_engine(workflow, definition, input_data, execution_id):
+        await asyncio.sleep(10)
+        return {"output": "late"}
+    
+    monkeypatch.setattr(runtime.executor, "_execute_engine", execute_engine)
+    workflow_id = _create_graph_workflow()
+    
+    with TestClient(app) as session:
+        response = session.post(f"/api/workflows/{workflow_id}/execute?wait=false", json={"text": "hi"})
+        execution_id = response.json()["id"]
+        for _ in range(100):
+            if session.get(response.headers["location"]).json()["status"] == "running":
+                break
+            time.sleep(0.01)
+        
+        cancelled = session.post(f"/api/workflows/{workflow_id}/executions/{execution_id}/cancel")
+        
+        assert cancelled.status_code == 200
+        assert cancelled.json()["status"] == "cancelled"
+        assert session.get(response.headers["location"]).json()["status"] == "cancelled"